@@ -0,0 +1,33 @@
+#!/usr/bin/env bash
+cd /global/homes/i/icecubed/NEWLTA/lta
+source env/bin/activate
+cd /global/homes/i/icecubed/NEWLTA/lta/bin
+export COMPONENT_NAME=${COMPONENT_NAME:="$(hostname)-pipe0-nersc-fused-runner"}
+export DEST_ROOT_PATH=${DEST_ROOT_PATH:="/global/cscratch1/sd/icecubed/jade-disk/lta"}
+export DEST_SITE=${DEST_SITE:="NERSC"}
+export FILE_CATALOG_REST_TOKEN=${FILE_CATALOG_REST_TOKEN:="$(<service-token)"}
+export FILE_CATALOG_REST_URL=${FILE_CATALOG_REST_URL:="https://file-catalog.icecube.wisc.edu"}
+export FUSED_STAGES=${FUSED_STAGES:="site_move_verifier,nersc_mover,nersc_verifier"}
+export HEARTBEAT_PATCH_RETRIES=${HEARTBEAT_PATCH_RETRIES:="3"}
+export HEARTBEAT_PATCH_TIMEOUT_SECONDS=${HEARTBEAT_PATCH_TIMEOUT_SECONDS:="30"}
+export HEARTBEAT_SLEEP_DURATION_SECONDS=${HEARTBEAT_SLEEP_DURATION_SECONDS:="30"}
+export INPUT_STATUS=${INPUT_STATUS:="transferring"}
+export LTA_REST_TOKEN=${LTA_REST_TOKEN:="$(<service-token)"}
+export LTA_REST_URL=${LTA_REST_URL:="https://lta.icecube.aq:443"}
+export MAX_COUNT=${MAX_COUNT:="2"}
+export NERSC_MOVER_INPUT_STATUS=${NERSC_MOVER_INPUT_STATUS:="taping"}
+export NERSC_MOVER_OUTPUT_STATUS=${NERSC_MOVER_OUTPUT_STATUS:="verifying"}
+export NERSC_VERIFIER_INPUT_STATUS=${NERSC_VERIFIER_INPUT_STATUS:="verifying"}
+export OTEL_EXPORTER_OTLP_ENDPOINT=${OTEL_EXPORTER_OTLP_ENDPOINT:="https://telemetry.dev.icecube.aq/v1/traces"}
+export OUTPUT_STATUS=${OUTPUT_STATUS:="completed"}
+export RSE_BASE_PATH=${RSE_BASE_PATH:="/global/cscratch1/sd/icecubed/jade-disk/lta"}
+export RUN_ONCE_AND_DIE=${RUN_ONCE_AND_DIE:="True"}
+export SITE_MOVE_VERIFIER_OUTPUT_STATUS=${SITE_MOVE_VERIFIER_OUTPUT_STATUS:="taping"}
+export SOURCE_SITE=${SOURCE_SITE:="WIPAC"}
+export TAPE_BASE_PATH=${TAPE_BASE_PATH:="/home/projects/icecube"}
+export USE_FULL_BUNDLE_PATH=${USE_FULL_BUNDLE_PATH:="FALSE"}
+export WIPACTEL_EXPORT_STDOUT=${WIPACTEL_EXPORT_STDOUT:="FALSE"}
+export WORK_RETRIES=${WORK_RETRIES:="3"}
+export WORK_SLEEP_DURATION_SECONDS=${WORK_SLEEP_DURATION_SECONDS:="30"}
+export WORK_TIMEOUT_SECONDS=${WORK_TIMEOUT_SECONDS:="30"}
+python -m lta.fused_runner
@@ -7,14 +7,14 @@ import logging
 import os
 import shutil
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from zipfile import ZIP_STORED, ZipFile
 
 from rest_tools.client import RestClient
 from rest_tools.server import from_environment
 import wipac_telemetry.tracing_tools as wtt
 
-from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
+from .component import COMMON_CONFIG, Component, LOCALITY_CONFIG, now, status_loop, work_loop
 from .crypto import lta_checksums
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
@@ -33,6 +33,14 @@ EXPECTED_CONFIG.update({
     "WORK_RETRIES": "3",
     "WORK_TIMEOUT_SECONDS": "30",
 })
+EXPECTED_CONFIG.update(LOCALITY_CONFIG)
+
+def write_bundle_archive(bundle_file_path: str, members: List[Tuple[str, str]]) -> None:
+    """Create a ZIP64 archive at bundle_file_path, holding each (path, archive path) member."""
+    with ZipFile(bundle_file_path, mode="x", compression=ZIP_STORED, allowZip64=True) as bundle_zip:
+        for path, zip_path in members:
+            bundle_zip.write(path, zip_path)
+
 
 class Bundler(Component):
     """
@@ -72,26 +80,17 @@ class Bundler(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be built
-        # configure a RestClient to talk to the File Catalog
-        fc_rc = RestClient(self.file_catalog_rest_url,
-                           token=self.file_catalog_rest_token,
-                           timeout=self.work_timeout_seconds,
-                           retries=self.work_retries)
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the File Catalog
+        fc_rc = self.fc_rc
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a Bundle to build.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
@@ -128,14 +127,14 @@ class Bundler(Component):
         await self._create_bundle_archive(fc_rc, lta_rc, bundle, bundle_file_path, metadata_file_path, file_count)
         # 3. Clean up generated JSON metadata file
         self.logger.info(f"Deleting bundle metadata file: '{metadata_file_path}'")
-        os.remove(metadata_file_path)
+        await self.run_blocking(os.remove, metadata_file_path)
         self.logger.info(f"Bundle metadata '{metadata_file_path}' was deleted.")
         # 4. Compute the size of the bundle
-        bundle_size = os.path.getsize(bundle_file_path)
+        bundle_size = await self.run_blocking(os.path.getsize, bundle_file_path)
         self.logger.info(f"Archive bundle has size {bundle_size} bytes")
         # 5. Compute the LTA checksums for the bundle
         self.logger.info(f"Computing LTA checksums for bundle: '{bundle_file_path}'")
-        checksum = lta_checksums(bundle_file_path)
+        checksum = await self.run_blocking(lta_checksums, bundle_file_path)
         self.logger.info(f"Bundle '{bundle_file_path}' has adler32 checksum '{checksum['adler32']}'")
         self.logger.info(f"Bundle '{bundle_file_path}' has SHA512 checksum '{checksum['sha512']}'")
         # 6. Determine the final destination path of the bundle
@@ -148,6 +147,7 @@ class Bundler(Component):
         bundle["reason"] = ""
         bundle["update_timestamp"] = now()
         bundle["bundle_path"] = final_bundle_path
+        bundle["locality"] = self.locality_tag
         bundle["size"] = bundle_size
         bundle["checksum"] = checksum
         bundle["verified"] = False
@@ -155,7 +155,7 @@ class Bundler(Component):
         # 8. Move the bundle from the work box to the outbox
         if final_bundle_path != bundle_file_path:
             self.logger.info(f"Moving bundle from '{bundle_file_path}' to '{final_bundle_path}'")
-            shutil.move(bundle_file_path, final_bundle_path)
+            await self.run_blocking(shutil.move, bundle_file_path, final_bundle_path)
         self.logger.info(f"Finished archive bundle now located at: '{final_bundle_path}'")
         # 9. Update the Bundle record in the LTA DB
         self.logger.info(f"PATCH /Bundles/{bundle_uuid} - '{bundle}'")
@@ -176,32 +176,34 @@ class Bundler(Component):
         done = False
         limit = CREATE_CHUNK_SIZE
         skip = 0
-        self.logger.info(f"Creating bundle as ZIP archive at: {bundle_file_path}")
-        with ZipFile(bundle_file_path, mode="x", compression=ZIP_STORED, allowZip64=True) as bundle_zip:
-            # write the metadata file to the bundle archive
-            self.logger.info(f"Adding bundle metadata '{metadata_file_path}' to bundle '{bundle_file_path}'")
-            bundle_zip.write(metadata_file_path, os.path.basename(metadata_file_path))
+        # the metadata file goes in first, then every file of the bundle
+        self.logger.info(f"Adding bundle metadata '{metadata_file_path}' to bundle '{bundle_file_path}'")
+        members = [(metadata_file_path, os.path.basename(metadata_file_path))]
 
-            # until we've finished processing all the Metadata records
-            while not done:
-                # ask the LTA DB for the next chunk of Metadata records
-                self.logger.info(f"GET /Metadata?bundle_uuid={bundle_uuid}&limit={limit}&skip={skip}")
-                lta_response = await lta_rc.request('GET', f'/Metadata?bundle_uuid={bundle_uuid}&limit={limit}&skip={skip}')
-                num_files = len(lta_response["results"])
-                done = (num_files == 0)
-                skip = skip + num_files
-                self.logger.info(f'LTA returned {num_files} Metadata documents to process.')
+        # until we've finished processing all the Metadata records
+        while not done:
+            # ask the LTA DB for the next chunk of Metadata records
+            self.logger.info(f"GET /Metadata?bundle_uuid={bundle_uuid}&limit={limit}&skip={skip}")
+            lta_response = await lta_rc.request('GET', f'/Metadata?bundle_uuid={bundle_uuid}&limit={limit}&skip={skip}')
+            num_files = len(lta_response["results"])
+            done = (num_files == 0)
+            skip = skip + num_files
+            self.logger.info(f'LTA returned {num_files} Metadata documents to process.')
 
-                # for each Metadata record returned by the LTA DB
-                for metadata_record in lta_response["results"]:
-                    # load the record from the File Catalog and add the warehouse file to the ZIP archive
-                    count = count + 1
-                    file_catalog_uuid = metadata_record["file_catalog_uuid"]
-                    fc_response = await fc_rc.request('GET', f'/api/files/{file_catalog_uuid}')
-                    bundle_me_path = fc_response["logical_name"]
-                    self.logger.info(f"Writing file {count}/{num_files}: '{bundle_me_path}' to bundle '{bundle_file_path}'")
-                    zip_path = os.path.relpath(bundle_me_path, request_path)
-                    bundle_zip.write(bundle_me_path, zip_path)
+            # for each Metadata record returned by the LTA DB
+            for metadata_record in lta_response["results"]:
+                # load the record from the File Catalog and add the warehouse file to the ZIP archive
+                count = count + 1
+                file_catalog_uuid = metadata_record["file_catalog_uuid"]
+                fc_response = await fc_rc.request('GET', f'/api/files/{file_catalog_uuid}')
+                bundle_me_path = fc_response["logical_name"]
+                self.logger.info(f"Adding file {count}/{num_files}: '{bundle_me_path}' to bundle '{bundle_file_path}'")
+                zip_path = os.path.relpath(bundle_me_path, request_path)
+                members.append((bundle_me_path, zip_path))
+
+        # write the ZIP archive off of the event loop
+        self.logger.info(f"Creating bundle as ZIP archive at: {bundle_file_path}")
+        await self.run_blocking(write_bundle_archive, bundle_file_path, members)
 
         # do a last minute sanity check on our data
         if count != file_count:
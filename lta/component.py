@@ -2,36 +2,109 @@
 """Module to implement an abstract base Component for the Long Term Archive."""
 
 import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from logging import Logger
 import os
 from pathlib import Path
+import random
+import signal
+from socket import gethostname
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 from uuid import uuid4
 
+from requests.adapters import HTTPAdapter
 from rest_tools.client import RestClient
-from urllib.parse import urljoin
+from urllib.parse import quote, urljoin
 import wipac_telemetry.tracing_tools as wtt
 
 from .lta_const import drain_semaphore_filename
-from .rest_server import boolify
+from .lta_types import BundleType
+from .metrics import ComponentMetrics, MeteredRestClient
+from .profiling import PROFILE_MODES, WorkProfiler
+from .utils import boolify
 
 COMMON_CONFIG: Dict[str, Optional[str]] = {
     "COMPONENT_NAME": None,
     "DEST_SITE": None,
+    "EXECUTOR_TYPE": "THREAD",  # THREAD or PROCESS
+    "EXECUTOR_WORKERS": "4",
     "HEARTBEAT_PATCH_RETRIES": "3",
     "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
     "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+    "HTTP_POOL_SIZE": "10",
     "INPUT_STATUS": None,
     "LTA_REST_TOKEN": None,
     "LTA_REST_URL": None,
     "OUTPUT_STATUS": None,
+    "PROFILE_DIR": "/tmp/lta-profiles",
+    "PROFILE_ENABLED": "False",  # toggle on a live process with SIGUSR1
+    "PROFILE_MODE": "CPROFILE",  # CPROFILE, TRACEMALLOC, or ALL
+    "PROMETHEUS_METRICS_PORT": "0",  # 0 means no /metrics endpoint
     "RUN_ONCE_AND_DIE": "False",
     "SOURCE_SITE": None,
-    "WORK_SLEEP_DURATION_SECONDS": "60",
+    "WORK_BACKOFF_FACTOR": "2",
+    "WORK_BACKOFF_JITTER": "0.5",
+    "WORK_BACKOFF_MIN_SECONDS": "1",
+    "WORK_CONCURRENCY": "1",
+    "WORK_SLEEP_DURATION_SECONDS": "60",  # ceiling of the idle backoff
 }
 
+# maximum number of Bundle UUIDs to supply to LTA DB for bulk_get
+BULK_GET_CHUNK_SIZE = 1000
+
+# configuration of components that claim Bundles stored on their own node
+LOCALITY_CONFIG: Dict[str, Optional[str]] = {
+    "CLAIM_LOCALITY": "NONE",  # NONE, PREFER, or REQUIRE
+    "LOCALITY_TAG": gethostname(),
+}
+
+CLAIM_LOCALITY_MODES = ["NONE", "PREFER", "REQUIRE"]
+
+EXECUTOR_TYPES = ["PROCESS", "THREAD"]
+
+async def bulk_get_bundles(rc: RestClient,
+                           bundle_uuids: List[str],
+                           projection: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Get many Bundles from the LTA DB, in the order asked, with a few bulk_get requests."""
+    bundles: List[Dict[str, Any]] = []
+    for i in range(0, len(bundle_uuids), BULK_GET_CHUNK_SIZE):
+        get_body: Dict[str, Any] = {"bundles": bundle_uuids[i:i+BULK_GET_CHUNK_SIZE]}
+        if projection is not None:
+            get_body["projection"] = projection
+        response = await rc.request('POST', '/Bundles/actions/bulk_get', get_body)
+        bundles.extend(response["bundles"])
+    return bundles
+
+def pooled_rest_client(address: str,
+                       token: str,
+                       timeout: float,
+                       retries: int,
+                       pool_size: int,
+                       metrics: Optional[ComponentMetrics] = None,
+                       output_status: Optional[str] = None) -> RestClient:
+    """
+    Create a RestClient that keeps its connections alive for reuse.
+
+    A RestClient sends its requests from a pool of threads, through a pool
+    of connections; both are sized to allow pool_size requests in flight.
+    If metrics are provided, the RestClient reports its requests to them.
+    """
+    rc: RestClient
+    if metrics:
+        rc = MeteredRestClient(address, metrics, output_status, token=token, timeout=timeout, retries=retries)
+    else:
+        rc = RestClient(address, token=token, timeout=timeout, retries=retries)
+    rc.session.executor.shutdown(wait=False)
+    rc.session.executor = ThreadPoolExecutor(max_workers=pool_size)
+    for prefix, adapter in list(rc.session.adapters.items()):
+        rc.session.mount(prefix, HTTPAdapter(pool_connections=1,
+                                             pool_maxsize=pool_size,
+                                             max_retries=adapter.max_retries))
+    return rc
+
 def now() -> str:
     """Return string timestamp for current time, to the second."""
     return datetime.utcnow().isoformat(timespec='seconds')
@@ -71,45 +144,222 @@ class Component:
         self.logger = logger
         # validate and assimilate the configuration
         self.dest_site = config["DEST_SITE"]
+        self.executor_type = config["EXECUTOR_TYPE"].upper()
+        self.executor_workers = int(config["EXECUTOR_WORKERS"])
+        if self.executor_type not in EXECUTOR_TYPES:
+            raise ValueError(f"EXECUTOR_TYPE must be one of {EXECUTOR_TYPES}, not '{self.executor_type}'")
         self.heartbeat_patch_retries = int(config["HEARTBEAT_PATCH_RETRIES"])
         self.heartbeat_patch_timeout_seconds = float(config["HEARTBEAT_PATCH_TIMEOUT_SECONDS"])
         self.heartbeat_sleep_duration_seconds = float(config["HEARTBEAT_SLEEP_DURATION_SECONDS"])
+        self.http_pool_size = int(config["HTTP_POOL_SIZE"])
         self.input_status = config["INPUT_STATUS"]
         self.lta_rest_token = config["LTA_REST_TOKEN"]
         self.lta_rest_url = config["LTA_REST_URL"]
         self.output_status = config["OUTPUT_STATUS"]
+        self.profile_mode = config["PROFILE_MODE"].upper()
+        if self.profile_mode not in PROFILE_MODES:
+            raise ValueError(f"PROFILE_MODE must be one of {PROFILE_MODES}, not '{self.profile_mode}'")
+        self.prometheus_metrics_port = int(config["PROMETHEUS_METRICS_PORT"])
         self.run_once_and_die = boolify(config["RUN_ONCE_AND_DIE"])
         self.source_site = config["SOURCE_SITE"]
+        self.work_backoff_factor = float(config["WORK_BACKOFF_FACTOR"])
+        self.work_backoff_jitter = float(config["WORK_BACKOFF_JITTER"])
+        self.work_backoff_min_seconds = float(config["WORK_BACKOFF_MIN_SECONDS"])
+        if self.work_backoff_factor < 1:
+            raise ValueError(f"WORK_BACKOFF_FACTOR must be at least 1, not {self.work_backoff_factor}")
+        if self.work_backoff_min_seconds <= 0:
+            raise ValueError(f"WORK_BACKOFF_MIN_SECONDS must be more than 0, not {self.work_backoff_min_seconds}")
+        if not 0 <= self.work_backoff_jitter <= 1:
+            raise ValueError(f"WORK_BACKOFF_JITTER must be between 0 and 1, not {self.work_backoff_jitter}")
+        self.work_concurrency = int(config["WORK_CONCURRENCY"])
+        if self.work_concurrency < 1:
+            raise ValueError(f"WORK_CONCURRENCY must be at least 1, not {self.work_concurrency}")
         self.work_sleep_duration_seconds = float(config["WORK_SLEEP_DURATION_SECONDS"])
+        # components that care where Bundles are stored include LOCALITY_CONFIG
+        self.claim_locality = config.get("CLAIM_LOCALITY", "NONE").upper()
+        self.locality_tag = config.get("LOCALITY_TAG", "")
+        if self.claim_locality not in CLAIM_LOCALITY_MODES:
+            raise ValueError(f"CLAIM_LOCALITY must be one of {CLAIM_LOCALITY_MODES}, not '{self.claim_locality}'")
+        # clients and the executor are created on first use, and then kept for the life of the component
+        self._executor: Optional[Executor] = None
+        self._fc_rc: Optional[RestClient] = None
+        self._heartbeat_rc: Optional[RestClient] = None
+        self._lta_rc: Optional[RestClient] = None
+        # keep metrics about our work, and publish them if asked
+        self.metrics = ComponentMetrics(component_type, export=bool(self.prometheus_metrics_port))
+        if self.prometheus_metrics_port:
+            self.metrics.serve(self.prometheus_metrics_port)
+        # profile our work cycles, if asked
+        self.profiler = WorkProfiler(self.name,
+                                     config["PROFILE_DIR"],
+                                     self.profile_mode,
+                                     boolify(config["PROFILE_ENABLED"]),
+                                     logger,
+                                     self.run_blocking)
+        # a fused runner keeps the claims of the work it hands to its next stage
+        self.keep_claims = False
         # record some default state
         timestamp = datetime.utcnow().isoformat()
         self.last_work_begin_timestamp = timestamp
         self.last_work_end_timestamp = timestamp
+        self.last_work_claims = 0
+        self.work_idle_cycles = 0
+        self.work_sleep_seconds = 0.0
+        self.work_slots = [
+            {
+                "slot": slot,
+                "state": "idle",
+                "claims": 0,
+                "last_claim_timestamp": timestamp,
+            } for slot in range(self.work_concurrency)
+        ]
         # log the way this component has been configured
         self.logger.info(f"{self.type} '{self.name}' is configured:")
         for name in config:
             self.logger.info(f"{name} = {config[name]}")
 
+    @property
+    def executor(self) -> Executor:
+        """Return the executor that runs blocking calls off of the event loop."""
+        if not self._executor:
+            if self.executor_type == "PROCESS":
+                self._executor = ProcessPoolExecutor(max_workers=self.executor_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.executor_workers)
+        return self._executor
+
+    @property
+    def fc_rc(self) -> RestClient:
+        """Return the RestClient that the work cycles use to talk to the File Catalog."""
+        if not self._fc_rc:
+            self._fc_rc = pooled_rest_client(self.config["FILE_CATALOG_REST_URL"],
+                                             self.config["FILE_CATALOG_REST_TOKEN"],
+                                             float(self.config["WORK_TIMEOUT_SECONDS"]),
+                                             int(self.config["WORK_RETRIES"]),
+                                             self.http_pool_size,
+                                             metrics=self.metrics)
+        return self._fc_rc
+
+    @property
+    def heartbeat_rc(self) -> RestClient:
+        """Return the RestClient that the status heartbeats use to talk to the LTA DB."""
+        if not self._heartbeat_rc:
+            self._heartbeat_rc = pooled_rest_client(self.lta_rest_url,
+                                                    self.lta_rest_token,
+                                                    self.heartbeat_patch_timeout_seconds,
+                                                    self.heartbeat_patch_retries,
+                                                    1)
+        return self._heartbeat_rc
+
+    @property
+    def lta_rc(self) -> RestClient:
+        """Return the RestClient that the work cycles use to talk to the LTA DB."""
+        if not self._lta_rc:
+            self._lta_rc = pooled_rest_client(self.lta_rest_url,
+                                              self.lta_rest_token,
+                                              float(self.config["WORK_TIMEOUT_SECONDS"]),
+                                              int(self.config["WORK_RETRIES"]),
+                                              self.http_pool_size,
+                                              metrics=self.metrics,
+                                              output_status=self.output_status)
+        return self._lta_rc
+
+    async def run_blocking(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking call on the executor, and return its result.
+
+        While the call runs, the event loop stays free to send heartbeats
+        and to run the other work slots. With a PROCESS executor, the
+        function and its arguments must be picklable; that is, module level
+        functions called with plain values.
+        """
+        loop = asyncio.get_event_loop()
+        with self.metrics.phase(f"blocking:{getattr(func, '__name__', 'call')}"):
+            return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
     @wtt.spanned()
     async def run(self) -> None:
         """Perform the Component's work cycle."""
         self.logger.info(f"Starting {self.type} work cycle")
         # start the work cycle stopwatch
         self.last_work_begin_timestamp = datetime.utcnow().isoformat()
+        claims = sum(slot["claims"] for slot in self.work_slots)
+        self.metrics.claimed_uuids.clear()
         # perform the work
         try:
-            await self._do_work()
+            async with self.profiler.cycle(self.metrics.claimed_uuids):
+                with self.metrics.phase("work_cycle"):
+                    await self._do_work()
         except Exception as e:
             # ut oh, something went wrong; log about it
             self.logger.error(f"Error occurred during the {self.type} work cycle")
             self.logger.error(f"Error was: '{e}'", exc_info=True)
         # stop the work cycle stopwatch
         self.last_work_end_timestamp = datetime.utcnow().isoformat()
+        self.last_work_claims = sum(slot["claims"] for slot in self.work_slots) - claims
         self.logger.info(f"Ending {self.type} work cycle")
         # if we are configured to run once and die, then die
         if self.run_once_and_die:
             sys.exit()
 
+    async def do_work_slots(self) -> None:
+        """
+        Claim and process work in each of the work slots, until there is none left.
+
+        Each of the WORK_CONCURRENCY slots claims and processes one piece
+        of work at a time, so while one slot waits on the network, another
+        may be using the CPU. The work cycle ends when every slot has
+        failed to claim work.
+        """
+        await asyncio.gather(*[self._do_work_slot(slot) for slot in self.work_slots])
+
+    async def _do_work_slot(self, slot: Dict[str, Any]) -> None:
+        """Claim and process work in one work slot, until there is none left."""
+        work_claimed = True
+        while work_claimed:
+            slot["state"] = "working"
+            slot["last_claim_timestamp"] = datetime.utcnow().isoformat()
+            try:
+                with self.metrics.phase("work_claim"):
+                    work_claimed = await self._do_work_claim()
+            finally:
+                slot["state"] = "idle"
+            if work_claimed:
+                slot["claims"] += 1
+            work_claimed &= not self.run_once_and_die
+
+    def next_work_sleep(self) -> float:
+        """
+        Determine how long to sleep before the next work cycle.
+
+        If the last work cycle claimed any work, more is likely on the way,
+        so we poll again right away. Each idle cycle after that multiplies
+        the sleep by WORK_BACKOFF_FACTOR, from WORK_BACKOFF_MIN_SECONDS up to
+        WORK_SLEEP_DURATION_SECONDS. The sleep is shortened by a random
+        fraction of up to WORK_BACKOFF_JITTER, so that instances started
+        together do not keep polling the LTA DB together.
+        """
+        if self.last_work_claims:
+            self.work_idle_cycles = 0
+            self.work_sleep_seconds = 0.0
+            return self.work_sleep_seconds
+        backoff = self.work_backoff_min_seconds * (self.work_backoff_factor ** self.work_idle_cycles)
+        backoff = min(backoff, self.work_sleep_duration_seconds)
+        # stop counting once we've hit the ceiling, so the exponent can't overflow
+        if backoff < self.work_sleep_duration_seconds:
+            self.work_idle_cycles += 1
+        self.work_sleep_seconds = backoff * (1 - random.uniform(0, self.work_backoff_jitter))
+        return self.work_sleep_seconds
+
+    def pop_locality_args(self) -> str:
+        """Return the query arguments that make a Bundle pop honor our locality."""
+        if self.claim_locality == "NONE":
+            return ""
+        args = f"&locality={quote(self.locality_tag)}"
+        if self.claim_locality == "REQUIRE":
+            args += "&require_locality=true"
+        return args
+
     def validate_config(self, config: Dict[str, str]) -> None:
         """Validate the configuration provided to the component."""
         # these are the configuration variables required of all components
@@ -138,6 +388,18 @@ class Component:
         """Override this to provide work cycle behavior."""
         raise NotImplementedError()
 
+    async def _do_work_claim(self) -> bool:
+        """Override this to claim and process one piece of work, returning False if there was none."""
+        raise NotImplementedError()
+
+    async def _do_work_bundle(self, lta_rc: RestClient, bundle: BundleType) -> bool:
+        """Override this to process a claimed Bundle, returning True if it reached the output status."""
+        raise NotImplementedError()
+
+    async def _ready_for_work(self) -> bool:
+        """Override this to check that the component is able to do work, before it claims any."""
+        return True
+
 
 def check_drain_semaphore(component: Component) -> bool:
     """Check if a drain semaphore exists in the current working directory."""
@@ -159,6 +421,18 @@ async def patch_status_heartbeat(component: Component) -> bool:
             "timestamp": datetime.utcnow().isoformat(),
             "last_work_begin_timestamp": component.last_work_begin_timestamp,
             "last_work_end_timestamp": component.last_work_end_timestamp,
+            "work_slots": component.work_slots,
+            "metrics": component.metrics.summary(),
+            "profiling": component.profiler.enabled,
+            "work_backoff": {
+                "factor": component.work_backoff_factor,
+                "idle_cycles": component.work_idle_cycles,
+                "jitter": component.work_backoff_jitter,
+                "last_work_claims": component.last_work_claims,
+                "max_seconds": component.work_sleep_duration_seconds,
+                "min_seconds": component.work_backoff_min_seconds,
+                "sleep_seconds": component.work_sleep_seconds,
+            },
         }
     }
     # ask the base class to annotate the status body
@@ -167,12 +441,8 @@ async def patch_status_heartbeat(component: Component) -> bool:
     # attempt to PATCH the status resource
     component.logger.info(f"PATCH {status_url} - {status_body}")
     try:
-        rc = RestClient(component.lta_rest_url,
-                        token=component.lta_rest_token,
-                        timeout=component.heartbeat_patch_timeout_seconds,
-                        retries=component.heartbeat_patch_retries)
         # Use the RestClient to PATCH our heartbeat to the LTA DB
-        await rc.request("PATCH", status_route, status_body)
+        await component.heartbeat_rc.request("PATCH", status_route, status_body)
     except Exception as e:
         # if there was a problem, yo I'll solve it
         component.logger.error(f"Error trying to PATCH {status_route} with heartbeat")
@@ -196,9 +466,11 @@ async def status_loop(component: Component) -> None:
 async def work_loop(component: Component) -> None:
     """Run component work cycles as an infinite loop."""
     component.logger.info("Starting work loop")
+    # let an operator toggle profiling on the live process; kill -USR1 <pid>
+    component.profiler.listen(signal.SIGUSR1)
     while not check_drain_semaphore(component):
         # Do the work of the component
         await component.run()
-        # sleep until we need to work again
-        await asyncio.sleep(component.work_sleep_duration_seconds)
+        # sleep until we need to work again; right away if there is work flowing
+        await asyncio.sleep(component.next_work_sleep())
     component.logger.info("Component drained; shutting down.")
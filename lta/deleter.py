@@ -11,7 +11,7 @@ from rest_tools.client import RestClient
 from rest_tools.server import from_environment
 import wipac_telemetry.tracing_tools as wtt
 
-from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
+from .component import COMMON_CONFIG, Component, LOCALITY_CONFIG, now, status_loop, work_loop
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
 
@@ -23,6 +23,7 @@ EXPECTED_CONFIG.update({
     "WORK_RETRIES": "3",
     "WORK_TIMEOUT_SECONDS": "30",
 })
+EXPECTED_CONFIG.update(LOCALITY_CONFIG)
 
 
 class Deleter(Component):
@@ -59,26 +60,20 @@ class Deleter(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be deleted
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a Bundle to delete.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
         }
-        response = await lta_rc.request('POST', f'/Bundles/actions/pop?source={self.source_site}&dest={self.dest_site}&status={self.input_status}', pop_body)
+        response = await lta_rc.request('POST', f'/Bundles/actions/pop?source={self.source_site}&dest={self.dest_site}&status={self.input_status}{self.pop_locality_args()}', pop_body)
         self.logger.info(f"LTA DB responded with: {response}")
         bundle = response["bundle"]
         if not bundle:
@@ -102,7 +97,7 @@ class Deleter(Component):
         bundle_path = os.path.join(self.disk_base_path, bundle_name)
         # delete the file from the disk
         self.logger.info(f"Removing file {bundle_path} from the disk.")
-        os.remove(bundle_path)
+        await self.run_blocking(os.remove, bundle_path)
         # update the Bundle in the LTA DB
         self.logger.info(f"File {bundle_path} was deleted from the disk.")
         patch_body = {
@@ -65,21 +65,15 @@ class DesyMoveVerifier(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be verified
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a Bundle to verify.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
@@ -126,7 +120,7 @@ class DesyMoveVerifier(Component):
         # make sure our proxy credentials are all in order
         self.logger.info('Updating proxy credentials')
         sgp = SiteGlobusProxy()
-        sgp.update_proxy()
+        await self.run_blocking(sgp.update_proxy)
         # tell GridFTP to 'get' our file back from the destination
         basename = os.path.basename(bundle_path)
         dest_path = bundle["path"]  # /data/exp/IceCube/2015/filtered/level2/0320
@@ -134,16 +128,17 @@ class DesyMoveVerifier(Component):
         work_path = join_smart([self.workbox_path, basename])
         self.logger.info(f'Copying {dest_url} to {work_path}')
         try:
-            GridFTP.get(dest_url,
-                        filename=work_path,
-                        request_timeout=self.gridftp_timeout)
+            await self.run_blocking(GridFTP.get,
+                                    dest_url,
+                                    filename=work_path,
+                                    request_timeout=self.gridftp_timeout)
         except Exception as e:
             self.logger.error(f'GridFTP threw an error: {e}')
         # we'll compute the bundle's checksum
         self.logger.info(f"Computing SHA512 checksum for bundle: '{work_path}'")
-        checksum_sha512 = sha512sum(work_path)
+        checksum_sha512 = await self.run_blocking(sha512sum, work_path)
         self.logger.info(f"Checksum complete, removing file: '{work_path}'")
-        os.remove(work_path)
+        await self.run_blocking(os.remove, work_path)
         self.logger.info(f"Bundle '{work_path}' has SHA512 checksum '{checksum_sha512}'")
         # now we'll compare the bundle's checksum
         if bundle["checksum"]["sha512"] != checksum_sha512:
@@ -59,21 +59,15 @@ class DesyStager(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be staged
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a Bundle to stage.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
@@ -120,7 +114,7 @@ class DesyStager(Component):
         src_path = os.path.join(self.bundle_source_path, bundle_name)
         dst_path = os.path.join(self.bundle_dest_path, bundle_name)
         self.logger.info(f"Moving Bundle {src_path} -> {dst_path}")
-        shutil.move(src_path, dst_path)
+        await self.run_blocking(shutil.move, src_path, dst_path)
         # update the Bundle in the LTA DB
         self.logger.info("Bundle has been staged for transfer to DESY.")
         patch_body = {
@@ -5,7 +5,7 @@ import asyncio
 import logging
 import os
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, cast, Dict, List, Optional
 
 from rest_tools.client import RestClient
 from rest_tools.server import from_environment
@@ -15,6 +15,8 @@ from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
 from .joiner import join_smart
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
+from .utils import boolify
+from .uuid_array import pack_uuids, post_uuid_array
 
 Logger = logging.Logger
 
@@ -22,6 +24,7 @@ EXPECTED_CONFIG = COMMON_CONFIG.copy()
 EXPECTED_CONFIG.update({
     "FILE_CATALOG_REST_TOKEN": None,
     "FILE_CATALOG_REST_URL": None,
+    "METADATA_BINARY_UUIDS": "False",
     "TAPE_BASE_PATH": None,
     "WORK_RETRIES": "3",
     "WORK_TIMEOUT_SECONDS": "30",
@@ -50,6 +53,7 @@ class DesyVerifier(Component):
         super(DesyVerifier, self).__init__("desy_verifier", config, logger)
         self.file_catalog_rest_token = config["FILE_CATALOG_REST_TOKEN"]
         self.file_catalog_rest_url = config["FILE_CATALOG_REST_URL"]
+        self.metadata_binary_uuids = boolify(config["METADATA_BINARY_UUIDS"])
         self.tape_base_path = config["TAPE_BASE_PATH"]
         self.work_retries = int(config["WORK_RETRIES"])
         self.work_timeout_seconds = float(config["WORK_TIMEOUT_SECONDS"])
@@ -66,10 +70,7 @@ class DesyVerifier(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
@@ -77,11 +78,8 @@ class DesyVerifier(Component):
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be verified
         self.logger.info("Asking the LTA DB for a Bundle to record as verified at DESY.")
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
         }
@@ -111,11 +109,8 @@ class DesyVerifier(Component):
     @wtt.spanned()
     async def _add_bundle_to_file_catalog(self, lta_rc: RestClient, bundle: BundleType) -> bool:
         """Add a FileCatalog entry for the bundle, then update existing records."""
-        # configure a RestClient to talk to the File Catalog
-        fc_rc = RestClient(self.file_catalog_rest_url,
-                           token=self.file_catalog_rest_token,
-                           timeout=self.work_timeout_seconds,
-                           retries=self.work_retries)
+        # use our long-lived RestClient to talk to the File Catalog
+        fc_rc = self.fc_rc
         # determine the path where the bundle is stored at DESY
         data_warehouse_path = bundle["path"]  # /data/exp/IceCube/2015/filtered/level2/0320
         basename = os.path.basename(bundle["bundle_path"])  # 604b6c80659c11eb8ad66224ddddaab7.zip
@@ -153,6 +148,21 @@ class DesyVerifier(Component):
         # indicate that our file catalog updates were successful
         return True
 
+    @wtt.spanned()
+    async def _bulk_delete_metadata(self, lta_rc: RestClient, metadata: List[str]) -> Dict[str, Any]:
+        """Delete Metadata records from the LTA DB, as packed UUIDs if configured to do so."""
+        if self.metadata_binary_uuids:
+            try:
+                packed = pack_uuids(metadata, dashed=False)
+            except ValueError as e:
+                self.logger.warning(f"Unable to pack Metadata UUIDs; falling back to JSON: {e}")
+            else:
+                return cast(Dict[str, Any], await post_uuid_array(lta_rc, '/Metadata/actions/bulk_delete', packed))
+        delete_query = {
+            "metadata": metadata
+        }
+        return cast(Dict[str, Any], await lta_rc.request('POST', '/Metadata/actions/bulk_delete', delete_query))
+
     @wtt.spanned()
     async def _update_bundle_in_lta_db(self, lta_rc: RestClient, bundle: BundleType) -> bool:
         """Update the LTA DB to indicate the Bundle is verified."""
@@ -212,11 +222,9 @@ class DesyVerifier(Component):
 
             # if we processed any Metadata records, we can now delete them
             if num_files > 0:
-                delete_query = {
-                    "metadata": [x['uuid'] for x in results]
-                }
+                metadata = [x['uuid'] for x in results]
                 self.logger.info(f"POST /Metadata/actions/bulk_delete - {num_files} Metadata records")
-                bulk_response = await lta_rc.request('POST', '/Metadata/actions/bulk_delete', delete_query)
+                bulk_response = await self._bulk_delete_metadata(lta_rc, metadata)
                 delete_count = bulk_response['count']
                 self.logger.info(f"LTA DB reports {delete_count} Metadata records are deleted.")
                 if delete_count != num_files:
@@ -0,0 +1,224 @@
+# fused_runner.py
+"""Module to implement the FusedRunner component of the Long Term Archive."""
+
+import asyncio
+from logging import Logger
+import logging
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from rest_tools.client import RestClient
+from rest_tools.server import from_environment
+import wipac_telemetry.tracing_tools as wtt
+
+from . import nersc_mover, nersc_verifier, site_move_verifier
+from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
+from .log_format import StructuredFormatter
+from .lta_types import BundleType
+
+
+EXPECTED_CONFIG = COMMON_CONFIG.copy()
+EXPECTED_CONFIG.update({
+    "FUSED_STAGES": None,  # comma separated; e.g.: site_move_verifier,nersc_mover,nersc_verifier
+    "WORK_RETRIES": "3",
+    "WORK_TIMEOUT_SECONDS": "30",
+})
+
+# the components that can run as stages of a FusedRunner
+STAGES: Dict[str, Callable[[Dict[str, str], Logger], Component]] = {
+    "nersc_mover": nersc_mover.NerscMover,
+    "nersc_verifier": nersc_verifier.NerscVerifier,
+    "site_move_verifier": site_move_verifier.SiteMoveVerifier,
+}
+
+STAGE_EXPECTED_CONFIG: Dict[str, Dict[str, Optional[str]]] = {
+    "nersc_mover": nersc_mover.EXPECTED_CONFIG,
+    "nersc_verifier": nersc_verifier.EXPECTED_CONFIG,
+    "site_move_verifier": site_move_verifier.EXPECTED_CONFIG,
+}
+
+
+def stage_config(runner_config: Dict[str, str],
+                 stage: str,
+                 environ: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Determine the configuration of one stage of a FusedRunner.
+
+    Each configuration variable of the stage is taken from the environment
+    with the stage name as a prefix (NERSC_MOVER_INPUT_STATUS), then without
+    (INPUT_STATUS), then from the default of the stage; a variable with no
+    default must be set one way or the other. Stages are named
+    after the runner unless given a COMPONENT_NAME of their own, and
+    serve /metrics only if given a PROMETHEUS_METRICS_PORT of their own.
+    """
+    if environ is None:
+        environ = dict(os.environ)
+    prefix = f"{stage.upper()}_"
+    config: Dict[str, Any] = {}
+    for name, default in STAGE_EXPECTED_CONFIG[stage].items():
+        if name in ["COMPONENT_NAME", "PROMETHEUS_METRICS_PORT"]:
+            # these have defaults of their own; see below
+            continue
+        config[name] = environ.get(f"{prefix}{name}", environ.get(name, default))
+        if config[name] is None:
+            raise ValueError(f"Missing expected configuration parameter for stage {stage}: '{prefix}{name}' or '{name}'")
+    config["COMPONENT_NAME"] = environ.get(f"{prefix}COMPONENT_NAME", f"{runner_config['COMPONENT_NAME']}-{stage}")
+    # only the runner serves /metrics on the shared port
+    config["PROMETHEUS_METRICS_PORT"] = environ.get(f"{prefix}PROMETHEUS_METRICS_PORT", "0")
+    return config
+
+
+class FusedRunner(Component):
+    """
+    FusedRunner is a Long Term Archive component.
+
+    A FusedRunner hosts several component stages in one process, on a site
+    where they would otherwise run back to back. It claims a Bundle for the
+    first stage, and when a stage finishes with the Bundle, hands it to the
+    next stage in memory, instead of having that stage pop it from the LTA
+    DB. Each stage still PATCHes the Bundle in the LTA DB as it would on
+    its own, so every status transition is recorded; only the claim is
+    kept until the Bundle leaves the last stage.
+
+    The INPUT_STATUS of the runner is the input status of its first stage,
+    and the OUTPUT_STATUS is the output status of its last stage.
+    """
+
+    def __init__(self,
+                 config: Dict[str, str],
+                 logger: Logger,
+                 environ: Optional[Dict[str, str]] = None) -> None:
+        """
+        Create a FusedRunner component.
+
+        config - A dictionary of required configuration values.
+        logger - The object the fused_runner should use for logging.
+        environ - The environment to take the configuration of the stages from.
+        """
+        super(FusedRunner, self).__init__("fused_runner", config, logger)
+        self.stage_names = [stage.strip() for stage in config["FUSED_STAGES"].split(",") if stage.strip()]
+        for stage in self.stage_names:
+            if stage not in STAGES:
+                raise ValueError(f"FUSED_STAGES may only contain {sorted(STAGES)}, not '{stage}'")
+        if not self.stage_names:
+            raise ValueError("FUSED_STAGES must name at least one stage")
+        self.stages: List[Component] = [
+            STAGES[stage](stage_config(config, stage, environ), logger)
+            for stage in self.stage_names
+        ]
+        # the statuses of the stages must line up, end to end
+        if self.stages[0].input_status != self.input_status:
+            raise ValueError(f"INPUT_STATUS '{self.input_status}' does not match '{self.stages[0].input_status}' of the first stage")
+        if self.stages[-1].output_status != self.output_status:
+            raise ValueError(f"OUTPUT_STATUS '{self.output_status}' does not match '{self.stages[-1].output_status}' of the last stage")
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            if stage.output_status != next_stage.input_status:
+                raise ValueError(f"Stage {stage.type} outputs '{stage.output_status}', but stage {next_stage.type} expects '{next_stage.input_status}'")
+            # keep the claim on Bundles we hand to the next stage
+            stage.keep_claims = True
+        self.work_retries = int(config["WORK_RETRIES"])
+        self.work_timeout_seconds = float(config["WORK_TIMEOUT_SECONDS"])
+
+    def _do_status(self) -> Dict[str, Any]:
+        """Provide additional status for the FusedRunner."""
+        return {"stages": [stage.name for stage in self.stages]}
+
+    def _expected_config(self) -> Dict[str, Optional[str]]:
+        """Provide expected configuration dictionary."""
+        return EXPECTED_CONFIG
+
+    @wtt.spanned()
+    async def _do_work(self) -> None:
+        """Perform a work cycle for this component."""
+        self.logger.info("Starting work on Bundles.")
+        await self.do_work_slots()
+        self.logger.info("Ending work on Bundles.")
+
+    @wtt.spanned()
+    async def _do_work_claim(self) -> bool:
+        """Claim a bundle and run it through each of the stages."""
+        # 0. Do some pre-flight checks to ensure that the first stage can do work
+        if not await self.stages[0]._ready_for_work():
+            return False
+        # 1. Ask the LTA DB for the next Bundle for the first stage
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
+        self.logger.info(f"Asking the LTA DB for a Bundle for stage {self.stages[0].type}.")
+        pop_body = {
+            "claimant": f"{self.name}-{self.instance_uuid}"
+        }
+        response = await lta_rc.request('POST', f'/Bundles/actions/pop?source={self.source_site}&dest={self.dest_site}&status={self.input_status}', pop_body)
+        self.logger.info(f"LTA DB responded with: {response}")
+        bundle = response["bundle"]
+        if not bundle:
+            self.logger.info(f"LTA DB did not provide a Bundle for stage {self.stages[0].type}. Going on vacation.")
+            return False
+        # 2. Hand the Bundle from stage to stage, until it is done or a stage is not
+        await self._run_stages(lta_rc, bundle)
+        # if we were successful at processing work, let the caller know
+        return True
+
+    @wtt.spanned()
+    async def _run_stages(self, lta_rc: RestClient, bundle: BundleType) -> None:
+        """Run a claimed Bundle through each of the stages, in memory."""
+        for index, stage in enumerate(self.stages):
+            if index > 0 and not await stage._ready_for_work():
+                # leave the Bundle for the stage to pop once it is able
+                self.logger.info(f"Stage {stage.type} is not ready; releasing Bundle {bundle['uuid']}.")
+                await self._unclaim_bundle(lta_rc, bundle)
+                return
+            self.logger.info(f"Stage {stage.type} processing Bundle {bundle['uuid']}.")
+            with self.metrics.phase(f"stage:{stage.type}"):
+                finished = await stage._do_work_bundle(stage.lta_rc, bundle)
+            if not finished:
+                self.logger.info(f"Stage {stage.type} did not finish Bundle {bundle['uuid']}; it will go no further.")
+                return
+            # the stage PATCHed the Bundle in the LTA DB; bring our copy up to date
+            bundle["status"] = stage.output_status
+            bundle["reason"] = ""
+
+    @wtt.spanned()
+    async def _unclaim_bundle(self, lta_rc: RestClient, bundle: BundleType) -> None:
+        """Release our claim on the provided Bundle."""
+        patch_body = {
+            "update_timestamp": now(),
+            "claimed": False,
+        }
+        self.logger.info(f"PATCH /Bundles/{bundle['uuid']} - '{patch_body}'")
+        await lta_rc.request('PATCH', f'/Bundles/{bundle["uuid"]}', patch_body)
+
+
+def runner() -> None:
+    """Configure a FusedRunner component from the environment and set it running."""
+    # obtain our configuration from the environment
+    config = from_environment(EXPECTED_CONFIG)
+    # configure structured logging for the application
+    structured_formatter = StructuredFormatter(
+        component_type='FusedRunner',
+        component_name=config["COMPONENT_NAME"],  # type: ignore[arg-type]
+        ndjson=True)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(structured_formatter)
+    root_logger = logging.getLogger(None)
+    root_logger.setLevel(logging.NOTSET)
+    root_logger.addHandler(stream_handler)
+    logger = logging.getLogger("lta.fused_runner")
+    # create our FusedRunner service
+    fused_runner = FusedRunner(config, logger)  # type: ignore[arg-type]
+    # let's get to work
+    fused_runner.logger.info("Adding tasks to asyncio loop")
+    loop = asyncio.get_event_loop()
+    loop.create_task(status_loop(fused_runner))
+    # each stage still reports its own status, as if it ran on its own
+    for stage in fused_runner.stages:
+        loop.create_task(status_loop(stage))
+    loop.create_task(work_loop(fused_runner))
+
+def main() -> None:
+    """Configure a FusedRunner component from the environment and set it running."""
+    runner()
+    asyncio.get_event_loop().run_forever()
+
+if __name__ == "__main__":
+    main()
@@ -15,9 +15,9 @@ from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
 from .joiner import join_smart_url
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
-from .rest_server import boolify
 from .transfer.globus import SiteGlobusProxy
 from .transfer.gridftp import GridFTP
+from .utils import boolify
 
 Logger = logging.Logger
 
@@ -76,21 +76,15 @@ class GridFTPReplicator(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be transferred
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a Bundle to transfer.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
@@ -137,7 +131,7 @@ class GridFTPReplicator(Component):
         # make sure our proxy credentials are all in order
         self.logger.info('Updating proxy credentials')
         sgp = SiteGlobusProxy()
-        sgp.update_proxy()
+        await self.run_blocking(sgp.update_proxy)
         # tell GridFTP to 'put' our file to the destination
         basename = os.path.basename(bundle_path)
         if self.use_full_bundle_path:
@@ -147,9 +141,10 @@ class GridFTPReplicator(Component):
             dest_url = join_smart_url([self.gridftp_dest_url, basename])
         self.logger.info(f'Sending {bundle_path} to {dest_url}')
         try:
-            GridFTP.put(dest_url,
-                        filename=bundle_path,
-                        request_timeout=self.gridftp_timeout)
+            await self.run_blocking(GridFTP.put,
+                                    dest_url,
+                                    filename=bundle_path,
+                                    request_timeout=self.gridftp_timeout)
         except Exception as e:
             self.logger.error(f'GridFTP threw an error: {e}')
         # update the Bundle in the LTA DB
@@ -0,0 +1,141 @@
+# json_stream.py
+"""Module that provides incremental parsing of large JSON request bodies."""
+
+import codecs
+import json
+from typing import Any, cast, Dict, List, Optional
+
+# largest single value (outside of the streamed array) or array element we will buffer
+MAX_VALUE_SIZE = 1024 * 1024
+
+NUMBER_END = " \t\n\r,]}"
+WHITESPACE = " \t\n\r"
+
+class JsonStreamError(ValueError):
+    """JsonStreamError indicates that the stream does not contain valid JSON."""
+
+
+class JsonArrayStream:
+    """
+    JsonArrayStream parses a JSON object while it arrives in chunks.
+
+    The elements of one array-valued field of the top level object are
+    handed back as soon as they are complete, so the caller can process
+    them without holding the whole body (or the whole array) in memory.
+    The other fields of the object are collected into `fields`.
+    """
+
+    def __init__(self, field: str) -> None:
+        """Create a JsonArrayStream that streams the elements of the named field."""
+        self.field = field
+        self.fields: Dict[str, Any] = {}
+        self.found = False  # have we seen the streamed field?
+        self.fields_before: List[str] = []  # the fields that came before it
+        self._buffer = ""
+        self._decoder = json.JSONDecoder()
+        self._done = False
+        self._key: Optional[str] = None
+        self._pos = 0
+        self._state = "start"
+        self._text = codecs.getincrementaldecoder("utf-8")()
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Parse another chunk of the body, returning any completed array elements."""
+        return self._parse(self._text.decode(chunk), final=False)
+
+    def finish(self) -> List[Any]:
+        """Parse the end of the body, returning any remaining array elements."""
+        items = self._parse(self._text.decode(b"", final=True), final=True)
+        if not self._done:
+            raise JsonStreamError("unexpected end of JSON body")
+        return items
+
+    def _decode(self, final: bool) -> Any:
+        """Decode the value at the current position, or return None if more of the body is needed."""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final or len(self._buffer) - self._pos > MAX_VALUE_SIZE:
+                raise JsonStreamError("invalid JSON body")
+            return None
+        # a number is only complete once we see what follows it; "1" might become "1.5e3"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if end == len(self._buffer):
+                if not final:
+                    return None
+            elif self._buffer[end] not in NUMBER_END:
+                if final or len(self._buffer) - self._pos > MAX_VALUE_SIZE:
+                    raise JsonStreamError("invalid JSON body")
+                return None
+        self._pos = end
+        return (value,)
+
+    def _parse(self, text: str, final: bool) -> List[Any]:
+        """Advance through the buffer as far as it goes."""
+        # drop what we've already parsed before adding the new text
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        items = []
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos == len(self._buffer):
+                return items
+            if self._done:
+                raise JsonStreamError("extra data after JSON body")
+            c = self._buffer[self._pos]
+            if self._state == "start":
+                self._expect(c, "{")
+                self._state = "key"
+            elif self._state == "key":
+                if c == "}" and not self.fields and not self.found:
+                    self._pos += 1
+                    self._done = True
+                    continue
+                decoded = self._decode(final)
+                if decoded is None:
+                    return items
+                if not isinstance(decoded[0], str):
+                    raise JsonStreamError("expected a string key")
+                self._key = decoded[0]
+                self._state = "colon"
+            elif self._state == "colon":
+                self._expect(c, ":")
+                self._state = "value"
+            elif self._state == "value":
+                if self._key == self.field and c == "[":
+                    self._pos += 1
+                    self.found = True
+                    self.fields_before = list(self.fields)
+                    self._state = "first_element"
+                    continue
+                decoded = self._decode(final)
+                if decoded is None:
+                    return items
+                self.fields[cast(str, self._key)] = decoded[0]
+                self._state = "after_value"
+            elif self._state == "after_value":
+                self._expect(c, ",}")
+                if c == "}":
+                    self._done = True
+                else:
+                    self._state = "key"
+            elif self._state in ["first_element", "element"]:
+                if c == "]" and self._state == "first_element":
+                    self._pos += 1
+                    self._state = "after_value"
+                    continue
+                decoded = self._decode(final)
+                if decoded is None:
+                    return items
+                items.append(decoded[0])
+                self._state = "after_element"
+            elif self._state == "after_element":
+                self._expect(c, ",]")
+                self._state = "element" if c == "," else "after_value"
+
+    def _expect(self, c: str, allowed: str) -> None:
+        """Consume the next character, which must be one of those allowed."""
+        if c not in allowed:
+            raise JsonStreamError(f"expected one of '{allowed}' but found '{c}'")
+        self._pos += 1
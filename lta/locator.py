@@ -86,21 +86,15 @@ class Locator(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on TransferRequests.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on TransferRequests.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a transfer request and perform work on it."""
         # 1. Ask the LTA DB for the next TransferRequest to be picked
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a TransferRequest to work on.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
@@ -125,11 +119,8 @@ class Locator(Component):
                                         lta_rc: RestClient,
                                         tr: TransferRequestType) -> None:
         self.logger.info(f"Processing TransferRequest: {tr}")
-        # configure a RestClient to talk to the File Catalog
-        fc_rc = RestClient(self.file_catalog_rest_url,
-                           token=self.file_catalog_rest_token,
-                           timeout=self.work_timeout_seconds,
-                           retries=self.work_retries)
+        # use our long-lived RestClient to talk to the File Catalog
+        fc_rc = self.fc_rc
         # figure out which files need to come back
         source = tr["source"]
         dest = tr["dest"]
@@ -196,6 +187,9 @@ class Locator(Component):
                 "checksum": bundle_record["lta"]["checksum"],
                 "catalog": as_lta_record(bundle_record),
             })
+        # the TransferRequest is never PATCHed to our output status; its Bundles are
+        self.metrics.count("succeeded")
+        self.metrics.count("bytes_processed", sum(bundle_record["file_size"] for bundle_record in bundle_records))
 
     @wtt.spanned()
     async def _create_bundle(self,
@@ -6,6 +6,7 @@ Run with `python -m lta.lta_cmd $@`.
 
 import argparse
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import json
 import logging
@@ -20,7 +21,7 @@ import hurry.filesize  # type: ignore
 from rest_tools.client import RestClient
 from rest_tools.server import from_environment
 
-from lta.component import now
+from lta.component import bulk_get_bundles, now
 from lta.crypto import sha512sum
 
 Namespace = argparse.Namespace
@@ -131,16 +132,8 @@ def _enumerate_path(path: str) -> List[str]:
     return disk_files
 
 async def _get_bundles_status(rc: RestClient, bundle_uuids: List[str]) -> List[Dict[str, Any]]:
-    bundles = []
-    for uuid in bundle_uuids:
-        response = await rc.request('GET', f"/Bundles/{uuid}")
-        KEYS = ['claim_timestamp', 'claimant', 'claimed', 'create_timestamp', 'path', 'request', 'status', 'type', 'update_timestamp', 'uuid']
-        bundle = {}
-        for k in KEYS:
-            if k in response:
-                bundle[k] = response[k]
-        bundles.append(bundle)
-    return bundles
+    KEYS = ['claim_timestamp', 'claimant', 'claimed', 'create_timestamp', 'path', 'request', 'status', 'type', 'update_timestamp', 'uuid']
+    return await bulk_get_bundles(rc, bundle_uuids, KEYS)
 
 def _get_files_and_size(path: str) -> Tuple[List[str], int]:
     """Recursively walk and add the files of files in the file system."""
@@ -264,11 +257,12 @@ async def bundle_ls(args: Namespace) -> ExitCode:
     else:
         results = response["results"]
         print(f"total {len(results)}")
-        for uuid in results:
-            if args.show_status:
-                bundle = await args.di["lta_rc"].request("GET", f"/Bundles/{uuid}?contents=0")
-                print(f"Bundle {uuid} {bundle['status']}")
-            else:
+        if args.show_status:
+            bundles = await bulk_get_bundles(args.di["lta_rc"], results, ["status"])
+            for bundle in bundles:
+                print(f"Bundle {bundle['uuid']} {bundle['status']}")
+        else:
+            for uuid in results:
                 print(f"Bundle {uuid}")
     return EXIT_OK
 
@@ -280,10 +274,9 @@ async def bundle_overdue(args: Namespace) -> ExitCode:
     # query the LTA DB to get a list of bundles to check
     response = await args.di["lta_rc"].request("GET", "/Bundles")
     results = response["results"]
-    # for each bundle, query the LTA DB and check it
+    # query the LTA DB for the bundles and check each one
     problem_bundles = []
-    for uuid in results:
-        bundle = await args.di["lta_rc"].request("GET", f"/Bundles/{uuid}?contents=0")
+    for bundle in await bulk_get_bundles(args.di["lta_rc"], results):
         if bundle["status"] == "quarantined":
             problem_bundles.append(bundle)
         elif as_datetime(bundle["update_timestamp"]) < cutoff_time:
@@ -302,16 +295,42 @@ async def bundle_overdue(args: Namespace) -> ExitCode:
 
 
 async def bundle_priority_reset(args: Namespace) -> ExitCode:
-    """List all of the Bundle objects in the LTA DB."""
-    response = await args.di["lta_rc"].request("GET", "/Bundles")
-    results = response["results"]
-    for uuid in results:
-        response2 = await args.di["lta_rc"].request("GET", f"/Bundles/{uuid}?contents=0")
-        patch_body = {
-            "update_timestamp": now(),
-            "work_priority_timestamp": response2["create_timestamp"],
-        }
-        await args.di["lta_rc"].request("PATCH", f"/Bundles/{uuid}", patch_body)
+    """Reset the work priority timestamp for every Bundle."""
+    # set work_priority_timestamp to create_timestamp for every bundle, in one update
+    update_body = {
+        "filter": {},
+        "update": {"update_timestamp": now()},
+        "copy": {"work_priority_timestamp": "create_timestamp"},
+    }
+    await args.di["lta_rc"].request("POST", "/Bundles/actions/update_many", update_body)
+    return EXIT_OK
+
+
+async def bundle_requeue(args: Namespace) -> ExitCode:
+    """Update the status of every Bundle in a status, optionally for a reason."""
+    right_now = now()
+    update_filter = {"status": args.status}
+    if args.reason:
+        update_filter["reason"] = args.reason
+    update = {
+        "status": args.new_status,
+        "reason": "",
+        "update_timestamp": right_now,
+        # a requeued Bundle starts its retries afresh
+        "retry_count": 0,
+        "retry_status": None,
+        "not_before": None,
+    }
+    if not args.keep_claim:
+        update["claimed"] = False
+    if not args.keep_priority:
+        update["work_priority_timestamp"] = right_now
+    update_body = {"filter": update_filter, "update": update}
+    response = await args.di["lta_rc"].request("POST", "/Bundles/actions/update_many", update_body)
+    if args.json:
+        print_dict_as_pretty_json(response)
+    else:
+        print(f"{response['count']} Bundles moved from {args.status} to {args.new_status}")
     return EXIT_OK
 
 
@@ -689,6 +708,10 @@ async def request_ls(args: Namespace) -> ExitCode:
 
 async def request_new(args: Namespace) -> ExitCode:
     """Create a new TransferRequest and add it to the LTA DB."""
+    if args.from_file:
+        return await _request_new_from_file(args)
+    if not args.path:
+        raise Exception("One of --path or --from-file is required")
     # determine how big the transfer request is going to be
     files_and_size = _get_files_and_size(args.path)
     disk_files = files_and_size[0]
@@ -720,6 +743,8 @@ async def request_new(args: Namespace) -> ExitCode:
         "dest": dest,
         "path": path,
     }
+    if args.priority is not None:
+        request_body["priority"] = args.priority
     response = await args.di["lta_rc"].request("POST", "/TransferRequests", request_body)
     uuid = response["TransferRequest"]
     tr = await args.di["lta_rc"].request("GET", f"/TransferRequests/{uuid}")
@@ -732,18 +757,69 @@ async def request_new(args: Namespace) -> ExitCode:
     return EXIT_OK
 
 
+async def _request_new_from_file(args: Namespace) -> ExitCode:
+    """Create a new TransferRequest for each path listed in a file."""
+    with open(args.from_file) as f:
+        paths = [normalize_path(line.strip()) for line in f if line.strip()]
+    if not paths:
+        raise Exception(f"No paths listed in {args.from_file}")
+    # determine how big each transfer request is going to be, walking the paths in parallel
+    loop = asyncio.get_event_loop()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        sizes = await asyncio.gather(*[loop.run_in_executor(executor, _get_files_and_size, path) for path in paths])
+    # if any of them don't meet our minimum size requirement
+    too_small = []
+    for path, (disk_files, size) in zip(paths, sizes):
+        if size < MINIMUM_REQUEST_SIZE:
+            too_small.append(f"{path}: {size:,} bytes ({hurry.filesize.size(size)}) in {len(disk_files):,} files.")
+    # and the operator has not forced the issue
+    if too_small and not args.force:
+        # raise an Exception to prevent the command from creating too small requests
+        raise Exception(f"TransferRequests below the minimum required size of {MINIMUM_REQUEST_SIZE:,} bytes:\n" + "\n".join(too_small))
+    # construct the TransferRequest bodies; the LTA DB checks for duplicates
+    request_bodies = []
+    for path in paths:
+        request_body = {
+            "source": args.source,
+            "dest": args.dest,
+            "path": path,
+        }
+        if args.priority is not None:
+            request_body["priority"] = args.priority
+        request_bodies.append(request_body)
+    bulk_create_body = {
+        "transfer_requests": request_bodies,
+        "force": args.force,
+    }
+    response = await args.di["lta_rc"].request("POST", "/TransferRequests/actions/bulk_create", bulk_create_body)
+    if args.json:
+        print_dict_as_pretty_json(response)
+    else:
+        for uuid, path in zip(response["transfer_requests"], paths):
+            print(f"{uuid}  {path} {args.source} -> {args.dest}")
+    return EXIT_OK
+
+
 async def request_priority_reset(args: Namespace) -> ExitCode:
     """Reset the work priority timestamp for every TransferRequest."""
-    # find every transfer request and set work_priority_timestamp to create_timestamp
-    response = await args.di["lta_rc"].request("GET", "/TransferRequests")
-    results = response["results"]
-    for request in results:
-        uuid = request["uuid"]
-        patch_body = {
-            "update_timestamp": now(),
-            "work_priority_timestamp": request["create_timestamp"],
-        }
-        await args.di["lta_rc"].request("PATCH", f"/TransferRequests/{uuid}", patch_body)
+    # set work_priority_timestamp to create_timestamp for every transfer request, in one update
+    update_body = {
+        "filter": {},
+        "update": {"update_timestamp": now()},
+        "copy": {"work_priority_timestamp": "create_timestamp"},
+    }
+    await args.di["lta_rc"].request("POST", "/TransferRequests/actions/update_many", update_body)
+    return EXIT_OK
+
+
+async def request_priority_set(args: Namespace) -> ExitCode:
+    """Set the priority of a TransferRequest and all of its Bundles."""
+    prioritize_body = {"priority": args.priority}
+    response = await args.di["lta_rc"].request("POST", f"/TransferRequests/{args.uuid}/actions/prioritize", prioritize_body)
+    if args.json:
+        print_dict_as_pretty_json(response)
+    else:
+        print(f"TransferRequest {args.uuid} and {response['count']} Bundles now have priority {response['priority']}")
     return EXIT_OK
 
 
@@ -907,6 +983,30 @@ async def main() -> None:
     parser_bundle_priority_reset = bundle_priority_subparser.add_parser('reset', help='reset all priority dates')
     parser_bundle_priority_reset.set_defaults(func=bundle_priority_reset)
 
+    # define a subparser for the 'bundle requeue' subcommand
+    parser_bundle_requeue = bundle_subparser.add_parser('requeue', help='update the status of many bundles at once')
+    parser_bundle_requeue.add_argument("--status",
+                                       help="status of the bundles to update",
+                                       default="quarantined")
+    parser_bundle_requeue.add_argument("--reason",
+                                       help="regular expression matching the reason of the bundles to update")
+    parser_bundle_requeue.add_argument("--new-status",
+                                       dest="new_status",
+                                       help="new status of the bundles",
+                                       required=True)
+    parser_bundle_requeue.add_argument("--keep-claim",
+                                       dest="keep_claim",
+                                       help="don't unclaim the bundles",
+                                       action="store_true")
+    parser_bundle_requeue.add_argument("--keep-priority",
+                                       dest="keep_priority",
+                                       help="don't change the priority dates",
+                                       action="store_true")
+    parser_bundle_requeue.add_argument("--json",
+                                       help="display output in JSON",
+                                       action="store_true")
+    parser_bundle_requeue.set_defaults(func=bundle_requeue)
+
     # define a subparser for the 'bundle status' subcommand
     parser_bundle_status = bundle_subparser.add_parser('status', help='query bundle status')
     parser_bundle_status.add_argument("--uuid",
@@ -1045,14 +1145,22 @@ async def main() -> None:
                                     help="site as destination of bundles",
                                     required=True)
     parser_request_new.add_argument("--path",
-                                    help="Data Warehouse path to be transferred",
-                                    required=True)
+                                    help="Data Warehouse path to be transferred")
+    parser_request_new.add_argument("--from-file",
+                                    help="file listing Data Warehouse paths to be transferred, one per line")
+    parser_request_new.add_argument("--workers",
+                                    help="number of paths to size in parallel with --from-file",
+                                    type=int,
+                                    default=8)
     parser_request_new.add_argument("--json",
                                     help="display output in JSON",
                                     action="store_true")
     parser_request_new.add_argument("--force",
                                     help="force small size transfer request",
                                     action="store_true")
+    parser_request_new.add_argument("--priority",
+                                    help="priority of the transfer request; higher is sooner",
+                                    type=int)
     parser_request_new.set_defaults(func=request_new)
 
     # define a subparser for the 'request priority' subcommand
@@ -1063,6 +1171,20 @@ async def main() -> None:
     parser_request_priority_reset = request_priority_subparser.add_parser('reset', help='reset all priority dates')
     parser_request_priority_reset.set_defaults(func=request_priority_reset)
 
+    # define a subparser for the 'request priority set' subcommand
+    parser_request_priority_set = request_priority_subparser.add_parser('set', help='set transfer request and bundle priority')
+    parser_request_priority_set.add_argument("--uuid",
+                                             help="identity of transfer request",
+                                             required=True)
+    parser_request_priority_set.add_argument("--priority",
+                                             help="new priority of the transfer request; higher is sooner",
+                                             type=int,
+                                             required=True)
+    parser_request_priority_set.add_argument("--json",
+                                             help="display output in JSON",
+                                             action="store_true")
+    parser_request_priority_set.set_defaults(func=request_priority_set)
+
     # define a subparser for the 'request rm' subcommand
     parser_request_rm = request_subparser.add_parser('rm', help='delete a transfer request')
     parser_request_rm.add_argument("--uuid",
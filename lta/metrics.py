@@ -0,0 +1,235 @@
+# metrics.py
+"""Module that keeps the work metrics of a Long Term Archive component."""
+
+import asyncio
+from contextlib import contextmanager
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import requests
+from rest_tools.client import RestClient
+
+# counters kept by every component
+COUNTERS = {
+    "claimed": "Pieces of work (Bundles or TransferRequests) claimed from the LTA DB",
+    "succeeded": "Pieces of work sent on to the component's output status",
+    "quarantined": "Pieces of work sent to quarantine",
+    "empty_pops": "Claims that found no work waiting in the LTA DB",
+    "bytes_processed": "Bytes of the Bundles sent on to the component's output status",
+}
+
+# seconds; from a quick REST call up to a large checksum or tape write
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600, 14400, float("inf"))
+
+# how many claimed Bundles we remember the size of, while waiting to see them finished
+MAX_CLAIMED_SIZES = 1000
+
+ROUTE_ID = re.compile(r"/[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}(?=/|$)")
+
+
+def route_template(path: str) -> str:
+    """Reduce a request path to its route, so that it makes a label of bounded cardinality."""
+    return ROUTE_ID.sub("/{uuid}", path.split("?", 1)[0])
+
+
+def _observe(timings: Dict[str, Dict[str, float]], name: str, seconds: float) -> None:
+    """Add a time to the count, total, and maximum of the named timing."""
+    timing = timings.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+    timing["count"] += 1
+    timing["seconds"] += seconds
+    timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+
+class ComponentMetrics:
+    """
+    ComponentMetrics keeps the counters and timings of a component's work.
+
+    The metrics are always kept in memory, so that a summary can ride along
+    with the status heartbeat. If asked to export them, they are also kept
+    in a prometheus_client registry, and serve() will publish them on a
+    local /metrics port. prometheus_client is only imported to export, so
+    a component that doesn't serve /metrics never pays to load it.
+    """
+
+    def __init__(self, component_type: str, export: bool = False) -> None:
+        """Create the metrics of a component of the provided type."""
+        self.component_type = component_type
+        self.counts: Dict[str, float] = {name: 0 for name in COUNTERS}
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.rest: Dict[str, Dict[str, float]] = {}
+        self._claimed_sizes: Dict[str, int] = {}
+        # UUIDs of the work claimed since the component last cleared the list
+        self.claimed_uuids: List[str] = []
+        self.registry = None
+        if export:
+            try:
+                from prometheus_client import CollectorRegistry, Counter, Histogram  # type: ignore
+            except ImportError:
+                raise RuntimeError("prometheus_client is required to export metrics")
+            # each component gets its own registry, so that we export only its own metrics
+            self.registry = CollectorRegistry()
+            self._counters = {
+                name: Counter(f"lta_{name}", doc, ["component"], registry=self.registry)
+                for name, doc in COUNTERS.items()
+            }
+            self._phase_histogram = Histogram("lta_phase_seconds",
+                                              "Time spent in each phase of the work",
+                                              ["component", "phase"],
+                                              buckets=HISTOGRAM_BUCKETS,
+                                              registry=self.registry)
+            self._rest_histogram = Histogram("lta_rest_request_seconds",
+                                             "Time spent waiting on REST requests",
+                                             ["component", "method", "route"],
+                                             buckets=HISTOGRAM_BUCKETS,
+                                             registry=self.registry)
+
+    def count(self, name: str, amount: float = 1) -> None:
+        """Add the provided amount to the named counter."""
+        self.counts[name] += amount
+        if self.registry:
+            self._counters[name].labels(self.component_type).inc(amount)
+
+    def observe_phase(self, phase: str, seconds: float) -> None:
+        """Record the time spent in one pass through a phase of the work."""
+        _observe(self.phases, phase, seconds)
+        if self.registry:
+            self._phase_histogram.labels(self.component_type, phase).observe(seconds)
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """Time the body of a with statement as a pass through a phase of the work."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe_phase(phase, time.monotonic() - start)
+
+    def observe_rest(self, method: str, path: str, seconds: float) -> None:
+        """Record the time spent waiting on a REST request."""
+        route = route_template(path)
+        _observe(self.rest, f"{method} {route}", seconds)
+        if self.registry:
+            self._rest_histogram.labels(self.component_type, method, route).observe(seconds)
+
+    def observe_lta_request(self,
+                            method: str,
+                            path: str,
+                            body: Optional[Dict[str, Any]],
+                            response: Any,
+                            output_status: str) -> None:
+        """
+        Count the work claimed and finished by a request to the LTA DB.
+
+        A pop claims a Bundle or TransferRequest, or finds nothing waiting.
+        Work is finished when it is PATCHed to quarantine, or to the output
+        status of the component. Components that finish a TransferRequest
+        by creating Bundles (the picker and locator) count that themselves.
+        """
+        route = route_template(path)
+        if method == "POST" and route.endswith("/actions/pop") and isinstance(response, dict):
+            work = response.get("bundle", response.get("transfer_request"))
+            if not work:
+                self.count("empty_pops")
+                return
+            self.count("claimed")
+            if isinstance(work, dict) and "uuid" in work:
+                self.claimed_uuids.append(work["uuid"])
+            if isinstance(work, dict) and "uuid" in work and isinstance(work.get("size"), int):
+                self._claimed_sizes[work["uuid"]] = work["size"]
+                # don't grow without bound if claimed work goes missing
+                if len(self._claimed_sizes) > MAX_CLAIMED_SIZES:
+                    del self._claimed_sizes[next(iter(self._claimed_sizes))]
+        elif method == "PATCH" and route in ["/Bundles/{uuid}", "/TransferRequests/{uuid}"] and isinstance(body, dict):
+            status = body.get("status")
+            if status not in ["quarantined", output_status]:
+                return
+            size = self._claimed_sizes.pop(path.split("?", 1)[0].rsplit("/", 1)[-1], 0)
+            if status == "quarantined":
+                self.count("quarantined")
+            else:
+                self.count("succeeded")
+                self.count("bytes_processed", size)
+
+    def serve(self, port: int) -> None:
+        """Publish the metrics on a local /metrics port."""
+        if not self.registry:
+            raise RuntimeError("metrics must be exported to serve /metrics")
+        from prometheus_client import start_http_server  # type: ignore
+        start_http_server(port, registry=self.registry)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the metrics for the status heartbeat."""
+        return {
+            "counts": dict(self.counts),
+            "phases": {name: dict(timing) for name, timing in self.phases.items()},
+            "rest": {name: dict(timing) for name, timing in self.rest.items()},
+        }
+
+
+class MeteredRestClient(RestClient):
+    """MeteredRestClient is a RestClient that reports its requests to ComponentMetrics."""
+
+    def __init__(self,
+                 address: str,
+                 metrics: ComponentMetrics,
+                 output_status: Optional[str] = None,
+                 **kwargs: Any) -> None:
+        """
+        Create a MeteredRestClient.
+
+        Every request is timed. If an output_status is provided, requests
+        are also counted as claiming or finishing work in the LTA DB.
+        """
+        super().__init__(address, **kwargs)
+        self.metrics = metrics
+        self.output_status = output_status
+
+    async def request(self, method: str, path: str, *args: Any, **kwargs: Any) -> Any:
+        """Send a request, and record its metrics."""
+        start = time.monotonic()
+        try:
+            response = await super().request(method, path, *args, **kwargs)
+        finally:
+            self.metrics.observe_rest(method, path, time.monotonic() - start)
+        if self.output_status:
+            body = args[0] if args else kwargs.get("args")
+            self.metrics.observe_lta_request(method, path, body, response, self.output_status)
+        return response
+
+    async def request_data(self,
+                           method: str,
+                           path: str,
+                           data: bytes,
+                           content_type: str,
+                           params: Optional[Dict[str, str]] = None) -> Union[bytes, Any]:
+        """
+        Send a request with a body that isn't JSON, and record its metrics.
+
+        RestClient.request() only speaks JSON, so this sends the provided
+        body and Content-Type with the same session, authorization, and
+        bad request logging. A JSON response is returned decoded, and any
+        other response body is returned as bytes.
+        """
+        url, kwargs = self._prepare(method, path)
+        del kwargs["json"]
+        kwargs["data"] = data
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Content-Type": content_type}
+        if params:
+            kwargs["params"] = params
+        start = time.monotonic()
+        try:
+            r: requests.Response = await asyncio.wrap_future(self.session.request(method, url, **kwargs))  # type: ignore[arg-type]
+            r.raise_for_status()
+        except requests.exceptions.HTTPError:
+            self.logger.info('bad request: %s %s (%d bytes of %s)', method, path, len(data), content_type, exc_info=True)
+            raise
+        finally:
+            self.metrics.observe_rest(method, path, time.monotonic() - start)
+        if r.headers.get("Content-Type", "").startswith("application/json"):
+            response = self._decode(r.content)
+        else:
+            response = r.content
+        if self.output_status:
+            self.metrics.observe_lta_request(method, path, None, response, self.output_status)
+        return response
@@ -74,30 +74,20 @@ class NerscMover(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 0. Do some pre-flight checks to ensure that we can do work
-        # if the HPSS system is not available
-        args = ["/usr/common/software/bin/hpss_avail", "archive"]
-        completed_process = run(args, stdout=PIPE, stderr=PIPE)
-        if completed_process.returncode != 0:
+        if not await self._ready_for_work():
             # prevent this instance from claiming any work
-            self.logger.error(f"Unable to do work; HPSS system not available (returncode: {completed_process.returncode})")
             return False
         # 1. Ask the LTA DB for the next Bundle to be taped
         self.logger.info("Asking the LTA DB for a Bundle to tape at NERSC with HPSS.")
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
         }
@@ -109,8 +99,16 @@ class NerscMover(Component):
             return False
         # process the Bundle that we were given
         try:
-            await self._write_bundle_to_hpss(lta_rc, bundle)
+            await self._do_work_bundle(lta_rc, bundle)
             return True
+        except Exception:
+            return False
+
+    @wtt.spanned()
+    async def _do_work_bundle(self, lta_rc: RestClient, bundle: BundleType) -> bool:
+        """Tape a claimed Bundle, returning True if it was written to tape."""
+        try:
+            return await self._write_bundle_to_hpss(lta_rc, bundle)
         except Exception as e:
             bundle_id = bundle["uuid"]
             right_now = now()
@@ -121,7 +119,17 @@ class NerscMover(Component):
             }
             self.logger.info(f"PATCH /Bundles/{bundle_id} - '{patch_body}'")
             await lta_rc.request('PATCH', f'/Bundles/{bundle_id}', patch_body)
-        return False
+            raise e
+
+    @wtt.spanned()
+    async def _ready_for_work(self) -> bool:
+        """Check that the HPSS system is available."""
+        args = ["/usr/common/software/bin/hpss_avail", "archive"]
+        completed_process = await self.run_blocking(run, args, stdout=PIPE, stderr=PIPE)
+        if completed_process.returncode != 0:
+            self.logger.error(f"Unable to do work; HPSS system not available (returncode: {completed_process.returncode})")
+            return False
+        return True
 
     @wtt.spanned()
     async def _write_bundle_to_hpss(self, lta_rc: RestClient, bundle: BundleType) -> bool:
@@ -156,7 +164,7 @@ class NerscMover(Component):
             "status": self.output_status,
             "reason": "",
             "update_timestamp": now(),
-            "claimed": False,
+            "claimed": self.keep_claims,
         }
         self.logger.info(f"PATCH /Bundles/{bundle_id} - '{patch_body}'")
         await lta_rc.request('PATCH', f'/Bundles/{bundle_id}', patch_body)
@@ -164,7 +172,7 @@ class NerscMover(Component):
 
     @wtt.spanned()
     async def _execute_hsi_command(self, lta_rc: RestClient, bundle: BundleType, args: List[str]) -> bool:
-        completed_process = run(args, stdout=PIPE, stderr=PIPE)
+        completed_process = await self.run_blocking(run, args, stdout=PIPE, stderr=PIPE)
         # if our command failed
         if completed_process.returncode != 0:
             self.logger.info(f"Command to tape bundle to HPSS failed: {completed_process.args}")
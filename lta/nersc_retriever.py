@@ -72,10 +72,7 @@ class NerscRetriever(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
@@ -84,18 +81,15 @@ class NerscRetriever(Component):
         # 0. Do some pre-flight checks to ensure that we can do work
         # if the HPSS system is not available
         args = ["/usr/common/software/bin/hpss_avail", "archive"]
-        completed_process = run(args, stdout=PIPE, stderr=PIPE)
+        completed_process = await self.run_blocking(run, args, stdout=PIPE, stderr=PIPE)
         if completed_process.returncode != 0:
             # prevent this instance from claiming any work
             self.logger.error(f"Unable to do work; HPSS system not available (returncode: {completed_process.returncode})")
             return False
         # 1. Ask the LTA DB for the next Bundle to be taped
         self.logger.info("Asking the LTA DB for a Bundle copy from tape at NERSC with HPSS.")
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
         }
@@ -154,7 +148,7 @@ class NerscRetriever(Component):
 
     @wtt.spanned()
     async def _execute_hsi_command(self, lta_rc: RestClient, bundle: BundleType, args: List[str]) -> bool:
-        completed_process = run(args, stdout=PIPE, stderr=PIPE)
+        completed_process = await self.run_blocking(run, args, stdout=PIPE, stderr=PIPE)
         # if our command failed
         if completed_process.returncode != 0:
             self.logger.info(f"Command to read bundle from HPSS failed: {completed_process.args}")
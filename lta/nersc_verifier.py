@@ -7,7 +7,7 @@ import logging
 import os
 from subprocess import PIPE, run
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, cast, Dict, List, Optional
 
 from rest_tools.client import RestClient
 from rest_tools.server import from_environment
@@ -16,11 +16,14 @@ import wipac_telemetry.tracing_tools as wtt
 from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
+from .utils import boolify
+from .uuid_array import pack_uuids, post_uuid_array
 
 EXPECTED_CONFIG = COMMON_CONFIG.copy()
 EXPECTED_CONFIG.update({
     "FILE_CATALOG_REST_TOKEN": None,
     "FILE_CATALOG_REST_URL": None,
+    "METADATA_BINARY_UUIDS": "False",
     "TAPE_BASE_PATH": None,
     "WORK_RETRIES": "3",
     "WORK_TIMEOUT_SECONDS": "30",
@@ -59,6 +62,7 @@ class NerscVerifier(Component):
         super(NerscVerifier, self).__init__("nersc_verifier", config, logger)
         self.file_catalog_rest_token = config["FILE_CATALOG_REST_TOKEN"]
         self.file_catalog_rest_url = config["FILE_CATALOG_REST_URL"]
+        self.metadata_binary_uuids = boolify(config["METADATA_BINARY_UUIDS"])
         self.tape_base_path = config["TAPE_BASE_PATH"]
         self.work_retries = int(config["WORK_RETRIES"])
         self.work_timeout_seconds = float(config["WORK_TIMEOUT_SECONDS"])
@@ -75,30 +79,20 @@ class NerscVerifier(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 0. Do some pre-flight checks to ensure that we can do work
-        # if the HPSS system is not available
-        args = ["/usr/common/software/bin/hpss_avail", "archive"]
-        completed_process = run(args, stdout=PIPE, stderr=PIPE)
-        if completed_process.returncode != 0:
+        if not await self._ready_for_work():
             # prevent this instance from claiming any work
-            self.logger.error(f"Unable to do work; HPSS system not available (returncode: {completed_process.returncode})")
             return False
         # 1. Ask the LTA DB for the next Bundle to be verified
         self.logger.info("Asking the LTA DB for a Bundle to verify at NERSC with HPSS.")
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
         }
@@ -109,11 +103,21 @@ class NerscVerifier(Component):
             self.logger.info("LTA DB did not provide a Bundle to verify at NERSC with HPSS. Going on vacation.")
             return False
         # process the Bundle that we were given
+        try:
+            await self._do_work_bundle(lta_rc, bundle)
+            return True
+        except Exception:
+            return False
+
+    @wtt.spanned()
+    async def _do_work_bundle(self, lta_rc: RestClient, bundle: BundleType) -> bool:
+        """Verify a claimed Bundle in HPSS, returning True if it was verified."""
         try:
             if await self._verify_bundle_in_hpss(lta_rc, bundle):
                 await self._add_bundle_to_file_catalog(lta_rc, bundle)
                 await self._update_bundle_in_lta_db(lta_rc, bundle)
-            return True
+                return True
+            return False
         except Exception as e:
             bundle_uuid = bundle["uuid"]
             right_now = now()
@@ -124,16 +128,23 @@ class NerscVerifier(Component):
             }
             self.logger.info(f"PATCH /Bundles/{bundle_uuid} - '{patch_body}'")
             await lta_rc.request('PATCH', f'/Bundles/{bundle_uuid}', patch_body)
-        return False
+            raise e
+
+    @wtt.spanned()
+    async def _ready_for_work(self) -> bool:
+        """Check that the HPSS system is available."""
+        args = ["/usr/common/software/bin/hpss_avail", "archive"]
+        completed_process = await self.run_blocking(run, args, stdout=PIPE, stderr=PIPE)
+        if completed_process.returncode != 0:
+            self.logger.error(f"Unable to do work; HPSS system not available (returncode: {completed_process.returncode})")
+            return False
+        return True
 
     @wtt.spanned()
     async def _add_bundle_to_file_catalog(self, lta_rc: RestClient, bundle: BundleType) -> bool:
         """Add a FileCatalog entry for the bundle, then update existing records."""
-        # configure a RestClient to talk to the File Catalog
-        fc_rc = RestClient(self.file_catalog_rest_url,
-                           token=self.file_catalog_rest_token,
-                           timeout=self.work_timeout_seconds,
-                           retries=self.work_retries)
+        # use our long-lived RestClient to talk to the File Catalog
+        fc_rc = self.fc_rc
         # determine the path where the bundle is stored on hpss
         data_warehouse_path = bundle["path"]
         basename = os.path.basename(bundle["bundle_path"])
@@ -174,6 +185,21 @@ class NerscVerifier(Component):
         # indicate that our file catalog updates were successful
         return True
 
+    @wtt.spanned()
+    async def _bulk_delete_metadata(self, lta_rc: RestClient, metadata: List[str]) -> Dict[str, Any]:
+        """Delete Metadata records from the LTA DB, as packed UUIDs if configured to do so."""
+        if self.metadata_binary_uuids:
+            try:
+                packed = pack_uuids(metadata, dashed=False)
+            except ValueError as e:
+                self.logger.warning(f"Unable to pack Metadata UUIDs; falling back to JSON: {e}")
+            else:
+                return cast(Dict[str, Any], await post_uuid_array(lta_rc, '/Metadata/actions/bulk_delete', packed))
+        delete_query = {
+            "metadata": metadata
+        }
+        return cast(Dict[str, Any], await lta_rc.request('POST', '/Metadata/actions/bulk_delete', delete_query))
+
     @wtt.spanned()
     async def _update_bundle_in_lta_db(self, lta_rc: RestClient, bundle: BundleType) -> bool:
         """Update the LTA DB to indicate the Bundle is verified."""
@@ -182,7 +208,7 @@ class NerscVerifier(Component):
             "status": self.output_status,
             "reason": "",
             "update_timestamp": now(),
-            "claimed": False,
+            "claimed": self.keep_claims,
         }
         self.logger.info(f"PATCH /Bundles/{bundle_uuid} - '{patch_body}'")
         await lta_rc.request('PATCH', f'/Bundles/{bundle_uuid}', patch_body)
@@ -233,11 +259,9 @@ class NerscVerifier(Component):
 
             # if we processed any Metadata records, we can now delete them
             if num_files > 0:
-                delete_query = {
-                    "metadata": [x['uuid'] for x in results]
-                }
+                metadata = [x['uuid'] for x in results]
                 self.logger.info(f"POST /Metadata/actions/bulk_delete - {num_files} Metadata records")
-                bulk_response = await lta_rc.request('POST', '/Metadata/actions/bulk_delete', delete_query)
+                bulk_response = await self._bulk_delete_metadata(lta_rc, metadata)
                 delete_count = bulk_response['count']
                 self.logger.info(f"LTA DB reports {delete_count} Metadata records are deleted.")
                 if delete_count != num_files:
@@ -263,7 +287,7 @@ class NerscVerifier(Component):
         #                      disabling verbose response messages, and disabling interactive file transfer messages
         #     hashlist      -> List checksum hash for HPSS file(s)
         args = ["/usr/bin/hsi", "-P", "hashlist", hpss_path]
-        completed_process = run(args, stdout=PIPE, stderr=PIPE)
+        completed_process = await self.run_blocking(run, args, stdout=PIPE, stderr=PIPE)
         # if our command failed
         if completed_process.returncode != 0:
             self.logger.error("Command to list checksum in HPSS failed")
@@ -310,7 +334,7 @@ class NerscVerifier(Component):
         #     hashverify    -> Verify checksum hash for existing HPSS file(s)
         #     -A            -> enable auto-scheduling of retrievals
         args = ["/usr/bin/hsi", "-P", "hashverify", "-A", hpss_path]
-        completed_process = run(args, stdout=PIPE, stderr=PIPE)
+        completed_process = await self.run_blocking(run, args, stdout=PIPE, stderr=PIPE)
         # if our command failed
         if completed_process.returncode != 0:
             self.logger.error("Command to verify bundle in HPSS failed")
@@ -7,7 +7,6 @@ import logging
 import sys
 from typing import Any, Dict, List, Optional, Tuple
 
-from binpacking import to_constant_volume  # type: ignore
 from rest_tools.client import RestClient
 from rest_tools.server import from_environment
 import wipac_telemetry.tracing_tools as wtt
@@ -15,6 +14,8 @@ import wipac_telemetry.tracing_tools as wtt
 from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
 from .log_format import StructuredFormatter
 from .lta_types import BundleType, TransferRequestType
+from .utils import boolify
+from .uuid_array import pack_uuids, post_uuid_array, UUID_SIZE
 
 Logger = logging.Logger
 
@@ -27,6 +28,7 @@ EXPECTED_CONFIG.update({
     "FILE_CATALOG_REST_TOKEN": None,
     "FILE_CATALOG_REST_URL": None,
     "MAX_BUNDLE_SIZE": "107374182400",  # 100 GiB
+    "METADATA_BINARY_UUIDS": "False",
     "WORK_RETRIES": "3",
     "WORK_TIMEOUT_SECONDS": "30",
 })
@@ -53,6 +55,7 @@ class Picker(Component):
         self.file_catalog_rest_token = config["FILE_CATALOG_REST_TOKEN"]
         self.file_catalog_rest_url = config["FILE_CATALOG_REST_URL"]
         self.max_bundle_size = int(config["MAX_BUNDLE_SIZE"])
+        self.metadata_binary_uuids = boolify(config["METADATA_BINARY_UUIDS"])
         self.work_retries = int(config["WORK_RETRIES"])
         self.work_timeout_seconds = float(config["WORK_TIMEOUT_SECONDS"])
 
@@ -68,21 +71,15 @@ class Picker(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on TransferRequests.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on TransferRequests.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a transfer request and perform work on it."""
         # 1. Ask the LTA DB for the next TransferRequest to be picked
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a TransferRequest to work on.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
@@ -110,11 +107,8 @@ class Picker(Component):
                                         lta_rc: RestClient,
                                         tr: TransferRequestType) -> None:
         self.logger.info(f"Processing TransferRequest: {tr}")
-        # configure a RestClient to talk to the File Catalog
-        fc_rc = RestClient(self.file_catalog_rest_url,
-                           token=self.file_catalog_rest_token,
-                           timeout=self.work_timeout_seconds,
-                           retries=self.work_retries)
+        # use our long-lived RestClient to talk to the File Catalog
+        fc_rc = self.fc_rc
         # figure out which files need to go
         source = tr["source"]
         dest = tr["dest"]
@@ -161,6 +155,8 @@ class Picker(Component):
             #                    0: uuid            1: size
             packing_list.append((catalog_file_uuid, file_size))
         # divide the packing list into an array of packing specifications
+        # only a picker that finds work needs binpacking; don't load it at startup
+        from binpacking import to_constant_volume  # type: ignore
         packing_spec = to_constant_volume(packing_list, self.max_bundle_size, 1)  # 1: size
         # for each packing list, we create a bundle in the LTA DB
         self.logger.info(f"Creating {len(packing_spec)} new Bundles in the LTA DB.")
@@ -180,6 +176,9 @@ class Picker(Component):
                 "file_count": len(spec),
             })
             await self._create_metadata_mapping(lta_rc, spec, bundle_uuid)
+        # the TransferRequest is never PATCHed to our output status; its Bundles are
+        self.metrics.count("succeeded")
+        self.metrics.count("bytes_processed", sum(file_size for _, file_size in packing_list))
 
     @wtt.spanned()
     async def _create_bundle(self,
@@ -204,9 +203,19 @@ class Picker(Component):
         for i in range(slice_index, NUM_UUIDS, CREATE_CHUNK_SIZE):
             slice_index = i
             create_slice = spec[slice_index:slice_index+CREATE_CHUNK_SIZE]
+            files = [x[0] for x in create_slice]  # 0: uuid
+            if self.metadata_binary_uuids:
+                try:
+                    packed = pack_uuids(files, dashed=True)
+                except ValueError as e:
+                    self.logger.warning(f'Unable to pack File Catalog UUIDs; falling back to JSON: {e}')
+                else:
+                    result = await post_uuid_array(lta_rc, '/Metadata/actions/bulk_create', packed, {"bundle_uuid": bundle_uuid})
+                    self.logger.info(f'Created {len(result) // UUID_SIZE} Metadata documents linking to pending bundle {bundle_uuid}.')
+                    continue
             create_body = {
                 "bundle_uuid": bundle_uuid,
-                "files": [x[0] for x in create_slice],  # 0: uuid
+                "files": files,
             }
             result = await lta_rc.request('POST', '/Metadata/actions/bulk_create', create_body)
             self.logger.info(f'Created {result["count"]} Metadata documents linking to pending bundle {bundle_uuid}.')
@@ -0,0 +1,153 @@
+# profiling.py
+"""Module that profiles the work cycles of a Long Term Archive component."""
+
+import asyncio
+from contextlib import asynccontextmanager
+import cProfile
+from datetime import datetime
+from logging import Logger
+import marshal
+import os
+import tracemalloc
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+# what a profiled work cycle records
+PROFILE_MODES = ["ALL", "CPROFILE", "TRACEMALLOC"]
+
+# frames of traceback kept for each memory allocation
+TRACEMALLOC_FRAMES = 10
+
+
+def profile_label(uuids: List[str]) -> str:
+    """Name the work done in a profiled work cycle, for the file names of its profiles."""
+    if len(uuids) == 1:
+        return uuids[0]
+    return f"{uuids[0]}-and-{len(uuids) - 1}-more"
+
+
+def dump_stats(stats: Dict[Any, Any], path: str) -> None:
+    """Write the stats of a cProfile profile to a .prof file, as Profile.dump_stats does."""
+    with open(path, "wb") as f:
+        marshal.dump(stats, f)
+
+
+def dump_snapshot(snapshot: tracemalloc.Snapshot, path: str) -> None:
+    """Write a tracemalloc snapshot to a file."""
+    snapshot.dump(path)
+
+
+class WorkProfiler:
+    """
+    WorkProfiler profiles the work cycles of a component, while enabled.
+
+    Each work cycle that claims work is profiled on its own, and its
+    profiles are written to the profile directory, named after the
+    component and the UUID of the work it claimed. A cProfile profile is
+    written as .prof (see python -m pstats), and a tracemalloc snapshot as
+    .tracemalloc (see tracemalloc.Snapshot.load). Cycles that claim no
+    work are not written, so that idle polling doesn't fill the directory.
+    The profiles are written with run_blocking, off the event loop.
+
+    cProfile only sees the event loop thread. A call handed to the executor
+    (Component.run_blocking) shows up as time spent awaiting it, not as the
+    calls it made; the blocking:* phases of the component's metrics time
+    those. tracemalloc sees the allocations of every thread, but not of the
+    worker processes of a PROCESS executor.
+    """
+
+    def __init__(self,
+                 component_name: str,
+                 profile_dir: str,
+                 mode: str,
+                 enabled: bool,
+                 logger: Logger,
+                 run_blocking: Callable[..., Awaitable[Any]]) -> None:
+        """
+        Create the profiler of a component.
+
+        run_blocking is used to write the profiles; see Component.run_blocking.
+        """
+        self.component_name = component_name
+        self.profile_dir = profile_dir
+        self.mode = mode
+        self.enabled = enabled
+        self.logger = logger
+        self.run_blocking = run_blocking
+        self._started_tracemalloc = False
+
+    def listen(self, signum: int) -> None:
+        """Toggle profiling whenever the process receives the provided signal."""
+        try:
+            asyncio.get_event_loop().add_signal_handler(signum, self.toggle)
+        except (NotImplementedError, RuntimeError, ValueError) as e:
+            self.logger.warning(f"Unable to toggle profiling with signal {signum}: '{e}'")
+
+    def toggle(self) -> None:
+        """Turn profiling on if it was off, and off if it was on."""
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.logger.info(f"Profiling enabled; writing {self.mode} profiles to {self.profile_dir}")
+        else:
+            self.logger.info("Profiling disabled")
+
+    @asynccontextmanager
+    async def cycle(self, claimed_uuids: List[str]) -> AsyncIterator[None]:
+        """
+        Profile the body of an async with statement as a work cycle, if enabled.
+
+        claimed_uuids is read after the body, so the list may be filled in
+        while the cycle runs.
+        """
+        if not self.enabled:
+            if self._started_tracemalloc:
+                # we were turned off between cycles
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            yield
+            return
+        profile = self._start()
+        try:
+            yield
+        finally:
+            await self._stop(profile, claimed_uuids)
+
+    def _start(self) -> Optional[cProfile.Profile]:
+        """Start profiling a work cycle."""
+        profile = None
+        if self.mode in ["ALL", "CPROFILE"]:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # another profiler is already active
+                self.logger.warning(f"Unable to start cProfile: '{e}'")
+                profile = None
+        if self.mode in ["ALL", "TRACEMALLOC"] and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        return profile
+
+    async def _stop(self, profile: Optional[cProfile.Profile], claimed_uuids: List[str]) -> None:
+        """Stop profiling a work cycle, and write its profiles if it did any work."""
+        if profile:
+            profile.disable()
+        snapshot = None
+        if self._started_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            # keep tracing between cycles, unless we've been turned off
+            if not self.enabled:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        if not claimed_uuids:
+            return
+        await self.run_blocking(os.makedirs, self.profile_dir, exist_ok=True)
+        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        base_path = os.path.join(self.profile_dir, f"{self.component_name}-{timestamp}-{profile_label(claimed_uuids)}")
+        if profile:
+            # a Profile can't be pickled for a PROCESS executor, but its stats can
+            profile.create_stats()
+            await self.run_blocking(dump_stats, profile.stats, f"{base_path}.prof")
+            self.logger.info(f"Wrote cProfile profile to {base_path}.prof")
+        if snapshot:
+            await self.run_blocking(dump_snapshot, snapshot, f"{base_path}.tracemalloc")
+            self.logger.info(f"Wrote tracemalloc snapshot to {base_path}.tracemalloc")
@@ -12,7 +12,7 @@ from rest_tools.client import RestClient
 from rest_tools.server import from_environment
 import wipac_telemetry.tracing_tools as wtt
 
-from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
+from .component import COMMON_CONFIG, Component, LOCALITY_CONFIG, now, status_loop, work_loop
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
 
@@ -26,6 +26,7 @@ EXPECTED_CONFIG.update({
     "WORK_RETRIES": "3",
     "WORK_TIMEOUT_SECONDS": "30",
 })
+EXPECTED_CONFIG.update(LOCALITY_CONFIG)
 
 def _enumerate_path(path: str) -> List[str]:
     """Recursively walk the file system to enumerate files at provided path."""
@@ -84,26 +85,23 @@ class RateLimiter(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be staged
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
-        self.logger.info("Asking the LTA DB for a Bundle to stage.")
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
+        # only ask for a Bundle that fits in what is left of our quota
+        output_size = (await self.run_blocking(_get_files_and_size, self.output_path))[1]
+        max_size = max(self.output_quota - output_size, 0)
+        self.logger.info(f"Asking the LTA DB for a Bundle to stage of at most {max_size} bytes.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
         }
-        response = await lta_rc.request('POST', f'/Bundles/actions/pop?source={self.source_site}&dest={self.dest_site}&status={self.input_status}', pop_body)
+        response = await lta_rc.request('POST', f'/Bundles/actions/pop?source={self.source_site}&dest={self.dest_site}&status={self.input_status}&max_size={max_size}{self.pop_locality_args()}', pop_body)
         self.logger.info(f"LTA DB responded with: {response}")
         bundle = response["bundle"]
         if not bundle:
@@ -141,7 +139,7 @@ class RateLimiter(Component):
         """Stage the Bundle to the output directory for transfer."""
         bundle_id = bundle["uuid"]
         # measure output directory size, our bundle's size, and the quota
-        output_size = _get_files_and_size(self.output_path)[1]
+        output_size = (await self.run_blocking(_get_files_and_size, self.output_path))[1]
         bundle_size = bundle["size"]
         total_size = output_size + bundle_size
         # if we would exceed our destination quota
@@ -161,12 +159,13 @@ class RateLimiter(Component):
         src_path = os.path.join(self.input_path, bundle_name)
         dst_path = os.path.join(self.output_path, bundle_name)
         self.logger.info(f"Moving Bundle {src_path} -> {dst_path}")
-        shutil.move(src_path, dst_path)
+        await self.run_blocking(shutil.move, src_path, dst_path)
         # update the Bundle in the LTA DB
         self.logger.info("Bundle has been staged to the output directory.")
         patch_body = {
             "bundle_path": dst_path,
             "claimed": False,
+            "locality": self.locality_tag,
             "status": self.output_status,
             "reason": "",
             "update_timestamp": now(),
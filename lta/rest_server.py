@@ -5,54 +5,143 @@ Run with `python -m lta.rest_server`.
 """
 
 import asyncio
+from copy import deepcopy
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import partial, wraps
 import logging
+import math
 import os
-from typing import Any, Callable, cast, Dict
+import re
+import time
+from typing import Any, Awaitable, Callable, cast, Dict, List, Optional, Tuple
 from urllib.parse import quote_plus
 from uuid import uuid1
 
 from motor.motor_tornado import MotorClient, MotorDatabase  # type: ignore
 import pymongo  # type: ignore
-from rest_tools.utils.json_util import json_decode
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name  # type: ignore
+from rest_tools.utils.json_util import json_decode, json_encode
 from rest_tools.server import authenticated, catch_error, from_environment, RestHandler, RestHandlerSetup, RestServer
 import tornado.web
 
+from .json_stream import JsonArrayStream, JsonStreamError
+from .utils import boolify
+from .uuid_array import pack_uuids, unpack_uuids, UUID_ARRAY_CONTENT_TYPE
+
 ASCENDING = pymongo.ASCENDING
+DESCENDING = pymongo.DESCENDING
 MongoClient = pymongo.MongoClient
 
+# priority given to TransferRequests (and their Bundles) that don't specify one
+DEFAULT_PRIORITY = 0
+
+# maximum number of Bundles to move to the archive collection at a time
+ARCHIVE_CHUNK_SIZE = 100
+
+# maximum number of Bundle UUIDs that may be requested from /Bundles/actions/bulk_get at once
+BULK_GET_LIMIT = 10000
+
+# maximum number of Metadata documents to supply to MongoDB.insertMany() while streaming bulk_create
+CREATE_CHUNK_SIZE = 1000
+
 # maximum number of Metadata UUIDs to supply to MongoDB.deleteMany() during bulk_delete
 DELETE_CHUNK_SIZE = 1000
 
 EXPECTED_CONFIG = {
+    'LTA_ADMISSION_BURST': '100',
+    'LTA_ADMISSION_MAX_CONCURRENT': '0',  # 0 means no limit
+    'LTA_ADMISSION_RATE_PER_SECOND': '0',  # 0 means no limit
+    'LTA_ARCHIVE_AGE_DAYS': '0',  # 0 means never move documents to the archive collections
+    'LTA_ARCHIVE_SLEEP_DURATION_SECONDS': '3600',
+    'LTA_AUDIT_QUERY_PLANS': 'FALSE',  # explain every query shape at startup
     'LTA_AUTH_ALGORITHM': 'RS256',
     'LTA_AUTH_ISSUER': 'lta',
     'LTA_AUTH_SECRET': 'secret',
     'LTA_MAX_BODY_SIZE': '16777216',  # 16 MB is the limit of MongoDB documents
     'LTA_MAX_CLAIM_AGE_HOURS': '12',
+    'LTA_MAX_STREAM_BODY_SIZE': '1073741824',  # 1 GiB; streamed bodies are not held in memory
     'LTA_MONGODB_AUTH_USER': '',  # None means required to specify
     'LTA_MONGODB_AUTH_PASS': '',  # empty means no authentication required
     'LTA_MONGODB_DATABASE_NAME': 'lta',
     'LTA_MONGODB_HOST': 'localhost',
     'LTA_MONGODB_PORT': '27017',
+    'LTA_MONGODB_REPORT_MAX_STALENESS_SECONDS': '-1',  # -1 means no staleness bound
+    'LTA_MONGODB_REPORT_READ_PREFERENCE': 'primary',
     'LTA_REST_HOST': 'localhost',
     'LTA_REST_PORT': '8080',
+    'LTA_RETRY_BACKOFF_SECONDS': '300',
+    'LTA_RETRY_MAX_ATTEMPTS': '0',  # 0 means component quarantines are never retried
+    'LTA_RETRY_MAX_BACKOFF_SECONDS': '86400',
+    'LTA_STREAM_BODY_THRESHOLD': '1048576',  # bulk bodies larger than this are streamed
 }
 
 # -----------------------------------------------------------------------------
 
 AFTER = pymongo.ReturnDocument.AFTER
+BEFORE = pymongo.ReturnDocument.BEFORE
 ALL_DOCUMENTS: Dict[str, str] = {}
-FIRST_IN_FIRST_OUT = [("work_priority_timestamp", pymongo.ASCENDING)]
+EVENT_ORDER = [("uuid", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+HIGHEST_PRIORITY_FIRST = [("priority", pymongo.DESCENDING), ("work_priority_timestamp", pymongo.ASCENDING)]
 LOGGING_DENY_LIST = ["LTA_AUTH_SECRET", "LTA_MONGODB_AUTH_PASS"]
 MOST_RECENT_FIRST = [("timestamp", pymongo.DESCENDING)]
+NEXT_VERSION = {"version": 1}
 REMOVE_ID = {"_id": False}
-TRUE_SET = {'1', 't', 'true', 'y', 'yes'}
-
-def boolify(value: str) -> bool:
-    """Convert a string into a True or False value."""
-    return isinstance(value, str) and value.lower() in TRUE_SET
+TERMINAL_BUNDLE_STATUS = ["deleted", "finished"]
+TERMINAL_REQUEST_STATUS = ["completed"]
+UPDATE_MANY_COPY_FIELDS = {"work_priority_timestamp": "create_timestamp"}
+UPDATE_MANY_FILTER_FIELDS = ["dest", "reason", "request", "source", "status"]
+
+def apply_patch(before: Dict[str, Any], req: Dict[str, Any]) -> Dict[str, Any]:
+    """Determine the document that a versioned PATCH of the provided document produced."""
+    after = deepcopy(before)
+    for path, value in req.items():
+        doc = after
+        *parents, field = path.split(".")
+        for parent in parents:
+            doc = doc.setdefault(parent, {})
+        doc[field] = value
+    after["version"] = after.get("version", 0) + 1
+    return after
+
+def bundle_pop_queries(status: str,
+                       right_now: str,
+                       dest: Optional[str] = None,
+                       source: Optional[str] = None,
+                       max_size: Optional[int] = None,
+                       locality: Optional[str] = None,
+                       require_locality: bool = False) -> List[Dict[str, Any]]:
+    """Build the queries that /Bundles/actions/pop tries in turn, to find a Bundle to claim."""
+    find_query: Dict[str, Any] = {
+        "status": status,
+        "claimed": False,
+        # bundles waiting to be retried are not ready until not_before
+        "not_before": {"$not": {"$gt": right_now}},
+    }
+    if dest:
+        find_query["dest"] = dest
+    if source:
+        find_query["source"] = source
+    # only hand out a bundle that fits in the capacity the caller has left
+    if max_size is not None:
+        find_query["size"] = {"$lte": max_size}
+    # try the bundles stored where the claimant is first, then (if allowed) anywhere
+    if not locality:
+        return [find_query]
+    queries = [{**find_query, "locality": locality}]
+    if not require_locality:
+        queries.append(find_query)
+    return queries
+
+def transfer_request_pop_query(source: str) -> Dict[str, Any]:
+    """Build the query that /TransferRequests/actions/pop uses, to find a TransferRequest to claim."""
+    return {
+        "source": source,
+        "status": "unclaimed",
+    }
+
+def is_priority(value: Any) -> bool:
+    """Determine if the provided value is a valid priority."""
+    return isinstance(value, int) and not isinstance(value, bool)
 
 def now() -> str:
     """Return string timestamp for current time, to the second."""
@@ -62,6 +151,41 @@ def unique_id() -> str:
     """Return a unique ID for an LTA database entity."""
     return uuid1().hex
 
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Summarize the distribution of a list of durations."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def percentile(p: int) -> float:
+        return ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": ordered[-1],
+    }
+
+def transition_event(doc_type: str,
+                     uuid: str,
+                     event: str,
+                     from_status: Optional[str],
+                     to_status: str,
+                     claimant: Optional[str]) -> Dict[str, Any]:
+    """Create an entry for the event log of status transitions."""
+    return {
+        "type": doc_type,
+        "uuid": uuid,
+        "event": event,  # create, claim, or status
+        "from_status": from_status,
+        "to_status": to_status,
+        "claimant": claimant,
+        "timestamp": now(),
+    }
+
 # -----------------------------------------------------------------------------
 
 def lta_auth(**_auth: Any) -> Callable[..., Any]:
@@ -73,8 +197,13 @@ def lta_auth(**_auth: Any) -> Callable[..., Any]:
     is not necessary, as this decorator will perform authentication
     checking as well.
 
+    Authorized requests must then be admitted by the AdmissionControl of
+    the server before the method is called.
+
     Args:
         roles (list): The roles to match
+        priority (bool): Exempt the route from rate limiting (for claims and
+            heartbeats)
 
     Raises:
         :py:class:`tornado.web.HTTPError`
@@ -104,12 +233,121 @@ def lta_auth(**_auth: Any) -> Callable[..., Any]:
             if not authorized:
                 raise tornado.web.HTTPError(403, reason="authorization failed")
 
-            return await method(self, *args, **kwargs)
+            # a streamed body was admitted before it began to arrive
+            if getattr(self, 'stream_admitted', False):
+                return await method(self, *args, **kwargs)
+
+            priority = _auth.get('priority', False)
+            client = f"{auth_role}:{self.auth_data.get('sub')}"
+            retry_after = self.admission_control.admit(client, priority)
+            if retry_after:
+                self.retry_after = retry_after
+                raise tornado.web.HTTPError(429, reason="too many requests")
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self.admission_control.release()
         return wrapper
     return make_wrapper
 
 # -----------------------------------------------------------------------------
 
+class AdmissionControl:
+    """
+    AdmissionControl limits the load that clients can place on the server.
+
+    Each client (role and token subject) has a token bucket that refills at
+    rate_per_second up to burst requests. The server also admits at most
+    max_concurrent requests at a time. Priority requests (claims and
+    heartbeats) are exempt from both limits, but do count towards the
+    requests in flight. A rate or limit of 0 disables that check.
+    """
+
+    def __init__(self, max_concurrent: int = 0, rate_per_second: float = 0, burst: float = 1) -> None:
+        """Initialize an AdmissionControl object."""
+        self.max_concurrent = max_concurrent
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.in_flight = 0
+        self.buckets: Dict[str, Tuple[float, float]] = {}  # client: (tokens, monotonic time)
+
+    def admit(self, client: str, priority: bool = False) -> int:
+        """Admit a request, or return the seconds the client should wait before retrying."""
+        if not priority:
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                return 1
+            if self.rate_per_second:
+                right_now = time.monotonic()
+                tokens, last = self.buckets.get(client, (self.burst, right_now))
+                tokens = min(self.burst, tokens + (right_now - last) * self.rate_per_second)
+                if tokens < 1:
+                    self.buckets[client] = (tokens, right_now)
+                    return math.ceil((1 - tokens) / self.rate_per_second)
+                self.buckets[client] = (tokens - 1, right_now)
+        self.in_flight += 1
+        return 0
+
+    def release(self) -> None:
+        """Release a request admitted earlier."""
+        self.in_flight -= 1
+
+# -----------------------------------------------------------------------------
+
+class SingleFlight:
+    """SingleFlight lets identical concurrent reads share one database operation."""
+
+    def __init__(self) -> None:
+        """Initialize a SingleFlight object."""
+        self.in_flight: Dict[str, "asyncio.Future[str]"] = {}
+
+    async def do(self, key: str, produce: Callable[[], Awaitable[str]]) -> str:
+        """Return the result of produce(), or of the call already in flight for key."""
+        if key not in self.in_flight:
+            future = asyncio.ensure_future(produce())
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # shield the shared operation from the cancellation of any one caller
+        return await asyncio.shield(self.in_flight[key])
+
+# -----------------------------------------------------------------------------
+
+class RetryPolicy:
+    """
+    RetryPolicy turns a component's quarantine of a Bundle into a delayed retry.
+
+    The Bundle is released in the status it failed in, with a not_before
+    timestamp that backs off exponentially with each failure in that
+    status, and pop skips it until then. Only the Bundle that fails
+    max_attempts times in the same status is really quarantined. A
+    max_attempts of 0 disables retries.
+    """
+
+    def __init__(self, max_attempts: int = 0, backoff_seconds: float = 300, max_backoff_seconds: float = 86400) -> None:
+        """Initialize a RetryPolicy object."""
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+    def apply(self, before: Dict[str, Any], req: Dict[str, Any], right_now: datetime) -> bool:
+        """Rewrite a quarantine request as a retry if any attempts remain, returning True if it did."""
+        status = before.get("status")
+        if (not self.max_attempts) or (req.get("status") != "quarantined") or (status in [None, "quarantined"]):
+            return False
+        attempts = 1
+        if before.get("retry_status") == status:
+            attempts = before.get("retry_count", 0) + 1
+        req["retry_count"] = attempts
+        req["retry_status"] = status
+        if attempts >= self.max_attempts:
+            return False
+        delay = min(self.backoff_seconds * 2**(attempts - 1), self.max_backoff_seconds)
+        req["status"] = status
+        req["claimed"] = False
+        req["not_before"] = (right_now + timedelta(seconds=delay)).isoformat(timespec='seconds')
+        return True
+
+# -----------------------------------------------------------------------------
+
 class CheckClaims:
     """CheckClaims determines if claims are old/expired."""
 
@@ -131,12 +369,97 @@ class BaseLTAHandler(RestHandler):
             self,
             check_claims: CheckClaims,
             db: MotorDatabase,
+            report_db: MotorDatabase,
+            single_flight: SingleFlight,
+            admission_control: AdmissionControl,
+            retry_policy: RetryPolicy,
             *args: Any,
             **kwargs: Any) -> None:
         """Initialize a BaseLTAHandler object."""
         super(BaseLTAHandler, self).initialize(*args, **kwargs)  # type: ignore
+        self.admission_control = admission_control
+        self.retry_after = 0
         self.check_claims = check_claims
         self.db = db
+        self.report_db = report_db
+        self.retry_policy = retry_policy
+        self.single_flight = single_flight
+
+    @property
+    def auth_role(self) -> Optional[str]:
+        """Determine the LTA role of the authenticated caller."""
+        for scope in self.auth_data.get('scope', '').split():
+            if scope.startswith('lta:'):
+                return scope.split(':', 1)[-1]
+        return None
+
+    @property
+    def reader(self) -> MotorDatabase:
+        """
+        Choose the database to use for a listing or reporting query.
+
+        Operators (admin, user) may be served from secondaries, according to
+        the configured read preference. Components (system) need to read
+        their own writes, so they always read from the primary.
+        """
+        if self.auth_role == 'system':
+            return self.db
+        return self.report_db
+
+    async def write_coalesced(self, produce: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        """
+        Write the result of a read, sharing it with identical concurrent reads.
+
+        Reads are identical if they have the same route, query arguments, and
+        caller role. The result is encoded once and the same body is written
+        to every caller that was waiting on it. Components (system) need to
+        read their own writes, and a read already in flight may have started
+        before their write, so their reads are never shared.
+        """
+        if self.auth_role == 'system':
+            self.write(await produce())
+            return
+        arguments = sorted(self.request.query_arguments.items())
+        key = f"{self.auth_role} {self.request.path} {arguments}"
+
+        async def encode() -> str:
+            return json_encode(await produce())
+
+        body = await self.single_flight.do(key, encode)
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        self.write(body)
+
+    async def _find_status(self, collection: Any, query: Dict[str, Any], req: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Find the current retry state of a document that the request will change the status of."""
+        if "status" not in req:
+            return None
+        projection = {"_id": False, "status": True, "retry_count": True, "retry_status": True}
+        logging.debug(f"MONGO-START: db.{collection.name}.find_one(filter={query}, projection={projection})")
+        ret = await collection.find_one(filter=query, projection=projection)
+        logging.debug(f"MONGO-END:   db.{collection.name}.find_one(filter, projection)")
+        return cast(Optional[Dict[str, Any]], ret)
+
+    async def record_events(self, events: List[Dict[str, Any]]) -> None:
+        """Append status transition events to the event log."""
+        if not events:
+            return
+        logging.debug(f"MONGO-START: db.Events.insert_many(documents={events})")
+        await self.db.Events.insert_many(documents=events)
+        logging.debug("MONGO-END:   db.Events.insert_many(documents)")
+
+    def write_error(self, status_code: int = 500, **kwargs: Any) -> None:
+        """Write out custom error json, telling rejected clients when to retry."""
+        if self.retry_after:
+            self.set_header("Retry-After", str(self.retry_after))
+        super(BaseLTAHandler, self).write_error(status_code, **kwargs)
+
+    def write_versioned(self, doc: Dict[str, Any]) -> None:
+        """Write a versioned document, or 304 if the client already has that version."""
+        self.set_header("Etag", f'"{doc["uuid"]}-{doc.get("version", 0)}"')
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        self.write(doc)
 
 # -----------------------------------------------------------------------------
 
@@ -154,6 +477,18 @@ class BundlesActionsBulkCreateHandler(BaseLTAHandler):
         if not req['bundles']:
             raise tornado.web.HTTPError(400, reason="bundles field is empty")
 
+        # bundles inherit the priority of the TransferRequest that spawned them
+        request_priority: Dict[str, int] = {}
+        for xfer_bundle in req["bundles"]:
+            if "priority" in xfer_bundle:
+                if not is_priority(xfer_bundle["priority"]):
+                    raise tornado.web.HTTPError(400, reason="priority field is not an integer")
+                continue
+            request_uuid = xfer_bundle.get("request")
+            if request_uuid not in request_priority:
+                request_priority[request_uuid] = await self._get_request_priority(request_uuid)
+            xfer_bundle["priority"] = request_priority[request_uuid]
+
         for xfer_bundle in req["bundles"]:
             right_now = now()  # https://www.youtube.com/watch?v=BQkFEG_iZUA
             xfer_bundle["uuid"] = unique_id()
@@ -161,6 +496,7 @@ class BundlesActionsBulkCreateHandler(BaseLTAHandler):
             xfer_bundle["update_timestamp"] = right_now
             xfer_bundle["work_priority_timestamp"] = right_now
             xfer_bundle["claimed"] = False
+            xfer_bundle["version"] = 1
 
         logging.debug(f"MONGO-START: db.Bundles.insert_many(documents={req['bundles']})")
         ret = await self.db.Bundles.insert_many(documents=req["bundles"])
@@ -168,14 +504,30 @@ class BundlesActionsBulkCreateHandler(BaseLTAHandler):
         create_count = len(ret.inserted_ids)
 
         uuids = []
+        events = []
         for x in req["bundles"]:
             uuid = x["uuid"]
             uuids.append(uuid)
+            events.append(transition_event("Bundle", uuid, "create", None, x.get("status"), x.get("claimant")))
             logging.info(f"created Bundle {uuid}")
+        await self.record_events(events)
 
         self.set_status(201)
         self.write({'bundles': uuids, 'count': create_count})
 
+    async def _get_request_priority(self, request_uuid: Any) -> int:
+        """Determine the priority of the TransferRequest with the provided UUID."""
+        if not request_uuid:
+            return DEFAULT_PRIORITY
+        query = {"uuid": request_uuid}
+        projection = {"_id": False, "priority": True}
+        logging.debug(f"MONGO-START: db.TransferRequests.find_one(filter={query}, projection={projection})")
+        tr = await self.db.TransferRequests.find_one(filter=query, projection=projection)
+        logging.debug("MONGO-END:   db.TransferRequests.find_one(filter, projection)")
+        if not tr:
+            return DEFAULT_PRIORITY
+        return cast(int, tr.get("priority", DEFAULT_PRIORITY))
+
 class BundlesActionsBulkDeleteHandler(BaseLTAHandler):
     """Handler for /Bundles/actions/bulk_delete."""
 
@@ -202,6 +554,40 @@ class BundlesActionsBulkDeleteHandler(BaseLTAHandler):
 
         self.write({'bundles': results, 'count': len(results)})
 
+class BundlesActionsBulkGetHandler(BaseLTAHandler):
+    """Handler for /Bundles/actions/bulk_get."""
+
+    @lta_auth(roles=['admin', 'system', 'user'])
+    async def post(self) -> None:
+        """Handle POST /Bundles/actions/bulk_get."""
+        req = json_decode(self.request.body)
+        if 'bundles' not in req:
+            raise tornado.web.HTTPError(400, reason="missing bundles field")
+        if not isinstance(req['bundles'], list):
+            raise tornado.web.HTTPError(400, reason="bundles field is not a list")
+        if not req['bundles']:
+            raise tornado.web.HTTPError(400, reason="bundles field is empty")
+        if len(req['bundles']) > BULK_GET_LIMIT:
+            raise tornado.web.HTTPError(400, reason=f"bundles field has more than {BULK_GET_LIMIT} UUIDs")
+        # like GET /Bundles/{uuid}, we leave out the files unless asked for specific fields
+        projection: Dict[str, bool] = {"_id": False, "files": False}
+        if 'projection' in req:
+            if not isinstance(req['projection'], list) or not all(isinstance(x, str) for x in req['projection']):
+                raise tornado.web.HTTPError(400, reason="projection field is not a list of strings")
+            projection = {"_id": False, "uuid": True}
+            projection.update({field: True for field in req['projection'] if field != "_id"})
+
+        query = {"uuid": {"$in": req['bundles']}}
+        logging.debug(f"MONGO-START: db.Bundles.find(filter={len(req['bundles'])} UUIDs, projection={projection})")
+        found = {}
+        async for row in self.reader.Bundles.find(filter=query, projection=projection):
+            found[row["uuid"]] = row
+        logging.debug("MONGO-END*:   db.Bundles.find(filter, projection)")
+
+        # answer in the order that the caller asked; missing bundles are left out
+        results = [found[uuid] for uuid in dict.fromkeys(req['bundles']) if uuid in found]
+        self.write({'bundles': results, 'count': len(results)})
+
 class BundlesActionsBulkUpdateHandler(BaseLTAHandler):
     """Handler for /Bundles/actions/bulk_update."""
 
@@ -213,6 +599,7 @@ class BundlesActionsBulkUpdateHandler(BaseLTAHandler):
             raise tornado.web.HTTPError(400, reason="missing update field")
         if not isinstance(req['update'], dict):
             raise tornado.web.HTTPError(400, reason="update field is not an object")
+        req['update'].pop('version', None)
         if 'bundles' not in req:
             raise tornado.web.HTTPError(400, reason="missing bundles field")
         if not isinstance(req['bundles'], list):
@@ -221,15 +608,21 @@ class BundlesActionsBulkUpdateHandler(BaseLTAHandler):
             raise tornado.web.HTTPError(400, reason="bundles field is empty")
 
         results = []
+        events = []
         for uuid in req["bundles"]:
             query = {"uuid": uuid}
-            update_doc = {"$set": req["update"]}
-            logging.debug(f"MONGO-START: db.Bundles.update_one(filter={query}, update={update_doc})")
-            ret = await self.db.Bundles.update_one(filter=query, update=update_doc)
-            logging.debug("MONGO-END:   db.Bundles.update_one(filter, update)")
-            if ret.modified_count > 0:
+            update_doc = {"$set": req["update"], "$inc": NEXT_VERSION}
+            projection = {"_id": False, "status": True, "claimant": True}
+            logging.debug(f"MONGO-START: db.Bundles.find_one_and_update(filter={query}, update={update_doc}, projection={projection})")
+            before = await self.db.Bundles.find_one_and_update(filter=query, update=update_doc, projection=projection)
+            logging.debug("MONGO-END:   db.Bundles.find_one_and_update(filter, update, projection)")
+            if before:
                 logging.info(f"updated Bundle {uuid}")
                 results.append(uuid)
+                if "status" in req["update"] and req["update"]["status"] != before.get("status"):
+                    claimant = req["update"].get("claimant", before.get("claimant"))
+                    events.append(transition_event("Bundle", uuid, "status", before.get("status"), req["update"]["status"], claimant))
+        await self.record_events(events)
 
         self.write({'bundles': results, 'count': len(results)})
 
@@ -239,10 +632,15 @@ class BundlesHandler(BaseLTAHandler):
     @lta_auth(roles=['admin', 'system', 'user'])
     async def get(self) -> None:
         """Handle GET /Bundles."""
+        await self.write_coalesced(self._get)
+
+    async def _get(self) -> Dict[str, Any]:
+        """Find the UUIDs of the Bundles matching the query arguments."""
         location = self.get_query_argument("location", default=None)
         request = self.get_query_argument("request", default=None)
         status = self.get_query_argument("status", default=None)
         verified = self.get_query_argument("verified", default=None)
+        archived = boolify(cast(str, self.get_query_argument("archived", default="false")))
 
         query: Dict[str, Any] = {
             "uuid": {"$exists": True},
@@ -263,41 +661,50 @@ class BundlesHandler(BaseLTAHandler):
 
         results = []
         logging.debug(f"MONGO-START: db.Bundles.find(filter={query}, projection={projection})")
-        async for row in self.db.Bundles.find(filter=query,
-                                              projection=projection):
+        async for row in self.reader.Bundles.find(filter=query,
+                                                  projection=projection):
             results.append(row["uuid"])
         logging.debug("MONGO-END*:   db.Bundles.find(filter, projection)")
+        if archived:
+            logging.debug(f"MONGO-START: db.BundlesArchive.find(filter={query}, projection={projection})")
+            async for row in self.reader.BundlesArchive.find(filter=query,
+                                                             projection=projection):
+                results.append(row["uuid"])
+            logging.debug("MONGO-END*:   db.BundlesArchive.find(filter, projection)")
 
         ret = {
             'results': results,
         }
-        self.write(ret)
+        return ret
 
 class BundlesActionsPopHandler(BaseLTAHandler):
     """BundlesActionsPopHandler handles /Bundles/actions/pop."""
 
-    @lta_auth(roles=['admin', 'system'])
+    @lta_auth(roles=['admin', 'system'], priority=True)
     async def post(self) -> None:
         """Handle POST /Bundles/actions/pop."""
         dest = self.get_argument('dest', default=None)
         source = self.get_argument('source', default=None)
         status = self.get_argument('status')
+        max_size_arg = self.get_argument('max_size', default=None)
+        locality = self.get_argument('locality', default=None)
+        require_locality = boolify(self.get_argument('require_locality', default="false"))
         if (not dest) and (not source):
             raise tornado.web.HTTPError(400, reason="missing source and dest fields")
+        max_size: Optional[int] = None
+        if max_size_arg is not None:
+            try:
+                max_size = int(max_size_arg)
+            except ValueError:
+                max_size = -1
+            if max_size < 0:
+                raise tornado.web.HTTPError(400, reason="max_size must be a non-negative integer")
         pop_body = json_decode(self.request.body)
         if 'claimant' not in pop_body:
             raise tornado.web.HTTPError(400, reason="missing claimant field")
         claimant = pop_body["claimant"]
         # find and claim a bundle for the specified source
         sdb = self.db.Bundles
-        find_query = {
-            "status": status,
-            "claimed": False,
-        }
-        if dest:
-            find_query["dest"] = dest
-        if source:
-            find_query["source"] = source
         right_now = now()  # https://www.youtube.com/watch?v=WaSy8yy-mr8
         update_doc = {
             "$set": {
@@ -305,22 +712,167 @@ class BundlesActionsPopHandler(BaseLTAHandler):
                 "claimed": True,
                 "claimant": claimant,
                 "claim_timestamp": right_now,
-            }
+            },
+            "$inc": NEXT_VERSION,
         }
-        logging.debug(f"MONGO-START: db.Bundles.find_one_and_update(filter={find_query}, update={update_doc}, projection={REMOVE_ID}, sort={FIRST_IN_FIRST_OUT}, return_document={AFTER})")
-        bundle = await sdb.find_one_and_update(filter=find_query,
-                                               update=update_doc,
-                                               projection=REMOVE_ID,
-                                               sort=FIRST_IN_FIRST_OUT,
-                                               return_document=AFTER)
-        logging.debug("MONGO-END:   db.Bundles.find_one_and_update(filter, update, projection, sort, return_document)")
+        # try the bundles stored where the claimant is first, then (if allowed) anywhere
+        queries = bundle_pop_queries(status, right_now, dest, source, max_size, locality, require_locality)
+        bundle = None
+        for query in queries:
+            logging.debug(f"MONGO-START: db.Bundles.find_one_and_update(filter={query}, update={update_doc}, projection={REMOVE_ID}, sort={HIGHEST_PRIORITY_FIRST}, return_document={AFTER})")
+            bundle = await sdb.find_one_and_update(filter=query,
+                                                   update=update_doc,
+                                                   projection=REMOVE_ID,
+                                                   sort=HIGHEST_PRIORITY_FIRST,
+                                                   return_document=AFTER)
+            logging.debug("MONGO-END:   db.Bundles.find_one_and_update(filter, update, projection, sort, return_document)")
+            if bundle:
+                break
         # return what we found to the caller
         if not bundle:
             logging.info(f"Unclaimed Bundle with source {source} and status {status} does not exist.")
         else:
             logging.info(f"Bundle {bundle['uuid']} claimed by {claimant}")
+            await self.record_events([transition_event("Bundle", bundle["uuid"], "claim", status, status, claimant)])
         self.write({'bundle': bundle})
 
+class BundlesActionsTransitionHandler(BaseLTAHandler):
+    """BundlesActionsTransitionHandler handles /Bundles/{uuid}/actions/transition."""
+
+    @lta_auth(roles=['admin', 'system'], priority=True)
+    async def post(self, bundle_id: str) -> None:
+        """Handle POST /Bundles/{uuid}/actions/transition."""
+        req = json_decode(self.request.body)
+        for field in ['from_status', 'to_status', 'claimant']:
+            if field not in req:
+                raise tornado.web.HTTPError(400, reason=f"missing {field} field")
+            if not isinstance(req[field], str):
+                raise tornado.web.HTTPError(400, reason=f"{field} field is not a string")
+        update = req.get('update', {})
+        if not isinstance(update, dict):
+            raise tornado.web.HTTPError(400, reason="update field is not an object")
+        if 'uuid' in update and update['uuid'] != bundle_id:
+            raise tornado.web.HTTPError(400, reason="bad request")
+        update.pop('version', None)
+        # the bundle must still be in the status and hands that the caller thinks it is
+        query = {
+            "uuid": bundle_id,
+            "status": req['from_status'],
+            "claimed": True,
+            "claimant": req['claimant'],
+        }
+        # by default the bundle is released for the next stage to claim
+        set_doc = {"claimed": False}
+        set_doc.update(update)
+        set_doc["status"] = req['to_status']
+        set_doc["update_timestamp"] = now()
+        update_doc = {"$set": set_doc, "$inc": NEXT_VERSION}
+        logging.debug(f"MONGO-START: db.Bundles.find_one_and_update(filter={query}, update={update_doc}, projection={REMOVE_ID}, return_document={AFTER})")
+        ret = await self.db.Bundles.find_one_and_update(filter=query,
+                                                        update=update_doc,
+                                                        projection=REMOVE_ID,
+                                                        return_document=AFTER)
+        logging.debug("MONGO-END:   db.Bundles.find_one_and_update(filter, update, projection, return_document)")
+        if not ret:
+            # figure out why the transition failed, so the caller knows what happened
+            query = {"uuid": bundle_id}
+            projection = {"_id": False, "status": True, "claimed": True, "claimant": True}
+            logging.debug(f"MONGO-START: db.Bundles.find_one(filter={query}, projection={projection})")
+            current = await self.db.Bundles.find_one(filter=query, projection=projection)
+            logging.debug("MONGO-END:   db.Bundles.find_one(filter, projection)")
+            if not current:
+                raise tornado.web.HTTPError(404, reason="not found")
+            logging.info(f"refused transition of Bundle {bundle_id} from {req['from_status']} to {req['to_status']} by {req['claimant']}; Bundle is {current}")
+            raise tornado.web.HTTPError(409, reason=f"conflict: status={current.get('status')} claimed={current.get('claimed')} claimant={current.get('claimant')}")
+        logging.info(f"transitioned Bundle {bundle_id} from {req['from_status']} to {req['to_status']} by {req['claimant']}")
+        await self.record_events([transition_event("Bundle", bundle_id, "status", req['from_status'], req['to_status'], req['claimant'])])
+        self.write(ret)
+
+class UpdateManyHandler(BaseLTAHandler):
+    """
+    UpdateManyHandler updates every document of a collection matching a filter.
+
+    The filter is restricted to the fields that operators select work by,
+    and the whole update is done with a single update_many. Subclasses
+    choose the collection and the type of event recorded for status changes.
+    """
+
+    collection_name = ""
+    doc_type = ""
+
+    async def update_many(self) -> None:
+        """Update the documents that match the filter of the request."""
+        req = json_decode(self.request.body)
+        if 'filter' not in req:
+            raise tornado.web.HTTPError(400, reason="missing filter field")
+        if not isinstance(req['filter'], dict):
+            raise tornado.web.HTTPError(400, reason="filter field is not an object")
+        query: Dict[str, Any] = {}
+        for field, value in req['filter'].items():
+            if field not in UPDATE_MANY_FILTER_FIELDS:
+                raise tornado.web.HTTPError(400, reason=f"filter field '{field}' is not one of {UPDATE_MANY_FILTER_FIELDS}")
+            if not isinstance(value, str):
+                raise tornado.web.HTTPError(400, reason=f"filter field '{field}' is not a string")
+            query[field] = value
+        # reason is matched as a regular expression, to select one kind of quarantine
+        if 'reason' in query:
+            try:
+                re.compile(query['reason'])
+            except re.error:
+                raise tornado.web.HTTPError(400, reason="filter field 'reason' is not a regular expression")
+            query['reason'] = {"$regex": query['reason']}
+        update = req.get('update', {})
+        if not isinstance(update, dict):
+            raise tornado.web.HTTPError(400, reason="update field is not an object")
+        update.pop('version', None)
+        for field in update:
+            if field in ["_id", "uuid"] or field.startswith("$") or "." in field:
+                raise tornado.web.HTTPError(400, reason=f"update field '{field}' may not be set")
+        copy = req.get('copy', {})
+        if not isinstance(copy, dict):
+            raise tornado.web.HTTPError(400, reason="copy field is not an object")
+        for target, source in copy.items():
+            if UPDATE_MANY_COPY_FIELDS.get(target) != source:
+                raise tornado.web.HTTPError(400, reason=f"copying '{source}' into '{target}' is not supported")
+        if not update and not copy:
+            raise tornado.web.HTTPError(400, reason="missing update and copy fields")
+
+        collection = self.db[self.collection_name]
+        # update_many can't tell us what it changed, so find the status changes first
+        events = []
+        if "status" in update:
+            projection = {"_id": False, "uuid": True, "status": True, "claimant": True}
+            logging.debug(f"MONGO-START: db.{self.collection_name}.find(filter={query}, projection={projection})")
+            async for before in collection.find(filter=query, projection=projection):
+                if before.get("status") != update["status"]:
+                    claimant = update.get("claimant", before.get("claimant"))
+                    events.append(transition_event(self.doc_type, before["uuid"], "status", before.get("status"), update["status"], claimant))
+            logging.debug(f"MONGO-END*:  db.{self.collection_name}.find(filter, projection)")
+        # an update pipeline can copy fields; literal values keep '$' strings from being read as fields
+        new_values: Dict[str, Any] = {field: {"$literal": value} for field, value in update.items()}
+        new_values.update({target: f"${source}" for target, source in copy.items()})
+        pipeline = [
+            {"$set": new_values},
+            {"$set": {"version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}}},
+        ]
+        logging.debug(f"MONGO-START: db.{self.collection_name}.update_many(filter={query}, update={pipeline})")
+        ret = await collection.update_many(filter=query, update=pipeline)
+        logging.debug(f"MONGO-END:   db.{self.collection_name}.update_many(filter, update)")
+        logging.info(f"updated {ret.modified_count} of {ret.matched_count} {self.collection_name} matching {query}")
+        await self.record_events(events)
+        self.write({'matched': ret.matched_count, 'count': ret.modified_count})
+
+class BundlesActionsUpdateManyHandler(UpdateManyHandler):
+    """BundlesActionsUpdateManyHandler handles /Bundles/actions/update_many."""
+
+    collection_name = "Bundles"
+    doc_type = "Bundle"
+
+    @lta_auth(roles=['admin'])
+    async def post(self) -> None:
+        """Handle POST /Bundles/actions/update_many."""
+        await self.update_many()
+
 class BundlesSingleHandler(BaseLTAHandler):
     """BundlesSingleHandler handles object level routes for Bundles."""
 
@@ -335,9 +887,13 @@ class BundlesSingleHandler(BaseLTAHandler):
         logging.debug(f"MONGO-START: db.Bundles.find_one(filter={query}, projection={projection})")
         ret = await self.db.Bundles.find_one(filter=query, projection=projection)
         logging.debug("MONGO-END:   db.Bundles.find_one(filter, projection)")
+        if not ret and boolify(cast(str, self.get_query_argument("archived", default="false"))):
+            logging.debug(f"MONGO-START: db.BundlesArchive.find_one(filter={query}, projection={projection})")
+            ret = await self.db.BundlesArchive.find_one(filter=query, projection=projection)
+            logging.debug("MONGO-END:   db.BundlesArchive.find_one(filter, projection)")
         if not ret:
             raise tornado.web.HTTPError(404, reason="not found")
-        self.write(ret)
+        self.write_versioned(ret)
 
     @lta_auth(roles=['admin', 'system', 'user'])
     async def patch(self, bundle_id: str) -> None:
@@ -345,17 +901,27 @@ class BundlesSingleHandler(BaseLTAHandler):
         req = json_decode(self.request.body)
         if 'uuid' in req and req['uuid'] != bundle_id:
             raise tornado.web.HTTPError(400, reason="bad request")
+        req.pop('version', None)
         query = {"uuid": bundle_id}
-        update_doc = {"$set": req}
-        logging.debug(f"MONGO-START: db.Bundles.find_one_and_update(filter={query}, update={update_doc}, projection={REMOVE_ID}, return_document={AFTER})")
-        ret = await self.db.Bundles.find_one_and_update(filter=query,
-                                                        update=update_doc,
-                                                        projection=REMOVE_ID,
-                                                        return_document=AFTER)
+        # a component's quarantine may be retried later instead; an operator's is final
+        if self.auth_role == 'system':
+            retry_state = await self._find_status(self.db.Bundles, query, req)
+            if retry_state and self.retry_policy.apply(retry_state, req, datetime.utcnow()):
+                logging.info(f"Bundle {bundle_id} will be retried in {req['status']} after {req['not_before']} (attempt {req['retry_count']})")
+        update_doc = {"$set": req, "$inc": NEXT_VERSION}
+        # take the status we changed from out of the write itself, so a concurrent PATCH can't confuse the event log
+        logging.debug(f"MONGO-START: db.Bundles.find_one_and_update(filter={query}, update={update_doc}, projection={REMOVE_ID}, return_document={BEFORE})")
+        before = await self.db.Bundles.find_one_and_update(filter=query,
+                                                           update=update_doc,
+                                                           projection=REMOVE_ID,
+                                                           return_document=BEFORE)
         logging.debug("MONGO-END:   db.Bundles.find_one_and_update(filter, update, projection, return_document)")
-        if not ret:
+        if not before:
             raise tornado.web.HTTPError(404, reason="not found")
+        ret = apply_patch(before, req)
         logging.info(f"patched Bundle {bundle_id} with {req}")
+        if "status" in req and req["status"] != before.get("status"):
+            await self.record_events([transition_event("Bundle", bundle_id, "status", before.get("status"), req["status"], ret.get("claimant"))])
         self.write(ret)
 
     @lta_auth(roles=['admin', 'system', 'user'])
@@ -370,6 +936,69 @@ class BundlesSingleHandler(BaseLTAHandler):
 
 # -----------------------------------------------------------------------------
 
+class EventsStagesHandler(BaseLTAHandler):
+    """EventsStagesHandler reports how long documents spend in each status."""
+
+    @lta_auth(roles=['admin', 'system', 'user'])
+    async def get(self) -> None:
+        """
+        Handle GET /Events/stages?type={Bundle|TransferRequest}&since={timestamp}.
+
+        For each status, the response summarizes (in seconds):
+            dwell - time from entering the status to being claimed by a
+                    component (or leaving the status, if never claimed)
+            processing - time from being claimed to leaving the status
+        """
+        await self.write_coalesced(self._get)
+
+    async def _get(self) -> Dict[str, Any]:
+        """Fold the event log into dwell and processing times per status."""
+        doc_type = self.get_query_argument("type", default="Bundle")
+        since = self.get_query_argument("since", default=None)
+        query: Dict[str, Any] = {"type": doc_type}
+        if since:
+            query["timestamp"] = {"$gte": since}
+        times: Dict[str, Dict[str, List[float]]] = {}
+
+        def add_time(status: str, kind: str, start: datetime, end: datetime) -> None:
+            stage = times.setdefault(status, {"dwell": [], "processing": []})
+            stage[kind].append((end - start).total_seconds())
+
+        uuid = None
+        status: Optional[str] = None
+        entered = datetime.min
+        claimed: Optional[datetime] = None
+        logging.debug(f"MONGO-START: db.Events.find(filter={query}, projection={REMOVE_ID}, sort={EVENT_ORDER})")
+        async for event in self.reader.Events.find(filter=query,
+                                                   projection=REMOVE_ID,
+                                                   sort=EVENT_ORDER):
+            timestamp = datetime.fromisoformat(event["timestamp"])
+            if event["uuid"] != uuid:
+                uuid = event["uuid"]
+                status = None
+            # leaving a status ends the time spent in it
+            if event["from_status"] != event["to_status"]:
+                if status and status == event["from_status"]:
+                    if claimed:
+                        add_time(status, "dwell", entered, claimed)
+                        add_time(status, "processing", claimed, timestamp)
+                    else:
+                        add_time(status, "dwell", entered, timestamp)
+                status = event["to_status"]
+                entered = timestamp
+                claimed = None
+            # claiming a document ends the time it waited
+            if event["event"] == "claim" and status == event["to_status"]:
+                claimed = timestamp
+        logging.debug("MONGO-END*:  db.Events.find(filter, projection, sort)")
+
+        stages = {}
+        for stage_status, stage in times.items():
+            stages[stage_status] = {kind: summarize(values) for kind, values in stage.items()}
+        return {"type": doc_type, "since": since, "stages": stages}
+
+# -----------------------------------------------------------------------------
+
 class MainHandler(BaseLTAHandler):
     """MainHandler is a BaseLTAHandler that handles the root route."""
 
@@ -379,14 +1008,179 @@ class MainHandler(BaseLTAHandler):
 
 # -----------------------------------------------------------------------------
 
-class MetadataActionsBulkCreateHandler(BaseLTAHandler):
+class StreamingBulkHandler(BaseLTAHandler):
+    """
+    StreamingBulkHandler is a base for bulk routes that can stream their body.
+
+    Small bodies are buffered and handled as usual. Bodies larger than the
+    stream threshold (or of unknown size) are parsed as they arrive, and the
+    elements of the array named by STREAM_FIELD are handed to stream_items()
+    in batches, so the whole body never has to be held in memory at once.
+    For the same reason, the response to a streamed body carries only a
+    count, not the UUIDs it handled.
+    """
+
+    STREAM_FIELD = ""
+    STREAM_ROLES = ['admin', 'system']
+
+    def initialize(  # type: ignore[override]
+            self,
+            max_stream_body_size: int,
+            stream_body_threshold: int,
+            *args: Any,
+            **kwargs: Any) -> None:
+        """Initialize a StreamingBulkHandler object."""
+        super(StreamingBulkHandler, self).initialize(*args, **kwargs)
+        self.max_stream_body_size = max_stream_body_size
+        self.stream_body_threshold = stream_body_threshold
+        self.binary = False
+        self.chunks: List[bytes] = []
+        self.stream_admitted = False
+        self.stream_error: Optional[tornado.web.HTTPError] = None
+        self.streaming = False
+
+    def prepare(self) -> None:
+        """Decide whether to stream the body, before any of it arrives."""
+        super(StreamingBulkHandler, self).prepare()
+        # packed UUID arrays are compact enough to buffer
+        content_type = self.request.headers.get("Content-Type", "")
+        self.binary = content_type.startswith(UUID_ARRAY_CONTENT_TYPE)
+        if self.binary:
+            return
+        content_length = self.request.headers.get("Content-Length")
+        self.streaming = (content_length is None) or (int(content_length) > self.stream_body_threshold)
+        if not self.streaming:
+            return
+        # we act on the body as it arrives, so the caller must be authorized first
+        if not self.current_user or self.auth_role not in self.STREAM_ROLES:
+            raise tornado.web.HTTPError(403, reason="authorization failed")
+        # ...and admitted, since we write to the database while the body arrives
+        client = f"{self.auth_role}:{self.auth_data.get('sub')}"
+        retry_after = self.admission_control.admit(client)
+        if retry_after:
+            self.retry_after = retry_after
+            raise tornado.web.HTTPError(429, reason="too many requests")
+        self.stream_admitted = True
+        self.request.connection.set_max_body_size(self.max_stream_body_size)  # type: ignore[union-attr]
+        self.stream = JsonArrayStream(self.STREAM_FIELD)
+
+    def on_finish(self) -> None:
+        """Release the admission of a streamed body, once the response is sent."""
+        self.release_stream()
+
+    def on_connection_close(self) -> None:
+        """Release the admission of a streamed body, if the client goes away."""
+        super(StreamingBulkHandler, self).on_connection_close()
+        self.release_stream()
+
+    def release_stream(self) -> None:
+        """Release the admission of a streamed body, exactly once."""
+        if self.stream_admitted:
+            self.stream_admitted = False
+            self.admission_control.release()
+
+    async def data_received(self, chunk: bytes) -> None:
+        """Buffer or parse the next chunk of the body."""
+        if not self.streaming:
+            self.chunks.append(chunk)
+            return
+        if self.stream_error:
+            return
+        try:
+            await self.stream_items(self.stream.feed(chunk), final=False)
+        except JsonStreamError as e:
+            self.stream_error = tornado.web.HTTPError(400, reason=f"{e}")
+        except tornado.web.HTTPError as e:
+            self.stream_error = e
+
+    async def finish_stream(self) -> None:
+        """Parse the end of a streamed body, or raise the error that stopped it."""
+        if not self.stream_error:
+            try:
+                await self.stream_items(self.stream.finish(), final=True)
+            except JsonStreamError as e:
+                self.stream_error = tornado.web.HTTPError(400, reason=f"{e}")
+            except tornado.web.HTTPError as e:
+                self.stream_error = e
+        if self.stream_error:
+            await self.stream_failed()
+            raise self.stream_error
+
+    def finish_buffer(self) -> None:
+        """Provide a buffered body to the handler as the request body."""
+        self.request.body = b"".join(self.chunks)
+        self.chunks = []
+
+    def get_uuid_array(self, name: str, dashed: bool) -> List[str]:
+        """Get the UUIDs of a packed UUID array body, with the same errors as get_argument()."""
+        try:
+            uuids = unpack_uuids(self.request.body, dashed)
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, reason=f"`{name}`: (ValueError) {e}")
+        if not uuids:
+            raise tornado.web.HTTPError(400, reason=f"`{name}`: (ValueError) [] is forbidden ([[]])")
+        return uuids
+
+    def write_uuid_array(self, uuids: List[str], dashed: bool) -> None:
+        """Write a list of UUIDs as a packed UUID array response."""
+        self.set_header("Content-Type", UUID_ARRAY_CONTENT_TYPE)
+        self.write(pack_uuids(uuids, dashed))
+
+    async def stream_items(self, items: List[Any], final: bool) -> None:
+        """Handle the array elements parsed from the streamed body."""
+        raise NotImplementedError()
+
+    async def stream_failed(self) -> None:
+        """Clean up after a streamed body turned out to be bad."""
+        pass
+
+    def require_stream_field(self, name: str, value_type: type) -> Any:
+        """Get a field of the streamed body, with the same errors as get_argument()."""
+        if name == self.STREAM_FIELD:
+            if not self.stream.found:
+                if name not in self.stream.fields:
+                    raise tornado.web.HTTPError(400, reason=f"`{name}`: (MissingArgumentError) required argument is missing")
+                value = self.stream.fields[name]
+                raise tornado.web.HTTPError(400, reason=f"`{name}`: (TypeError) {value} ({type(value)}) is not {value_type}")
+            return None
+        if name not in self.stream.fields:
+            raise tornado.web.HTTPError(400, reason=f"`{name}`: (MissingArgumentError) required argument is missing")
+        value = self.stream.fields[name]
+        if not isinstance(value, value_type):
+            raise tornado.web.HTTPError(400, reason=f"`{name}`: (TypeError) {value} ({type(value)}) is not {value_type}")
+        return value
+
+@tornado.web.stream_request_body
+class MetadataActionsBulkCreateHandler(StreamingBulkHandler):
     """Handler for /Metadata/actions/bulk_create."""
 
+    STREAM_FIELD = "files"
+
+    def prepare(self) -> None:
+        """Prepare to create Metadata as the body arrives."""
+        super(MetadataActionsBulkCreateHandler, self).prepare()
+        self.pending: List[str] = []
+        # what we've created so far, in case the rest of the body turns out to be bad
+        self.count = 0
+        self.first_id: Any = None
+        self.last_id: Any = None
+
     @lta_auth(roles=['admin', 'system'])
     async def post(self) -> None:
         """Handle POST /Metadata/actions/bulk_create."""
-        bundle_uuid = self.get_argument("bundle_uuid", type=str)
-        files = self.get_argument("files", type=list, forbiddens=[[]])
+        if self.streaming:
+            await self.finish_stream()
+            self.set_status(201)
+            self.write({'count': self.count})
+            return
+
+        self.finish_buffer()
+        if self.binary:
+            bundle_uuid = self.get_query_argument("bundle_uuid")
+            files = self.get_uuid_array("files", dashed=True)
+        else:
+            bundle_uuid = self.get_argument("bundle_uuid", type=str)
+            files = self.get_argument("files", type=list, forbiddens=[[]])
 
         documents = []
         for file_catalog_uuid in files:
@@ -408,15 +1202,85 @@ class MetadataActionsBulkCreateHandler(BaseLTAHandler):
             logging.info(f"created Metadata {uuid}")
 
         self.set_status(201)
+        if self.binary:
+            self.write_uuid_array(uuids, dashed=False)
+            return
         self.write({'metadata': uuids, 'count': create_count})
 
-class MetadataActionsBulkDeleteHandler(BaseLTAHandler):
+    async def stream_items(self, items: List[Any], final: bool) -> None:
+        """Create Metadata for the File Catalog UUIDs as they arrive."""
+        # we can't create anything until we know which bundle it belongs to,
+        # and we won't hold an unbounded array of files until we find out
+        if self.stream.found and "bundle_uuid" not in self.stream.fields_before:
+            if not final or "bundle_uuid" in self.stream.fields:
+                raise tornado.web.HTTPError(400, reason="`bundle_uuid`: (ValueError) must come before `files` in a streamed body")
+        if not final and "bundle_uuid" not in self.stream.fields:
+            return
+        self.pending.extend(items)
+        bundle_uuid = self.require_stream_field("bundle_uuid", str)
+        if final:
+            self.require_stream_field("files", list)
+            if not self.count and not self.pending:
+                raise tornado.web.HTTPError(400, reason="`files`: (ValueError) [] is forbidden ([[]])")
+        while len(self.pending) >= CREATE_CHUNK_SIZE or (final and self.pending):
+            create_slice = self.pending[:CREATE_CHUNK_SIZE]
+            self.pending = self.pending[CREATE_CHUNK_SIZE:]
+            documents = [{
+                "uuid": unique_id(),
+                "bundle_uuid": bundle_uuid,
+                "file_catalog_uuid": file_catalog_uuid,
+            } for file_catalog_uuid in create_slice]
+            logging.debug(f"MONGO-START: db.Metadata.insert_many(documents=[{len(documents)} documents])")
+            ret = await self.db.Metadata.insert_many(documents=documents)
+            logging.debug("MONGO-END:   db.Metadata.insert_many(documents)")
+            self.count = self.count + len(ret.inserted_ids)
+            # ObjectIds ascend, so the first and last bound everything we've created
+            if self.first_id is None:
+                self.first_id = ret.inserted_ids[0]
+            self.last_id = ret.inserted_ids[-1]
+        logging.info(f"created {self.count} Metadata for Bundle {bundle_uuid}")
+
+    async def stream_failed(self) -> None:
+        """Remove the Metadata created before the body turned out to be bad."""
+        if self.first_id is None:
+            return
+        # a Bundle's Metadata is created by one request at a time, so this range is ours alone
+        query = {
+            "bundle_uuid": self.stream.fields["bundle_uuid"],
+            "_id": {"$gte": self.first_id, "$lte": self.last_id},
+        }
+        logging.debug(f"MONGO-START: db.Metadata.delete_many(filter={query})")
+        await self.db.Metadata.delete_many(filter=query)
+        logging.debug("MONGO-END:   db.Metadata.delete_many(filter)")
+        self.count = 0
+        self.first_id = None
+
+@tornado.web.stream_request_body
+class MetadataActionsBulkDeleteHandler(StreamingBulkHandler):
     """Handler for /Metadata/actions/bulk_delete."""
 
+    STREAM_FIELD = "metadata"
+
+    def prepare(self) -> None:
+        """Prepare to delete Metadata as the body arrives."""
+        super(MetadataActionsBulkDeleteHandler, self).prepare()
+        self.count = 0
+        self.pending: List[str] = []
+        self.received = 0
+
     @lta_auth(roles=['admin', 'system'])
     async def post(self) -> None:
         """Handle POST /Metadata/actions/bulk_delete."""
-        metadata = self.get_argument("metadata", type=list, forbiddens=[[]])
+        if self.streaming:
+            await self.finish_stream()
+            self.write({'count': self.count})
+            return
+
+        self.finish_buffer()
+        if self.binary:
+            metadata = self.get_uuid_array("metadata", dashed=False)
+        else:
+            metadata = self.get_argument("metadata", type=list, forbiddens=[[]])
 
         count = 0
         slice_index = 0
@@ -430,14 +1294,39 @@ class MetadataActionsBulkDeleteHandler(BaseLTAHandler):
             logging.debug("MONGO-END:   db.Metadata.delete_many(filter)")
             count = count + ret.deleted_count
 
+        # the caller already has the UUIDs it sent us in packed form
+        if self.binary:
+            self.write({'count': count})
+            return
         self.write({'metadata': metadata, 'count': count})
 
+    async def stream_items(self, items: List[Any], final: bool) -> None:
+        """Delete Metadata as their UUIDs arrive."""
+        self.pending.extend(items)
+        self.received = self.received + len(items)
+        if final:
+            self.require_stream_field("metadata", list)
+            if not self.received:
+                raise tornado.web.HTTPError(400, reason="`metadata`: (ValueError) [] is forbidden ([[]])")
+        while len(self.pending) >= DELETE_CHUNK_SIZE or (final and self.pending):
+            delete_slice = self.pending[:DELETE_CHUNK_SIZE]
+            self.pending = self.pending[DELETE_CHUNK_SIZE:]
+            query = {"uuid": {"$in": delete_slice}}
+            logging.debug(f"MONGO-START: db.Metadata.delete_many(filter={len(delete_slice)} UUIDs)")
+            ret = await self.db.Metadata.delete_many(filter=query)
+            logging.debug("MONGO-END:   db.Metadata.delete_many(filter)")
+            self.count = self.count + ret.deleted_count
+
 class MetadataHandler(BaseLTAHandler):
     """MetadataHandler handles collection level routes for Metadata."""
 
     @lta_auth(roles=['admin', 'system', 'user'])
     async def get(self) -> None:
         """Handle GET /Metadata."""
+        await self.write_coalesced(self._get)
+
+    async def _get(self) -> Dict[str, Any]:
+        """Find a page of the Metadata records of a Bundle."""
         bundle_uuid = self.get_query_argument("bundle_uuid", default=None)
         limit = int(cast(str, self.get_query_argument("limit", default="1000")))
         skip = int(cast(str, self.get_query_argument("skip", default="0")))
@@ -450,17 +1339,17 @@ class MetadataHandler(BaseLTAHandler):
 
         results = []
         logging.debug(f"MONGO-START: db.Metadata.find(filter={query}, projection={projection}, limit={limit}, skip={skip})")
-        async for row in self.db.Metadata.find(filter=query,
-                                               projection=projection,
-                                               skip=skip,
-                                               limit=limit):
+        async for row in self.reader.Metadata.find(filter=query,
+                                                   projection=projection,
+                                                   skip=skip,
+                                                   limit=limit):
             results.append(row)
         logging.debug("MONGO-END*:   db.Metadata.find(filter, projection, limit, skip)")
 
         ret = {
             'results': results,
         }
-        self.write(ret)
+        return ret
 
     @lta_auth(roles=['admin', 'system', 'user'])
     async def delete(self) -> None:
@@ -500,56 +1389,146 @@ class MetadataSingleHandler(BaseLTAHandler):
 
 # -----------------------------------------------------------------------------
 
+def validate_transfer_request(req: Dict[str, Any]) -> None:
+    """Validate the fields of a new TransferRequest, and default its priority."""
+    if 'source' not in req:
+        raise tornado.web.HTTPError(400, reason="missing source field")
+    if 'dest' not in req:
+        raise tornado.web.HTTPError(400, reason="missing dest field")
+    if 'path' not in req:
+        raise tornado.web.HTTPError(400, reason="missing path field")
+    if not isinstance(req['source'], str):
+        raise tornado.web.HTTPError(400, reason="source field is not a string")
+    if not isinstance(req['dest'], str):
+        raise tornado.web.HTTPError(400, reason="dest field is not a string")
+    if not isinstance(req['path'], str):
+        raise tornado.web.HTTPError(400, reason="path field is not a string")
+    if not req['source']:
+        raise tornado.web.HTTPError(400, reason="source field is empty")
+    if not req['dest']:
+        raise tornado.web.HTTPError(400, reason="dest field is empty")
+    if not req['path']:
+        raise tornado.web.HTTPError(400, reason="path field is empty")
+    if 'priority' not in req:
+        req['priority'] = DEFAULT_PRIORITY
+    if not is_priority(req['priority']):
+        raise tornado.web.HTTPError(400, reason="priority field is not an integer")
+
+def init_transfer_request(req: Dict[str, Any], right_now: str) -> None:
+    """Fill in the fields that the LTA DB provides for a new TransferRequest."""
+    req['type'] = "TransferRequest"
+    req['uuid'] = unique_id()
+    req['status'] = "unclaimed"
+    req['create_timestamp'] = right_now
+    req['update_timestamp'] = right_now
+    req['work_priority_timestamp'] = right_now
+    req['claimed'] = False
+    req['version'] = 1
+
+class TransferRequestsActionsBulkCreateHandler(BaseLTAHandler):
+    """Handler for /TransferRequests/actions/bulk_create."""
+
+    @lta_auth(roles=['admin', 'system', 'user'])
+    async def post(self) -> None:
+        """Handle POST /TransferRequests/actions/bulk_create."""
+        req = json_decode(self.request.body)
+        if 'transfer_requests' not in req:
+            raise tornado.web.HTTPError(400, reason="missing transfer_requests field")
+        if not isinstance(req['transfer_requests'], list):
+            raise tornado.web.HTTPError(400, reason="transfer_requests field is not a list")
+        if not req['transfer_requests']:
+            raise tornado.web.HTTPError(400, reason="transfer_requests field is empty")
+        for xfer_request in req['transfer_requests']:
+            if not isinstance(xfer_request, dict):
+                raise tornado.web.HTTPError(400, reason="transfer_requests field contains a non-object")
+            validate_transfer_request(xfer_request)
+
+        # refuse to duplicate a path, unless the caller insists
+        if not req.get('force', False):
+            paths = [x['path'] for x in req['transfer_requests']]
+            duplicates = sorted({x for x in paths if paths.count(x) > 1})
+            if duplicates:
+                raise tornado.web.HTTPError(409, reason=f"duplicate paths in request: {', '.join(duplicates)}")
+            query = {
+                "path": {"$in": paths},
+                "status": {"$ne": "completed"},
+            }
+            projection = {"_id": False, "uuid": True, "path": True}
+            logging.debug(f"MONGO-START: db.TransferRequests.find(filter={query}, projection={projection})")
+            async for row in self.db.TransferRequests.find(filter=query, projection=projection):
+                duplicates.append(f"{row['path']} ({row['uuid']})")
+            logging.debug("MONGO-END*:  db.TransferRequests.find(filter, projection)")
+            if duplicates:
+                raise tornado.web.HTTPError(409, reason=f"paths have open TransferRequests: {', '.join(duplicates)}")
+
+        right_now = now()  # https://www.youtube.com/watch?v=MtN1YnoL46Q
+        for xfer_request in req['transfer_requests']:
+            init_transfer_request(xfer_request, right_now)
+        logging.debug(f"MONGO-START: db.TransferRequests.insert_many(documents={req['transfer_requests']})")
+        ret = await self.db.TransferRequests.insert_many(documents=req['transfer_requests'])
+        logging.debug("MONGO-END:   db.TransferRequests.insert_many(documents)")
+        create_count = len(ret.inserted_ids)
+
+        uuids = []
+        events = []
+        for x in req['transfer_requests']:
+            uuids.append(x['uuid'])
+            events.append(transition_event("TransferRequest", x['uuid'], "create", None, x['status'], None))
+            logging.info(f"created TransferRequest {x['uuid']}")
+        await self.record_events(events)
+
+        self.set_status(201)
+        self.write({'transfer_requests': uuids, 'count': create_count})
+
+class TransferRequestsActionsUpdateManyHandler(UpdateManyHandler):
+    """TransferRequestsActionsUpdateManyHandler handles /TransferRequests/actions/update_many."""
+
+    collection_name = "TransferRequests"
+    doc_type = "TransferRequest"
+
+    @lta_auth(roles=['admin'])
+    async def post(self) -> None:
+        """Handle POST /TransferRequests/actions/update_many."""
+        await self.update_many()
+
 class TransferRequestsHandler(BaseLTAHandler):
     """TransferRequestsHandler is a BaseLTAHandler that handles TransferRequests routes."""
 
     @lta_auth(roles=['admin', 'system', 'user'])
     async def get(self) -> None:
         """Handle GET /TransferRequests."""
+        await self.write_coalesced(self._get)
+
+    async def _get(self) -> Dict[str, Any]:
+        """Find all of the TransferRequests."""
+        archived = boolify(cast(str, self.get_query_argument("archived", default="false")))
         ret = []
         logging.debug(f"MONGO-START: db.TransferRequests.find(filter={ALL_DOCUMENTS}, projection={REMOVE_ID})")
-        async for row in self.db.TransferRequests.find(filter=ALL_DOCUMENTS,
-                                                       projection=REMOVE_ID):
+        async for row in self.reader.TransferRequests.find(filter=ALL_DOCUMENTS,
+                                                           projection=REMOVE_ID):
             ret.append(row)
         logging.debug("MONGO-END*:  db.TransferRequests.find(filter, projection)")
-        self.write({'results': ret})
+        if archived:
+            logging.debug(f"MONGO-START: db.TransferRequestsArchive.find(filter={ALL_DOCUMENTS}, projection={REMOVE_ID})")
+            async for row in self.reader.TransferRequestsArchive.find(filter=ALL_DOCUMENTS,
+                                                                      projection=REMOVE_ID):
+                ret.append(row)
+            logging.debug("MONGO-END*:  db.TransferRequestsArchive.find(filter, projection)")
+        return {'results': ret}
 
     @lta_auth(roles=['admin', 'system', 'user'])
     async def post(self) -> None:
         """Handle POST /TransferRequests."""
         req = json_decode(self.request.body)
-        if 'source' not in req:
-            raise tornado.web.HTTPError(400, reason="missing source field")
-        if 'dest' not in req:
-            raise tornado.web.HTTPError(400, reason="missing dest field")
-        if 'path' not in req:
-            raise tornado.web.HTTPError(400, reason="missing path field")
-        if not isinstance(req['source'], str):
-            raise tornado.web.HTTPError(400, reason="source field is not a string")
-        if not isinstance(req['dest'], str):
-            raise tornado.web.HTTPError(400, reason="dest field is not a string")
-        if not isinstance(req['path'], str):
-            raise tornado.web.HTTPError(400, reason="path field is not a string")
-        if not req['source']:
-            raise tornado.web.HTTPError(400, reason="source field is empty")
-        if not req['dest']:
-            raise tornado.web.HTTPError(400, reason="dest field is empty")
-        if not req['path']:
-            raise tornado.web.HTTPError(400, reason="path field is empty")
+        validate_transfer_request(req)
 
         right_now = now()  # https://www.youtube.com/watch?v=He0p5I0b8j8
-
-        req['type'] = "TransferRequest"
-        req['uuid'] = unique_id()
-        req['status'] = "unclaimed"
-        req['create_timestamp'] = right_now
-        req['update_timestamp'] = right_now
-        req['work_priority_timestamp'] = right_now
-        req['claimed'] = False
+        init_transfer_request(req, right_now)
         logging.debug(f"MONGO-START: db.TransferRequests.insert_one(document={req}")
         await self.db.TransferRequests.insert_one(document=req)
         logging.debug("MONGO-END:   db.TransferRequests.insert_one(document)")
         logging.info(f"created TransferRequest {req['uuid']}")
+        await self.record_events([transition_event("TransferRequest", req['uuid'], "create", None, req['status'], None)])
         self.set_status(201)
         self.write({'TransferRequest': req['uuid']})
 
@@ -563,9 +1542,13 @@ class TransferRequestSingleHandler(BaseLTAHandler):
         logging.debug(f"MONGO-START: db.TransferRequests.find_one(filter={query}, projection={REMOVE_ID}")
         ret = await self.db.TransferRequests.find_one(filter=query, projection=REMOVE_ID)
         logging.debug("MONGO-END:   db.TransferRequests.find_one(filter, projection)")
+        if not ret and boolify(cast(str, self.get_query_argument("archived", default="false"))):
+            logging.debug(f"MONGO-START: db.TransferRequestsArchive.find_one(filter={query}, projection={REMOVE_ID}")
+            ret = await self.db.TransferRequestsArchive.find_one(filter=query, projection=REMOVE_ID)
+            logging.debug("MONGO-END:   db.TransferRequestsArchive.find_one(filter, projection)")
         if not ret:
             raise tornado.web.HTTPError(404, reason="not found")
-        self.write(ret)
+        self.write_versioned(ret)
 
     @lta_auth(roles=['admin', 'system', 'user'])
     async def patch(self, request_id: str) -> None:
@@ -573,18 +1556,23 @@ class TransferRequestSingleHandler(BaseLTAHandler):
         req = json_decode(self.request.body)
         if 'uuid' in req and req['uuid'] != request_id:
             raise tornado.web.HTTPError(400, reason="bad request")
+        req.pop('version', None)
         sbtr = self.db.TransferRequests
         query = {"uuid": request_id}
-        update = {"$set": req}
-        logging.debug(f"MONGO-START: db.TransferRequests.find_one_and_update(filter={query}, update={update}, projection={REMOVE_ID}, return_document={AFTER}")
-        ret = await sbtr.find_one_and_update(filter=query,
-                                             update=update,
-                                             projection=REMOVE_ID,
-                                             return_document=AFTER)
+        update = {"$set": req, "$inc": NEXT_VERSION}
+        # take the status we changed from out of the write itself, so a concurrent PATCH can't confuse the event log
+        logging.debug(f"MONGO-START: db.TransferRequests.find_one_and_update(filter={query}, update={update}, projection={REMOVE_ID}, return_document={BEFORE}")
+        before = await sbtr.find_one_and_update(filter=query,
+                                                update=update,
+                                                projection=REMOVE_ID,
+                                                return_document=BEFORE)
         logging.debug("MONGO-END:   db.TransferRequests.find_one_and_update(filter, update, projection, return_document")
-        if not ret:
+        if not before:
             raise tornado.web.HTTPError(404, reason="not found")
         logging.info(f"patched TransferRequest {request_id} with {req}")
+        if "status" in req and req["status"] != before.get("status"):
+            claimant = req.get("claimant", before.get("claimant"))
+            await self.record_events([transition_event("TransferRequest", request_id, "status", before.get("status"), req["status"], claimant)])
         self.write({})
 
     @lta_auth(roles=['admin', 'system', 'user'])
@@ -601,7 +1589,7 @@ class TransferRequestSingleHandler(BaseLTAHandler):
 class TransferRequestActionsPopHandler(BaseLTAHandler):
     """TransferRequestActionsPopHandler handles /TransferRequests/actions/pop."""
 
-    @lta_auth(roles=['admin', 'system'])
+    @lta_auth(roles=['admin', 'system'], priority=True)
     async def post(self) -> None:
         """Handle POST /TransferRequests/actions/pop."""
         source = self.get_argument('source')
@@ -611,10 +1599,7 @@ class TransferRequestActionsPopHandler(BaseLTAHandler):
         claimant = pop_body["claimant"]
         # find and claim a transfer request for the specified source
         sdtr = self.db.TransferRequests
-        find_query = {
-            "source": source,
-            "status": "unclaimed",
-        }
+        find_query = transfer_request_pop_query(source)
         right_now = now()  # https://www.youtube.com/watch?v=nRGCZh5A8T4
         update_doc = {
             "$set": {
@@ -623,13 +1608,14 @@ class TransferRequestActionsPopHandler(BaseLTAHandler):
                 "claimed": True,
                 "claimant": claimant,
                 "claim_timestamp": right_now,
-            }
+            },
+            "$inc": NEXT_VERSION,
         }
-        logging.debug(f"MONGO-START: db.TransferRequests.find_one_and_update(filter={find_query}, update={update_doc}, projection={REMOVE_ID}, sort={FIRST_IN_FIRST_OUT}, return_document={AFTER})")
+        logging.debug(f"MONGO-START: db.TransferRequests.find_one_and_update(filter={find_query}, update={update_doc}, projection={REMOVE_ID}, sort={HIGHEST_PRIORITY_FIRST}, return_document={AFTER})")
         tr = await sdtr.find_one_and_update(filter=find_query,
                                             update=update_doc,
                                             projection=REMOVE_ID,
-                                            sort=FIRST_IN_FIRST_OUT,
+                                            sort=HIGHEST_PRIORITY_FIRST,
                                             return_document=AFTER)
         logging.debug("MONGO-END:   db.TransferRequests.find_one_and_update(filter, update, projection, sort, return_document)")
         # return what we found to the caller
@@ -637,16 +1623,61 @@ class TransferRequestActionsPopHandler(BaseLTAHandler):
             logging.info(f"Unclaimed TransferRequest with source {source} does not exist.")
         else:
             logging.info(f"TransferRequest {tr['uuid']} claimed by {claimant}")
+            await self.record_events([transition_event("TransferRequest", tr["uuid"], "claim", "unclaimed", "processing", claimant)])
         self.write({'transfer_request': tr})
 
+class TransferRequestActionsPrioritizeHandler(BaseLTAHandler):
+    """TransferRequestActionsPrioritizeHandler handles /TransferRequests/{uuid}/actions/prioritize."""
+
+    @lta_auth(roles=['admin', 'system', 'user'])
+    async def post(self, request_id: str) -> None:
+        """Handle POST /TransferRequests/{uuid}/actions/prioritize."""
+        req = json_decode(self.request.body)
+        if 'priority' not in req:
+            raise tornado.web.HTTPError(400, reason="missing priority field")
+        if not is_priority(req['priority']):
+            raise tornado.web.HTTPError(400, reason="priority field is not an integer")
+        priority = req['priority']
+        right_now = now()  # https://www.youtube.com/watch?v=3wsnTBvmt6E
+        # update the priority of the TransferRequest itself
+        query = {"uuid": request_id}
+        update_doc = {"$set": {"priority": priority, "update_timestamp": right_now}, "$inc": NEXT_VERSION}
+        logging.debug(f"MONGO-START: db.TransferRequests.update_one(filter={query}, update={update_doc})")
+        ret = await self.db.TransferRequests.update_one(filter=query, update=update_doc)
+        logging.debug("MONGO-END:   db.TransferRequests.update_one(filter, update)")
+        if not ret.matched_count:
+            raise tornado.web.HTTPError(404, reason="not found")
+        # update the priority of every Bundle spawned by the TransferRequest
+        query = {"request": request_id}
+        logging.debug(f"MONGO-START: db.Bundles.update_many(filter={query}, update={update_doc})")
+        ret = await self.db.Bundles.update_many(filter=query, update=update_doc)
+        logging.debug("MONGO-END:   db.Bundles.update_many(filter, update)")
+        logging.info(f"prioritized TransferRequest {request_id} and {ret.modified_count} Bundles with priority {priority}")
+        self.write({'transfer_request': request_id, 'priority': priority, 'count': ret.modified_count})
+
 # -----------------------------------------------------------------------------
 
+class QueryPlansHandler(BaseLTAHandler):
+    """QueryPlansHandler handles /QueryPlans."""
+
+    @lta_auth(roles=['admin'])
+    async def get(self) -> None:
+        """Explain every query shape the server issues, and report the plans."""
+        plans = await audit_query_plans(self.db)
+        missing = [plan["name"] for plan in plans if plan["missing_index"]]
+        self.write({"plans": plans, "missing_indexes": missing})
+
+
 class StatusHandler(BaseLTAHandler):
     """StatusHandler is a BaseLTAHandler that handles system status routes."""
 
     @lta_auth(roles=['admin', 'system', 'user'])
     async def get(self) -> None:
         """Get the overall status of the system."""
+        await self.write_coalesced(self._get)
+
+    async def _get(self) -> Dict[str, Any]:
+        """Determine the health of each type of component."""
         ret: Dict[str, str] = {}
         health = 'OK'
         old_data = (datetime.utcnow() - timedelta(seconds=60*5)).isoformat()
@@ -654,7 +1685,7 @@ class StatusHandler(BaseLTAHandler):
         def date_ok(d: str) -> bool:
             return d > old_data
 
-        sds = self.db.Status
+        sds = self.reader.Status
         logging.debug(f"MONGO-START: db.Status.find(filter={ALL_DOCUMENTS}, projection={REMOVE_ID})")
         async for row in sds.find(filter=ALL_DOCUMENTS,
                                   projection=REMOVE_ID):
@@ -668,7 +1699,7 @@ class StatusHandler(BaseLTAHandler):
                 health = 'WARN'
         logging.debug("MONGO-END*:  db.Status.find(filter, projection)")
         ret["health"] = health
-        self.write(ret)
+        return ret
 
 
 class StatusNerscHandler(BaseLTAHandler):
@@ -677,13 +1708,17 @@ class StatusNerscHandler(BaseLTAHandler):
     @lta_auth(roles=['admin', 'system', 'user'])
     async def get(self) -> None:
         """Return the most recent status update with a quota field."""
+        await self.write_coalesced(self._get)
+
+    async def _get(self) -> Dict[str, Any]:
+        """Find the most recent status update with a quota field."""
         # NOTE: This is a really hackish way to handle '/status/nersc'
         #       and will totally break if we start monitoring other sites
         #       but it's easy and convienent for now; hopefully future me
         #       doesn't hate past me for doing this...
         ret = {}
         filter = {"quota": {"$exists": True}}
-        sds = self.db.Status
+        sds = self.reader.Status
         logging.debug(f"MONGO-START: db.Status.find(filter={filter}, sort={MOST_RECENT_FIRST}, limit=1, projection={REMOVE_ID})")
         async for row in sds.find(filter=filter,
                                   sort=MOST_RECENT_FIRST,
@@ -692,7 +1727,7 @@ class StatusNerscHandler(BaseLTAHandler):
             ret = row
             break
         logging.debug("MONGO-END*:  db.Status.find(filter, sort, limit, projection)")
-        self.write(ret)
+        return ret
 
 
 class StatusComponentHandler(BaseLTAHandler):
@@ -725,10 +1760,14 @@ class StatusComponentHandler(BaseLTAHandler):
         So this route takes a lot of Mongo records and folds them into
         the proper response structure.
         """
+        await self.write_coalesced(partial(self._get, component))
+
+    async def _get(self, component: str) -> Dict[str, Any]:
+        """Fold the status records of the component type into one record."""
         # forge, in secret, a master record, to control all others
         ret = {}
         # obtain all the records of the specified component type
-        sds = self.db.Status
+        sds = self.reader.Status
         query = {"component": component}
         logging.debug(f"MONGO-START: db.Status.find(filter={query}, projection={REMOVE_ID})")
         async for row in sds.find(filter=query,
@@ -745,9 +1784,9 @@ class StatusComponentHandler(BaseLTAHandler):
         # if there was no cruelty or malice, return a not found error
         if len(list(ret.keys())) < 1:
             raise tornado.web.HTTPError(404, reason="not found")
-        self.write(ret)
+        return ret
 
-    @lta_auth(roles=['admin', 'system'])
+    @lta_auth(roles=['admin', 'system'], priority=True)
     async def patch(self, component: str) -> None:
         """Update the detailed status of a component."""
         req = json_decode(self.request.body)
@@ -787,13 +1826,17 @@ class StatusComponentCountHandler(BaseLTAHandler):
 
         We simply count up the ones with a 'recent' heartbeat.
         """
+        await self.write_coalesced(partial(self._get, component))
+
+    async def _get(self, component: str) -> Dict[str, Any]:
+        """Count the components of the type with a recent heartbeat."""
         # keep a counter
         count = 0
         # define an epoch
         cutoff_time = datetime.utcnow() - timedelta(minutes=10)
         recent_timestamp = cutoff_time.isoformat()
         # obtain all the records of the specified component type
-        sds = self.db.Status
+        sds = self.reader.Status
         query = {"component": component}
         logging.debug(f"MONGO-START: db.Status.find(filter={query}, projection={REMOVE_ID})")
         async for row in sds.find(filter=query,
@@ -802,10 +1845,215 @@ class StatusComponentCountHandler(BaseLTAHandler):
                 count = count + 1
         logging.debug("MONGO-END*:  db.Status.find(filter, projection)")
         # tell the caller how many of that component we found
-        self.write({
+        return {
             "component": component,
             "count": count,
-        })
+        }
+
+# -----------------------------------------------------------------------------
+
+async def archive_terminal_documents(db: MotorDatabase, cutoff: str) -> int:
+    """
+    Move finished TransferRequests and their Bundles to the archive collections.
+
+    A TransferRequest is archived once it has been in a terminal status since
+    before the cutoff timestamp, and all of its Bundles have reached a
+    terminal status too; its Bundles are archived along with it, so a
+    TransferRequest and its Bundles are always found in the same tier.
+    A TransferRequest with a Bundle still in flight (or in quarantine) is
+    left in place, until a later pass finds that Bundle finished. Documents
+    are copied to the archive before being removed, so an interrupted pass
+    is simply repeated by the next one.
+    """
+    count = 0
+    query = {
+        "status": {"$in": TERMINAL_REQUEST_STATUS},
+        "update_timestamp": {"$lt": cutoff},
+    }
+    logging.debug(f"MONGO-START: db.TransferRequests.find(filter={query})")
+    async for tr in db.TransferRequests.find(filter=query):
+        request_uuid = tr["uuid"]
+        # don't orphan Bundles that are still at work in the hot collection
+        unfinished_query = {
+            "request": request_uuid,
+            "status": {"$nin": TERMINAL_BUNDLE_STATUS},
+        }
+        logging.debug(f"MONGO-START: db.Bundles.find_one(filter={unfinished_query})")
+        unfinished = await db.Bundles.find_one(filter=unfinished_query, projection={"uuid": True, "_id": False})
+        logging.debug("MONGO-END:   db.Bundles.find_one(filter)")
+        if unfinished:
+            logging.info(f"not archiving TransferRequest {request_uuid}; Bundle {unfinished['uuid']} is not finished")
+            continue
+        # move the terminal Bundles of the TransferRequest to the archive
+        bundle_query = {
+            "request": request_uuid,
+            "status": {"$in": TERMINAL_BUNDLE_STATUS},
+        }
+        bundles = []
+        async for bundle in db.Bundles.find(filter=bundle_query):
+            bundles.append(bundle)
+            if len(bundles) >= ARCHIVE_CHUNK_SIZE:
+                count += await _archive_documents(db.Bundles, db.BundlesArchive, bundles)
+                bundles = []
+        count += await _archive_documents(db.Bundles, db.BundlesArchive, bundles)
+        # move the TransferRequest itself to the archive
+        count += await _archive_documents(db.TransferRequests, db.TransferRequestsArchive, [tr])
+        logging.info(f"archived TransferRequest {request_uuid}")
+    logging.debug("MONGO-END*:  db.TransferRequests.find(filter)")
+    return count
+
+async def _archive_documents(hot: Any, cold: Any, docs: List[Dict[str, Any]]) -> int:
+    """Copy the provided documents to the cold collection and remove them from the hot one."""
+    if not docs:
+        return 0
+    for doc in docs:
+        await cold.replace_one(filter={"uuid": doc["uuid"]}, replacement=doc, upsert=True)
+    query = {"uuid": {"$in": [doc["uuid"] for doc in docs]}}
+    logging.debug(f"MONGO-START: db.{hot.name}.delete_many(filter={len(docs)} UUIDs)")
+    ret = await hot.delete_many(filter=query)
+    logging.debug(f"MONGO-END:   db.{hot.name}.delete_many(filter)")
+    return cast(int, ret.deleted_count)
+
+async def archive_loop(db: MotorDatabase, archive_age_days: int, sleep_seconds: float) -> None:
+    """Periodically move terminal documents to the archive collections."""
+    while True:
+        cutoff = (datetime.utcnow() - timedelta(days=archive_age_days)).isoformat()
+        try:
+            count = await archive_terminal_documents(db, cutoff)
+            logging.info(f"Archived {count} documents last updated before {cutoff}")
+        except Exception as e:
+            logging.error(f"Error while archiving documents: {e}", exc_info=True)
+        await asyncio.sleep(sleep_seconds)
+
+# every query shape that the handlers issue often enough to need an index;
+# the values are placeholders, explain() only cares about the shape
+PLACEHOLDER_UUID = "00000000000000000000000000000000"
+PLACEHOLDER_TIMESTAMP = "1970-01-01T00:00:00"
+
+def _bundle_pop_shapes() -> List[Dict[str, Any]]:
+    """Build a query shape for each way that components pop Bundles."""
+    shapes = []
+    for sites, dest, source in [("dest", "nersc", None), ("source", None, "wipac"), ("source and dest", "nersc", "wipac")]:
+        for extra, max_size, locality in [("", None, None), (" and max_size", 0, None), (" and locality", None, "localhost")]:
+            # the first query is the most specific; any others drop the locality
+            query = bundle_pop_queries("specified", PLACEHOLDER_TIMESTAMP, dest, source, max_size, locality)[0]
+            shapes.append({"name": f"Bundles pop by {sites}{extra}", "collection": "Bundles", "limit": 1,
+                           "sort": HIGHEST_PRIORITY_FIRST, "filter": query})
+    return shapes
+
+QUERY_SHAPES: List[Dict[str, Any]] = _bundle_pop_shapes() + [
+    {"name": "Bundles by uuid", "collection": "Bundles",
+     "filter": {"uuid": PLACEHOLDER_UUID}},
+    {"name": "Bundles bulk_get", "collection": "Bundles",
+     "filter": {"uuid": {"$in": [PLACEHOLDER_UUID]}}},
+    {"name": "Bundles by request", "collection": "Bundles",
+     "filter": {"request": PLACEHOLDER_UUID}},
+    {"name": "Bundles list by status", "collection": "Bundles",
+     "filter": {"uuid": {"$exists": True}, "status": "specified"}},
+    {"name": "Events stages", "collection": "Events", "sort": EVENT_ORDER,
+     "filter": {"type": "Bundle", "timestamp": {"$gte": PLACEHOLDER_TIMESTAMP}}},
+    # the history of one document; what operators look up when a Bundle goes astray
+    {"name": "Events by uuid", "collection": "Events", "sort": [("timestamp", pymongo.ASCENDING)],
+     "filter": {"uuid": PLACEHOLDER_UUID}},
+    {"name": "Metadata by bundle_uuid", "collection": "Metadata",
+     "filter": {"bundle_uuid": PLACEHOLDER_UUID}},
+    {"name": "Metadata bulk_delete", "collection": "Metadata",
+     "filter": {"uuid": {"$in": [PLACEHOLDER_UUID]}}},
+    {"name": "Status by component", "collection": "Status",
+     "filter": {"component": "picker"}},
+    {"name": "Status quota", "collection": "Status", "limit": 1, "sort": MOST_RECENT_FIRST,
+     "filter": {"quota": {"$exists": True}}},
+    {"name": "TransferRequests pop", "collection": "TransferRequests", "limit": 1, "sort": HIGHEST_PRIORITY_FIRST,
+     "filter": transfer_request_pop_query("wipac")},
+    {"name": "TransferRequests by uuid", "collection": "TransferRequests",
+     "filter": {"uuid": PLACEHOLDER_UUID}},
+    {"name": "TransferRequests duplicate paths", "collection": "TransferRequests",
+     "filter": {"path": {"$in": ["/data/exp"]}, "status": {"$ne": "completed"}}},
+    {"name": "TransferRequests archive", "collection": "TransferRequests",
+     "filter": {"status": {"$in": TERMINAL_REQUEST_STATUS}, "update_timestamp": {"$lt": PLACEHOLDER_TIMESTAMP}}},
+]
+
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a query plan into its stages, from the root down."""
+    stages = [plan]
+    if "inputStage" in plan:
+        stages.extend(_plan_stages(plan["inputStage"]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+def suggest_index(query_filter: Dict[str, Any], sort: Optional[List[Tuple[str, int]]] = None) -> List[Tuple[str, int]]:
+    """
+    Suggest the index keys that would serve a query without scanning or sorting.
+
+    Fields matched by equality come first, then the sort keys, and then the
+    fields matched by a range, as a compound index is only useful for the
+    sort if every field in front of the sort keys is matched exactly.
+    """
+    sort = sort or []
+    sort_fields = [field for field, direction in sort]
+    equality: List[Tuple[str, int]] = []
+    ranges: List[Tuple[str, int]] = []
+    for field, value in query_filter.items():
+        if field in sort_fields:
+            continue
+        if isinstance(value, dict) and set(value) - {"$eq", "$in"}:
+            ranges.append((field, ASCENDING))
+        else:
+            equality.append((field, ASCENDING))
+    return equality + list(sort) + ranges
+
+def summarize_plan(shape: Dict[str, Any], explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize the output of explain() for a query shape."""
+    winning = explain["queryPlanner"]["winningPlan"]
+    # the slot based execution engine wraps the classic plan
+    stages = _plan_stages(winning.get("queryPlan", winning))
+    stats = explain.get("executionStats", {})
+    stage_names = [stage["stage"] for stage in stages]
+    collscan = "COLLSCAN" in stage_names
+    blocking_sort = "SORT" in stage_names
+    ret = {
+        "name": shape["name"],
+        "collection": shape["collection"],
+        "stages": stage_names,
+        "indexes": [stage["indexName"] for stage in stages if "indexName" in stage],
+        "collscan": collscan,
+        "blocking_sort": blocking_sort,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "missing_index": None,
+    }
+    if collscan or blocking_sort:
+        ret["missing_index"] = suggest_index(shape["filter"], shape.get("sort"))
+    return ret
+
+async def audit_query_plans(db: MotorDatabase) -> List[Dict[str, Any]]:
+    """Explain every known query shape against the database, and summarize the plans."""
+    ret = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(filter=shape["filter"], projection=REMOVE_ID)
+        if "sort" in shape:
+            cursor = cursor.sort(shape["sort"])
+        if "limit" in shape:
+            cursor = cursor.limit(shape["limit"])
+        logging.debug(f"MONGO-START: db.{shape['collection']}.find(filter={shape['filter']}, sort={shape.get('sort')}).explain()")
+        explain = await cursor.explain()
+        logging.debug(f"MONGO-END:   db.{shape['collection']}.find(filter, sort).explain()")
+        ret.append(summarize_plan(shape, explain))
+    return ret
+
+async def log_query_plans(db: MotorDatabase) -> None:
+    """Audit the query plans once, and warn about any query without a suitable index."""
+    try:
+        plans = await audit_query_plans(db)
+    except Exception as e:
+        logging.error(f"Error while auditing query plans: {e}", exc_info=True)
+        return
+    for plan in plans:
+        logging.info(f"Query plan for {plan['name']}: {plan['stages']} using {plan['indexes']}; examined {plan['docs_examined']} documents to return {plan['returned']}")
+        if plan["missing_index"]:
+            logging.warning(f"Query {plan['name']} has no suitable index on {plan['collection']}; consider {plan['missing_index']}")
 
 # -----------------------------------------------------------------------------
 
@@ -837,6 +2085,18 @@ def ensure_mongo_indexes(mongo_url: str, mongo_db: str) -> None:
     if 'bundles_verified_index' not in db.Bundles.index_information():
         logging.info(f"Creating index for {mongo_db}.Bundles.verified")
         db.Bundles.create_index('verified', name='bundles_verified_index')
+    # Bundle.{status, claimed, priority, work_priority_timestamp} - /Bundles/actions/pop
+    if 'bundles_pop_index' not in db.Bundles.index_information():
+        logging.info(f"Creating index for {mongo_db}.Bundles.{{status, claimed, priority, work_priority_timestamp}}")
+        db.Bundles.create_index([('status', ASCENDING), ('claimed', ASCENDING), ('priority', DESCENDING), ('work_priority_timestamp', ASCENDING)], name='bundles_pop_index')
+    # Bundle.{status, claimed, locality, priority, work_priority_timestamp} - /Bundles/actions/pop?locality=
+    if 'bundles_pop_locality_index' not in db.Bundles.index_information():
+        logging.info(f"Creating index for {mongo_db}.Bundles.{{status, claimed, locality, priority, work_priority_timestamp}}")
+        db.Bundles.create_index([('status', ASCENDING), ('claimed', ASCENDING), ('locality', ASCENDING), ('priority', DESCENDING), ('work_priority_timestamp', ASCENDING)], name='bundles_pop_locality_index')
+    # Bundle.{status, claimed, priority, work_priority_timestamp, size} - /Bundles/actions/pop?max_size=
+    if 'bundles_pop_size_index' not in db.Bundles.index_information():
+        logging.info(f"Creating index for {mongo_db}.Bundles.{{status, claimed, priority, work_priority_timestamp, size}}")
+        db.Bundles.create_index([('status', ASCENDING), ('claimed', ASCENDING), ('priority', DESCENDING), ('work_priority_timestamp', ASCENDING), ('size', ASCENDING)], name='bundles_pop_size_index')
     # Metadata.bundle_uuid - Looking up metadata records by bundle's UUID
     if 'metadata_bundle_uuid_index' not in db.Metadata.index_information():
         logging.info(f"Creating index for {mongo_db}.Metadata.bundle_uuid")
@@ -868,7 +2128,44 @@ def ensure_mongo_indexes(mongo_url: str, mongo_db: str) -> None:
     if 'transfer_requests_uuid_index' not in db.TransferRequests.index_information():
         logging.info(f"Creating index for {mongo_db}.TransferRequests.uuid")
         db.TransferRequests.create_index('uuid', name='transfer_requests_uuid_index', unique=True)
+    # TransferRequests.path - /TransferRequests/actions/bulk_create duplicate check
+    if 'transfer_requests_path_index' not in db.TransferRequests.index_information():
+        logging.info(f"Creating index for {mongo_db}.TransferRequests.path")
+        db.TransferRequests.create_index('path', name='transfer_requests_path_index', unique=False)
+    # TransferRequests.{status, priority, work_priority_timestamp} - /TransferRequests/actions/pop
+    if 'transfer_requests_pop_index' not in db.TransferRequests.index_information():
+        logging.info(f"Creating index for {mongo_db}.TransferRequests.{{status, priority, work_priority_timestamp}}")
+        db.TransferRequests.create_index([('status', ASCENDING), ('priority', DESCENDING), ('work_priority_timestamp', ASCENDING)], name='transfer_requests_pop_index')
+    # Events.{type, uuid, timestamp, _id} - /Events/stages; _id orders events within the same second
+    if 'events_type_uuid_timestamp_id_index' not in db.Events.index_information():
+        logging.info(f"Creating index for {mongo_db}.Events.type/uuid/timestamp/_id")
+        db.Events.create_index([('type', ASCENDING), ('uuid', ASCENDING), ('timestamp', ASCENDING), ('_id', ASCENDING)], name='events_type_uuid_timestamp_id_index')
+    # the index above replaces this one; it was only ever a prefix of it
+    if 'events_type_uuid_timestamp_index' in db.Events.index_information():
+        logging.info(f"Dropping index {mongo_db}.Events.events_type_uuid_timestamp_index")
+        db.Events.drop_index('events_type_uuid_timestamp_index')
+    # Events.{uuid, timestamp}
+    if 'events_uuid_timestamp_index' not in db.Events.index_information():
+        logging.info(f"Creating index for {mongo_db}.Events.uuid/timestamp")
+        db.Events.create_index([('uuid', ASCENDING), ('timestamp', ASCENDING)], name='events_uuid_timestamp_index')
+    # BundlesArchive.{uuid, request} and TransferRequestsArchive.uuid
+    if 'bundles_archive_uuid_index' not in db.BundlesArchive.index_information():
+        logging.info(f"Creating index for {mongo_db}.BundlesArchive.uuid")
+        db.BundlesArchive.create_index('uuid', name='bundles_archive_uuid_index', unique=True)
+    if 'bundles_archive_request_index' not in db.BundlesArchive.index_information():
+        logging.info(f"Creating index for {mongo_db}.BundlesArchive.request")
+        db.BundlesArchive.create_index('request', name='bundles_archive_request_index')
+    if 'transfer_requests_archive_uuid_index' not in db.TransferRequestsArchive.index_information():
+        logging.info(f"Creating index for {mongo_db}.TransferRequestsArchive.uuid")
+        db.TransferRequestsArchive.create_index('uuid', name='transfer_requests_archive_uuid_index', unique=True)
     logging.info("Done creating indexes in MongoDB.")
+    # documents created before priority existed sort behind everything else; give them the default
+    no_priority = {"priority": {"$exists": False}}
+    set_priority = {"$set": {"priority": DEFAULT_PRIORITY}}
+    for collection in [db.Bundles, db.TransferRequests]:
+        ret = collection.update_many(filter=no_priority, update=set_priority)
+        if ret.modified_count:
+            logging.info(f"Assigned default priority {DEFAULT_PRIORITY} to {ret.modified_count} documents in {mongo_db}.{collection.name}")
 
 
 def start(debug: bool = False) -> RestServer:
@@ -895,6 +2192,15 @@ def start(debug: bool = False) -> RestServer:
         'debug': debug
     })
     args['check_claims'] = CheckClaims(int(config['LTA_MAX_CLAIM_AGE_HOURS']))
+    args['retry_policy'] = RetryPolicy(
+        max_attempts=int(config['LTA_RETRY_MAX_ATTEMPTS']),
+        backoff_seconds=float(config['LTA_RETRY_BACKOFF_SECONDS']),
+        max_backoff_seconds=float(config['LTA_RETRY_MAX_BACKOFF_SECONDS']))
+    args['single_flight'] = SingleFlight()
+    args['admission_control'] = AdmissionControl(
+        max_concurrent=int(config['LTA_ADMISSION_MAX_CONCURRENT']),
+        rate_per_second=float(config['LTA_ADMISSION_RATE_PER_SECOND']),
+        burst=float(config['LTA_ADMISSION_BURST']))
     # configure access to MongoDB as a backing store
     mongo_user = quote_plus(cast(str, config["LTA_MONGODB_AUTH_USER"]))
     mongo_pass = quote_plus(cast(str, config["LTA_MONGODB_AUTH_PASS"]))
@@ -907,24 +2213,50 @@ def start(debug: bool = False) -> RestServer:
     ensure_mongo_indexes(lta_mongodb_url, mongo_db)
     motor_client = MotorClient(lta_mongodb_url)
     args['db'] = motor_client[mongo_db]
+    # listing and reporting routes may read from secondaries, to leave the
+    # primary to the claims and updates of the pipeline
+    report_read_preference = make_read_preference(
+        read_pref_mode_from_name(config["LTA_MONGODB_REPORT_READ_PREFERENCE"]),
+        None,
+        int(config["LTA_MONGODB_REPORT_MAX_STALENESS_SECONDS"]))
+    args['report_db'] = motor_client.get_database(mongo_db, read_preference=report_read_preference)
+    # move old finished work out of the collections that the pipeline queries
+    archive_age_days = int(config["LTA_ARCHIVE_AGE_DAYS"])
+    if archive_age_days > 0:
+        archive_sleep_seconds = float(config["LTA_ARCHIVE_SLEEP_DURATION_SECONDS"])
+        asyncio.get_event_loop().create_task(archive_loop(args['db'], archive_age_days, archive_sleep_seconds))
+    # report any query that the indexes do not serve, before the load shows it
+    if boolify(cast(str, config["LTA_AUDIT_QUERY_PLANS"])):
+        asyncio.get_event_loop().create_task(log_query_plans(args['db']))
 
     # See: https://github.com/WIPACrepo/rest-tools/issues/2
     max_body_size = int(config["LTA_MAX_BODY_SIZE"])
+    stream_args = dict(args)
+    stream_args['max_stream_body_size'] = int(config["LTA_MAX_STREAM_BODY_SIZE"])
+    stream_args['stream_body_threshold'] = int(config["LTA_STREAM_BODY_THRESHOLD"])
     server = RestServer(debug=debug, max_body_size=max_body_size)  # type: ignore[no-untyped-call]
     server.add_route(r'/', MainHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/Bundles', BundlesHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/Bundles/actions/bulk_create', BundlesActionsBulkCreateHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/Bundles/actions/bulk_delete', BundlesActionsBulkDeleteHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/Bundles/actions/bulk_get', BundlesActionsBulkGetHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/Bundles/actions/bulk_update', BundlesActionsBulkUpdateHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/Bundles/actions/pop', BundlesActionsPopHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/Bundles/actions/update_many', BundlesActionsUpdateManyHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/Bundles/(?P<bundle_id>\w+)', BundlesSingleHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/Bundles/(?P<bundle_id>\w+)/actions/transition', BundlesActionsTransitionHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/Events/stages', EventsStagesHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/Metadata', MetadataHandler, args)  # type: ignore[no-untyped-call]
-    server.add_route(r'/Metadata/actions/bulk_create', MetadataActionsBulkCreateHandler, args)  # type: ignore[no-untyped-call]
-    server.add_route(r'/Metadata/actions/bulk_delete', MetadataActionsBulkDeleteHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/Metadata/actions/bulk_create', MetadataActionsBulkCreateHandler, stream_args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/Metadata/actions/bulk_delete', MetadataActionsBulkDeleteHandler, stream_args)  # type: ignore[no-untyped-call]
     server.add_route(r'/Metadata/(?P<metadata_id>\w+)', MetadataSingleHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/QueryPlans', QueryPlansHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/TransferRequests', TransferRequestsHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/TransferRequests/actions/bulk_create', TransferRequestsActionsBulkCreateHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/TransferRequests/actions/update_many', TransferRequestsActionsUpdateManyHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/TransferRequests/(?P<request_id>\w+)', TransferRequestSingleHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/TransferRequests/actions/pop', TransferRequestActionsPopHandler, args)  # type: ignore[no-untyped-call]
+    server.add_route(r'/TransferRequests/(?P<request_id>\w+)/actions/prioritize', TransferRequestActionsPrioritizeHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/status', StatusHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/status/nersc', StatusNerscHandler, args)  # type: ignore[no-untyped-call]
     server.add_route(r'/status/(?P<component>\w+)', StatusComponentHandler, args)  # type: ignore[no-untyped-call]
@@ -17,7 +17,7 @@ from .crypto import sha512sum
 from .joiner import join_smart
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
-from .rest_server import boolify
+from .utils import boolify
 
 Logger = logging.Logger
 
@@ -83,15 +83,12 @@ class SiteMoveVerifier(Component):
         self.use_full_bundle_path = boolify(config["USE_FULL_BUNDLE_PATH"])
         self.work_retries = int(config["WORK_RETRIES"])
         self.work_timeout_seconds = float(config["WORK_TIMEOUT_SECONDS"])
-        pass
+        # disk usage at the site, as of the last work cycle
+        self.quota: List[Dict[str, str]] = []
 
     def _do_status(self) -> Dict[str, Any]:
         """Provide additional status for the SiteMoveVerifier."""
-        quota = []
-        stdout = self._execute_myquota()
-        if stdout:
-            quota = parse_myquota(stdout)
-        return {"quota": quota}
+        return {"quota": self.quota}
 
     def _expected_config(self) -> Dict[str, Optional[str]]:
         """Provide expected configuration dictionary."""
@@ -101,21 +98,16 @@ class SiteMoveVerifier(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self._update_quota()
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be verified
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a Bundle to verify.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
@@ -127,13 +119,18 @@ class SiteMoveVerifier(Component):
             self.logger.info("LTA DB did not provide a Bundle to verify. Going on vacation.")
             return False
         # process the Bundle that we were given
+        await self._do_work_bundle(lta_rc, bundle)
+        # if we were successful at processing work, let the caller know
+        return True
+
+    @wtt.spanned()
+    async def _do_work_bundle(self, lta_rc: RestClient, bundle: BundleType) -> bool:
+        """Verify a claimed Bundle, returning True if it was verified."""
         try:
-            await self._verify_bundle(lta_rc, bundle)
+            return await self._verify_bundle(lta_rc, bundle)
         except Exception as e:
             await self._quarantine_bundle(lta_rc, bundle, f"{e}")
             raise e
-        # if we were successful at processing work, let the caller know
-        return True
 
     @wtt.spanned()
     async def _quarantine_bundle(self,
@@ -165,7 +162,7 @@ class SiteMoveVerifier(Component):
         bundle_path = join_smart([self.dest_root_path, bundle_name])
         # we'll compute the bundle's checksum
         self.logger.info(f"Computing SHA512 checksum for bundle: '{bundle_path}'")
-        checksum_sha512 = sha512sum(bundle_path)
+        checksum_sha512 = await self.run_blocking(sha512sum, bundle_path)
         self.logger.info(f"Bundle '{bundle_path}' has SHA512 checksum '{checksum_sha512}'")
         # now we'll compare the bundle's checksum
         if bundle["checksum"]["sha512"] != checksum_sha512:
@@ -187,16 +184,20 @@ class SiteMoveVerifier(Component):
             "status": self.output_status,
             "reason": "",
             "update_timestamp": now(),
-            "claimed": False,
+            "claimed": self.keep_claims,
         }
         self.logger.info(f"PATCH /Bundles/{bundle_id} - '{patch_body}'")
         await lta_rc.request('PATCH', f'/Bundles/{bundle_id}', patch_body)
         return True
 
     @wtt.spanned()
-    def _execute_myquota(self) -> Optional[str]:
+    async def _execute_myquota(self) -> Optional[str]:
         """Run the myquota command to determine disk usage at the site."""
-        completed_process = run(MYQUOTA_ARGS, stdout=PIPE, stderr=PIPE)
+        try:
+            completed_process = await self.run_blocking(run, MYQUOTA_ARGS, stdout=PIPE, stderr=PIPE)
+        except OSError as e:
+            self.logger.info(f"Unable to check quota: {e}")
+            return None
         # if our command failed
         if completed_process.returncode != 0:
             self.logger.info(f"Command to check quota failed: {completed_process.args}")
@@ -207,6 +208,11 @@ class SiteMoveVerifier(Component):
         # otherwise, we succeeded
         return completed_process.stdout.decode("utf-8")
 
+    async def _update_quota(self) -> None:
+        """Check disk usage at the site, for the status heartbeat to report."""
+        stdout = await self._execute_myquota()
+        self.quota = parse_myquota(stdout) if stdout else []
+
 
 def runner() -> None:
     """Configure a SiteMoveVerifier component from the environment and set it running."""
@@ -10,7 +10,7 @@ from rest_tools.client import RestClient
 from rest_tools.server import from_environment
 import wipac_telemetry.tracing_tools as wtt
 
-from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
+from .component import bulk_get_bundles, COMMON_CONFIG, Component, now, status_loop, work_loop
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
 
@@ -58,21 +58,15 @@ class TransferRequestFinisher(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be deleted
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a Bundle to check for TransferRequest being finished.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
@@ -104,8 +98,7 @@ class TransferRequestFinisher(Component):
         deleted_count = len(results)
         self.logger.info(f"Found {deleted_count} bundles for TransferRequest {request_uuid}")
         # check each constituent bundle for "deleted" or "finished" status
-        for bundle_uuid in results:
-            result = await lta_rc.request('GET', f'/Bundles/{bundle_uuid}')
+        for result in await bulk_get_bundles(lta_rc, results, ["status"]):
             self.logger.info(f"Bundle {result['uuid']} has status {result['status']}")
             if (result["status"] == "deleted") or (result["status"] == "finished"):
                 deleted_count = deleted_count - 1
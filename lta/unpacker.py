@@ -15,11 +15,11 @@ from rest_tools.client import RestClient
 from rest_tools.server import from_environment
 import wipac_telemetry.tracing_tools as wtt
 
-from .component import COMMON_CONFIG, Component, now, status_loop, work_loop
+from .component import COMMON_CONFIG, Component, LOCALITY_CONFIG, now, status_loop, work_loop
 from .crypto import lta_checksums
 from .log_format import StructuredFormatter
 from .lta_types import BundleType
-from .rest_server import boolify
+from .utils import boolify
 
 Logger = logging.Logger
 
@@ -34,6 +34,13 @@ EXPECTED_CONFIG.update({
     "WORK_RETRIES": "3",
     "WORK_TIMEOUT_SECONDS": "30",
 })
+EXPECTED_CONFIG.update(LOCALITY_CONFIG)
+
+def extract_bundle_archive(bundle_file_path: str, outbox_path: str) -> None:
+    """Extract every file of the ZIP archive at bundle_file_path into outbox_path."""
+    with ZipFile(bundle_file_path, mode="r", allowZip64=True) as bundle_zip:
+        bundle_zip.extractall(path=outbox_path)
+
 
 class Unpacker(Component):
     """
@@ -78,26 +85,20 @@ class Unpacker(Component):
     async def _do_work(self) -> None:
         """Perform a work cycle for this component."""
         self.logger.info("Starting work on Bundles.")
-        work_claimed = True
-        while work_claimed:
-            work_claimed = await self._do_work_claim()
-            work_claimed &= not self.run_once_and_die
+        await self.do_work_slots()
         self.logger.info("Ending work on Bundles.")
 
     @wtt.spanned()
     async def _do_work_claim(self) -> bool:
         """Claim a bundle and perform work on it."""
         # 1. Ask the LTA DB for the next Bundle to be unpacked
-        # configure a RestClient to talk to the LTA DB
-        lta_rc = RestClient(self.lta_rest_url,
-                            token=self.lta_rest_token,
-                            timeout=self.work_timeout_seconds,
-                            retries=self.work_retries)
+        # use our long-lived RestClient to talk to the LTA DB
+        lta_rc = self.lta_rc
         self.logger.info("Asking the LTA DB for a Bundle to unpack.")
         pop_body = {
             "claimant": f"{self.name}-{self.instance_uuid}"
         }
-        response = await lta_rc.request('POST', f'/Bundles/actions/pop?source={self.source_site}&dest={self.dest_site}&status={self.input_status}', pop_body)
+        response = await lta_rc.request('POST', f'/Bundles/actions/pop?source={self.source_site}&dest={self.dest_site}&status={self.input_status}{self.pop_locality_args()}', pop_body)
         self.logger.info(f"LTA DB responded with: {response}")
         bundle = response["bundle"]
         if not bundle:
@@ -119,11 +120,11 @@ class Unpacker(Component):
         bundle_file = os.path.basename(bundle["bundle_path"])
         bundle_uuid = bundle_file.split(".")[0]
         bundle_file_path = os.path.join(self.workbox_path, f"{bundle_uuid}.zip")
+        bundle_outbox_path = self._bundle_outbox_path(bundle_uuid)
         request_path = bundle["path"]
-        # 1. Unpack the archive from our workbox to our outbox
-        self.logger.info(f"Unpacking bundle {bundle_file_path} to {self.outbox_path}")
-        with ZipFile(bundle_file_path, mode="r", allowZip64=True) as bundle_zip:
-            bundle_zip.extractall(path=self.outbox_path)
+        # 1. Unpack the archive from our workbox to its own directory in our outbox
+        self.logger.info(f"Unpacking bundle {bundle_file_path} to {bundle_outbox_path}")
+        await self.run_blocking(extract_bundle_archive, bundle_file_path, bundle_outbox_path)
         # 2. Load the bundle's manifest metadata; structure example below:
         # metadata_dict = {
         #     "uuid": bundle_id,
@@ -152,32 +153,32 @@ class Unpacker(Component):
             # determine where the file lives on disk
             logical_name = bundle_file["logical_name"]
             unzip_path = os.path.relpath(logical_name, request_path)
-            file_path = os.path.join(self.outbox_path, unzip_path)
+            file_path = os.path.join(bundle_outbox_path, unzip_path)
             file_basename = os.path.basename(logical_name)
             self.logger.info(f"File {count_idx}/{count_max}: {file_basename} ({file_path})")
             # check that the size matches the expected size
             manifest_size = bundle_file["file_size"]
-            disk_size = os.path.getsize(file_path)
+            disk_size = await self.run_blocking(os.path.getsize, file_path)
             if disk_size != manifest_size:
                 self.logger.error(f"Error: File '{file_basename}' has size {disk_size} bytes on disk, but the bundle metadata supplied size is {manifest_size} bytes.")
                 raise ValueError(f"File:{file_basename} size Calculated:{disk_size} size Expected:{manifest_size}")
             # move the file to the appropriate location in the data warehouse
             dest_path = self._map_dest_path(bundle_file["logical_name"])
             self.logger.info(f"Moving {file_basename} from {file_path} to the Data Warehouse at {dest_path}")
-            shutil.move(file_path, dest_path)
+            await self.run_blocking(shutil.move, file_path, dest_path)
             # check that the checksum matches the expected checksum
             self.logger.info(f"Verifying checksum for {dest_path}")
             manifest_checksum = bundle_file["checksum"]["sha512"]
-            disk_checksum = lta_checksums(dest_path)
+            disk_checksum = await self.run_blocking(lta_checksums, dest_path)
             if disk_checksum["sha512"] != manifest_checksum:
                 self.logger.error(f"Error: File '{file_basename}' has sha512 checksum '{disk_checksum['sha512']}' but the bundle metadata supplied checksum '{manifest_checksum}'")
                 raise ValueError(f"File:{file_basename} sha512 Calculated:{disk_checksum['sha512']} sha512 Expected:{manifest_checksum}")
             # add the new location to the file catalog
             await self._add_location_to_file_catalog(bundle_file, dest_path)
         # 4. Clean up the metadata file
-        self._delete_manifest_metadata(bundle_uuid)
-        # 5. Clean up the outbox directory (remove unzip subdirectories, if necessary)
-        self._clean_outbox_directory()
+        await self._delete_manifest_metadata(bundle_uuid)
+        # 5. Clean up the bundle's directory in the outbox, if necessary
+        await self._clean_outbox_directory(bundle_uuid)
         # 6. Update the bundle record in the LTA DB
         await self._update_bundle_in_lta_db(lta_rc, bundle)
 
@@ -186,11 +187,8 @@ class Unpacker(Component):
                                             bundle_file: Dict[str, Any],
                                             dest_path: str) -> bool:
         """Update File Catalog record with new Data Warehouse location."""
-        # configure a RestClient to talk to the File Catalog
-        fc_rc = RestClient(self.file_catalog_rest_url,
-                           token=self.file_catalog_rest_token,
-                           timeout=self.work_timeout_seconds,
-                           retries=self.work_retries)
+        # use our long-lived RestClient to talk to the File Catalog
+        fc_rc = self.fc_rc
         # extract the right variables from the metadata structure
         fc_path = dest_path
         fc_uuid = bundle_file["uuid"]
@@ -209,42 +207,34 @@ class Unpacker(Component):
         # indicate that our file catalog updates were successful
         return True
 
+    def _bundle_outbox_path(self, bundle_uuid: str) -> str:
+        """Determine the directory in the outbox that a bundle is unpacked to."""
+        # each bundle has its own, so that work slots don't unpack over (or clean up) each other
+        return os.path.join(self.outbox_path, bundle_uuid)
+
     @wtt.spanned()
-    def _clean_outbox_directory(self) -> None:
+    async def _clean_outbox_directory(self, bundle_uuid: str) -> None:
+        """Remove the directory in the outbox that a bundle was unpacked to."""
+        bundle_outbox_path = self._bundle_outbox_path(bundle_uuid)
         # if we don't care about subdirectories in the work directory, bail
         if not self.clean_outbox:
-            self.logger.info(f"CLEAN_OUTBOX == False; will not remove entries from '{self.outbox_path}'")
+            self.logger.info(f"CLEAN_OUTBOX == False; will not remove '{bundle_outbox_path}'")
             return
-        # list all of the items in the work directory
-        self.logger.info(f"Scanning '{self.outbox_path}' for entries to remove")
-        with os.scandir(path=self.outbox_path) as it:
-            for entry in it:
-                self.logger.info(f"Processing '{entry.name}' at '{entry.path}'")
-                # if it's a file, remove it
-                if entry.is_file():
-                    self.logger.info(f"'{entry.name}' is a file, will os.remove '{entry.path}'")
-                    os.remove(entry.path)
-                    continue
-                # if it's a directory, remove the tree
-                if entry.is_dir():
-                    self.logger.info(f"'{entry.name}' is a directory, will shutil.rmtree '{entry.path}'")
-                    shutil.rmtree(path=entry.path, ignore_errors=True)
-                    continue
-                # if we can't figure it out, log an error
-                self.logger.error(f"'{entry.name}' was neither a file, nor a directory; nothing will be done")
+        self.logger.info(f"Removing '{bundle_outbox_path}'")
+        await self.run_blocking(shutil.rmtree, path=bundle_outbox_path, ignore_errors=True)
         # inform the caller that we finished
-        self.logger.info(f"Finished processing '{self.outbox_path}' for entries to remove")
+        self.logger.info(f"Finished removing '{bundle_outbox_path}'")
 
     @wtt.spanned()
-    def _delete_manifest_metadata(self, bundle_uuid: str) -> None:
-        metadata_file_path = os.path.join(self.outbox_path, f"{bundle_uuid}.metadata.json")
+    async def _delete_manifest_metadata(self, bundle_uuid: str) -> None:
+        metadata_file_path = os.path.join(self._bundle_outbox_path(bundle_uuid), f"{bundle_uuid}.metadata.json")
         self.logger.info(f"Deleting bundle metadata file: '{metadata_file_path}'")
         try:
-            os.remove(metadata_file_path)
+            await self.run_blocking(os.remove, metadata_file_path)
         except Exception:
-            metadata_file_path = os.path.join(self.outbox_path, f"{bundle_uuid}.metadata.ndjson")
+            metadata_file_path = os.path.join(self._bundle_outbox_path(bundle_uuid), f"{bundle_uuid}.metadata.ndjson")
             try:
-                os.remove(metadata_file_path)
+                await self.run_blocking(os.remove, metadata_file_path)
             except Exception as e:
                 raise e
         self.logger.info(f"Bundle metadata '{metadata_file_path}' was deleted.")
@@ -294,7 +284,7 @@ class Unpacker(Component):
     @wtt.spanned()
     def _read_manifest_metadata_v2(self, bundle_uuid: str) -> Optional[Dict[str, Any]]:
         """Read the bundle metadata from an older (version 2) manifest file."""
-        metadata_file_path = os.path.join(self.outbox_path, f"{bundle_uuid}.metadata.json")
+        metadata_file_path = os.path.join(self._bundle_outbox_path(bundle_uuid), f"{bundle_uuid}.metadata.json")
         try:
             with open(metadata_file_path) as metadata_file:
                 metadata_dict = json.load(metadata_file)
@@ -0,0 +1,9 @@
+# utils.py
+"""Lightweight utility functions shared by the LTA components and the LTA DB."""
+
+TRUE_SET = {'1', 't', 'true', 'y', 'yes'}
+
+
+def boolify(value: str) -> bool:
+    """Convert a string into a True or False value."""
+    return isinstance(value, str) and value.lower() in TRUE_SET
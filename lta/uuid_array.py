@@ -0,0 +1,76 @@
+# uuid_array.py
+"""Module that provides a compact binary wire format for lists of UUIDs."""
+
+import re
+from typing import Any, cast, Dict, List, Optional, Union
+
+from rest_tools.client import RestClient
+
+from .metrics import MeteredRestClient
+
+# media type of a request or response body that is a packed array of UUIDs
+UUID_ARRAY_CONTENT_TYPE = "application/x-lta-uuid-array"
+
+# each UUID is packed into its 16 raw bytes
+UUID_SIZE = 16
+
+# offsets of the dashes in a dashed UUID
+DASH_POSITIONS = [8, 13, 18, 23]
+HEX_DIGITS = re.compile("[0-9a-f]*")
+
+def _hex_digits(uuids: List[str], dashed: bool) -> Optional[str]:
+    """Return the hex digits of a list of canonical UUIDs run together, or None if any is not canonical."""
+    # checking and converting the whole list at once keeps this in C
+    size = 36 if dashed else 32
+    digits = "".join(uuids)
+    if len(digits) != size * len(uuids):
+        return None
+    if dashed:
+        if any(digits[i::size] != "-" * len(uuids) for i in DASH_POSITIONS):
+            return None
+        digits = digits.replace("-", "")
+        if len(digits) != 32 * len(uuids):
+            return None
+    if not HEX_DIGITS.fullmatch(digits):
+        return None
+    return digits
+
+def pack_uuids(uuids: List[str], dashed: bool) -> bytes:
+    """
+    Pack a list of UUID strings into a contiguous array of 16 byte UUIDs.
+
+    Packing is lossless only for UUIDs in canonical form, so every UUID
+    must be lowercase and either dashed ('e8f3...-...') or hex ('e8f3...'),
+    as chosen by the caller. Anything else raises ValueError, and the
+    caller should fall back to JSON.
+    """
+    digits = _hex_digits(uuids, dashed)
+    if digits is None:
+        for uuid in uuids:
+            if _hex_digits([uuid], dashed) is None:
+                raise ValueError(f"UUID '{uuid}' is not in canonical form")
+    return bytes.fromhex(cast(str, digits))
+
+def unpack_uuids(data: bytes, dashed: bool) -> List[str]:
+    """Unpack a contiguous array of 16 byte UUIDs into a list of UUID strings."""
+    if len(data) % UUID_SIZE:
+        raise ValueError(f"UUID array of {len(data)} bytes is not a multiple of {UUID_SIZE} bytes")
+    h = data.hex()
+    if dashed:
+        return [f"{h[i:i+8]}-{h[i+8:i+12]}-{h[i+12:i+16]}-{h[i+16:i+20]}-{h[i+20:i+32]}" for i in range(0, len(h), 32)]
+    return [h[i:i+32] for i in range(0, len(h), 32)]
+
+async def post_uuid_array(rc: RestClient,
+                          path: str,
+                          data: bytes,
+                          params: Optional[Dict[str, str]] = None) -> Union[bytes, Any]:
+    """
+    POST a packed UUID array to the LTA DB.
+
+    The packed body of the response is returned as bytes, and a JSON
+    response is returned decoded. The request is sent, timed, and logged
+    by MeteredRestClient, since RestClient.request() only speaks JSON.
+    """
+    if not isinstance(rc, MeteredRestClient):
+        raise TypeError(f"{type(rc)} cannot send a packed UUID array; use a MeteredRestClient")
+    return await rc.request_data("POST", path, data, UUID_ARRAY_CONTENT_TYPE, params)
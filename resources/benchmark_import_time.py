@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# benchmark_import_time.py
+"""Time the import of each LTA component, and fail if one loads what it shouldn't."""
+
+import statistics
+import subprocess
+import sys
+
+COMPONENTS = [
+    "bundler",
+    "deleter",
+    "desy_move_verifier",
+    "desy_stager",
+    "desy_verifier",
+    "fused_runner",
+    "gridftp_replicator",
+    "locator",
+    "nersc_mover",
+    "nersc_retriever",
+    "nersc_verifier",
+    "picker",
+    "rate_limiter",
+    "site_move_verifier",
+    "transfer_request_finisher",
+    "unpacker",
+]
+
+# modules that only the LTA DB (or a component doing work, or serving /metrics) needs
+FORBIDDEN = ["binpacking", "lta.rest_server", "motor", "prometheus_client", "pymongo"]
+
+BUDGET_SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else None
+REPEAT = 5
+
+
+def import_time(module):
+    """Import the module in a fresh interpreter; return the seconds it took and the modules it loaded."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    seconds = 0.0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        loaded.add(name.strip())
+        if name.strip() == module:
+            seconds = int(cumulative) / 1000000
+    return seconds, loaded
+
+
+failed = False
+for component in COMPONENTS:
+    module = f"lta.{component}"
+    timings = []
+    for i in range(REPEAT):
+        seconds, loaded = import_time(module)
+        timings.append(seconds)
+    seconds = statistics.median(timings)
+    problems = [name for name in FORBIDDEN if name in loaded]
+    if BUDGET_SECONDS and seconds > BUDGET_SECONDS:
+        problems.append(f"over budget of {BUDGET_SECONDS:.3f} s")
+    print(f"{module:<30} {seconds:8.3f} s  {', '.join(problems)}")
+    failed |= bool(problems)
+
+sys.exit(1 if failed else 0)
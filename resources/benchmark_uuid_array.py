@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# benchmark_uuid_array.py
+"""Compare JSON and packed UUID array bodies for the Metadata bulk routes."""
+
+import json
+import sys
+from timeit import timeit
+from uuid import uuid1, uuid4
+
+from lta.uuid_array import pack_uuids, unpack_uuids
+
+COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+REPEAT = 3
+
+# bulk_create sends File Catalog UUIDs (dashed) and gets back Metadata UUIDs (hex)
+files = [str(uuid4()) for i in range(COUNT)]
+metadata = [uuid1().hex for i in range(COUNT)]
+
+for name, uuids, dashed in [("files (dashed)", files, True), ("metadata (hex)", metadata, False)]:
+    json_body = json.dumps({"files": uuids}).encode("utf-8")
+    packed_body = pack_uuids(uuids, dashed)
+    json_encode = timeit(lambda: json.dumps({"files": uuids}).encode("utf-8"), number=REPEAT) / REPEAT
+    json_decode = timeit(lambda: json.loads(json_body)["files"], number=REPEAT) / REPEAT
+    packed_encode = timeit(lambda: pack_uuids(uuids, dashed), number=REPEAT) / REPEAT
+    packed_decode = timeit(lambda: unpack_uuids(packed_body, dashed), number=REPEAT) / REPEAT
+    print(f"{COUNT} {name}:")
+    print(f"  json:   {len(json_body):>12} bytes  encode {json_encode:8.3f} s  decode {json_decode:8.3f} s")
+    print(f"  packed: {len(packed_body):>12} bytes  encode {packed_encode:8.3f} s  decode {packed_decode:8.3f} s")
@@ -18,14 +18,19 @@ def config():
     return {
         "BUNDLER_OUTBOX_PATH": "/tmp/lta/testing/bundler/outbox",
         "BUNDLER_WORKBOX_PATH": "/tmp/lta/testing/bundler/workbox",
+        "CLAIM_LOCALITY": "NONE",
         "COMPONENT_NAME": "testing-bundler",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-rest-token",
         "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_STATUS": "specified",
+        "LOCALITY_TAG": "localhost",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "MYSQL_DB": "testing-db",
@@ -34,8 +39,16 @@ def config():
         "MYSQL_PORT": "23306",
         "MYSQL_USER": "jade-user",
         "OUTPUT_STATUS": "created",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -140,14 +153,19 @@ async def test_bundler_logs_configuration(mocker):
     bundler_config = {
         "BUNDLER_OUTBOX_PATH": "logme/tmp/lta/testing/bundler/outbox",
         "BUNDLER_WORKBOX_PATH": "logme/tmp/lta/testing/bundler/workbox",
+        "CLAIM_LOCALITY": "NONE",
         "COMPONENT_NAME": "logme-testing-bundler",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-rest-token",
         "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_STATUS": "specified",
+        "LOCALITY_TAG": "localhost",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "MYSQL_DB": "logme-testing-db",
@@ -156,8 +174,16 @@ async def test_bundler_logs_configuration(mocker):
         "MYSQL_PORT": "23306",
         "MYSQL_USER": "logme-jade-user",
         "OUTPUT_STATUS": "created",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -167,14 +193,19 @@ async def test_bundler_logs_configuration(mocker):
         call("bundler 'logme-testing-bundler' is configured:"),
         call('BUNDLER_OUTBOX_PATH = logme/tmp/lta/testing/bundler/outbox'),
         call('BUNDLER_WORKBOX_PATH = logme/tmp/lta/testing/bundler/workbox'),
+        call('CLAIM_LOCALITY = NONE'),
         call('COMPONENT_NAME = logme-testing-bundler'),
         call('DEST_SITE = NERSC'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('FILE_CATALOG_REST_TOKEN = fake-file-catalog-rest-token'),
         call('FILE_CATALOG_REST_URL = http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_STATUS = specified'),
+        call('LOCALITY_TAG = localhost'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/'),
         call('MYSQL_DB = logme-testing-db'),
@@ -183,8 +214,16 @@ async def test_bundler_logs_configuration(mocker):
         call('MYSQL_PORT = 23306'),
         call('MYSQL_USER = logme-jade-user'),
         call('OUTPUT_STATUS = created'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = WIPAC'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90'),
@@ -1,7 +1,10 @@
 # test_component.py
 """Unit tests for lta/picker.py."""
 
+import asyncio
 from asyncio import Future
+import os
+import threading
 from unittest.mock import call, MagicMock
 from uuid import uuid1
 
@@ -18,13 +21,32 @@ def config():
     """Supply a stock Picker component configuration."""
     return {
         "COMPONENT_NAME": "testing-picker",
+        "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
+        "FILE_CATALOG_PAGE_SIZE": "9000",
         "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-rest-token",
         "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
+        "INPUT_STATUS": "ethereal",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
+        "MAX_BUNDLE_SIZE": "107374182400",  # 100 GiB
+        "METADATA_BINARY_UUIDS": "False",
+        "OUTPUT_STATUS": "specified",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
+        "RUN_ONCE_AND_DIE": "False",
+        "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30"
@@ -272,14 +294,25 @@ async def xtest_picker_logs_configuration(mocker):
     """Test to make sure the Picker logs its configuration."""
     logger_mock = mocker.MagicMock()
     picker_config = {
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "FILE_CATALOG_REST_TOKEN": "logme-fake-file-catalog-rest-token",
         "FILE_CATALOG_REST_URL": "logme-http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "PICKER_NAME": "logme-testing-picker",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90"
@@ -287,14 +320,25 @@ async def xtest_picker_logs_configuration(mocker):
     Picker(picker_config, logger_mock)
     EXPECTED_LOGGER_CALLS = [
         call("Picker 'logme-testing-picker' is configured:"),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('FILE_CATALOG_REST_TOKEN = logme-fake-file-catalog-rest-token'),
         call('FILE_CATALOG_REST_URL = logme-http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/'),
         call('PICKER_NAME = logme-testing-picker'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90')
@@ -610,3 +654,174 @@ async def xtest_picker_do_work_catalog_file_fc_yes_result_only_one(config, mocke
             "catalog": catalog_record
         }
     ]
+
+
+@pytest.mark.asyncio
+async def test_component_work_slots(config, mocker):
+    """Test that _do_work keeps WORK_CONCURRENCY claims in flight, and reports each slot."""
+    logger_mock = mocker.MagicMock()
+    config["WORK_CONCURRENCY"] = "3"
+    p = Picker(config, logger_mock)
+    in_flight = []
+    most_in_flight = 0
+    work = list(range(7))
+
+    async def do_work_claim():
+        nonlocal most_in_flight
+        if not work:
+            return False
+        in_flight.append(work.pop())
+        most_in_flight = max(most_in_flight, len(in_flight))
+        assert sum(slot["state"] == "working" for slot in p.work_slots) == len(in_flight)
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        return True
+
+    p._do_work_claim = do_work_claim
+    await p._do_work()
+    assert most_in_flight == 3
+    assert [slot["slot"] for slot in p.work_slots] == [0, 1, 2]
+    assert sum(slot["claims"] for slot in p.work_slots) == 7
+    assert all(slot["state"] == "idle" for slot in p.work_slots)
+    assert p._do_status() == {}
+    # WORK_CONCURRENCY must allow at least one slot
+    config["WORK_CONCURRENCY"] = "0"
+    with pytest.raises(ValueError):
+        Picker(config, logger_mock)
+
+
+@pytest.mark.asyncio
+async def test_component_reuses_rest_clients(config, mocker):
+    """Test that every work cycle shares the same pooled RestClients."""
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.return_value = {
+        "transfer_request": None
+    }
+    config["HTTP_POOL_SIZE"] = "7"
+    p = Picker(config, logger_mock)
+    await p._do_work_claim()
+    lta_rc = p.lta_rc
+    await p._do_work_claim()
+    assert p.lta_rc is lta_rc
+    assert p.fc_rc is p.fc_rc
+    assert p.fc_rc is not lta_rc
+    assert p.heartbeat_rc is not lta_rc
+    assert lta_rc.address == config["LTA_REST_URL"]
+    assert lta_rc.timeout == 30
+    assert lta_rc.session.executor._max_workers == 7
+    assert lta_rc.session.get_adapter(config["LTA_REST_URL"])._pool_maxsize == 7
+    assert p.heartbeat_rc.session.executor._max_workers == 1
+
+
+@pytest.mark.asyncio
+async def test_component_run_blocking(config, mocker):
+    """Test that run_blocking runs blocking calls on the component's executor."""
+    logger_mock = mocker.MagicMock()
+    config["EXECUTOR_WORKERS"] = "3"
+    p = Picker(config, logger_mock)
+    loop_thread = threading.get_ident()
+    result = await p.run_blocking(lambda a, b=0: (threading.get_ident(), a + b), 1, b=2)
+    assert result[0] != loop_thread
+    assert result[1] == 3
+    assert p.executor is p.executor
+    assert p.executor._max_workers == 3
+
+
+@pytest.mark.asyncio
+async def test_component_next_work_sleep(config, mocker):
+    """Test that the work loop polls right away with work, and backs off without it."""
+    logger_mock = mocker.MagicMock()
+    config["WORK_BACKOFF_JITTER"] = "0"
+    config["WORK_SLEEP_DURATION_SECONDS"] = "10"
+    p = Picker(config, logger_mock)
+    dwc_mock = mocker.patch("lta.picker.Picker._do_work_claim", new_callable=AsyncMock)
+    dwc_mock.return_value = False
+    await p.run()
+    assert p.last_work_claims == 0
+    assert [p.next_work_sleep() for i in range(6)] == [1, 2, 4, 8, 10, 10]
+    assert p.work_idle_cycles == 4
+    dwc_mock.side_effect = [True, True, False]
+    await p.run()
+    assert p.last_work_claims == 2
+    assert p.next_work_sleep() == 0
+    assert p.work_idle_cycles == 0
+    dwc_mock.side_effect = None
+    await p.run()
+    assert p.next_work_sleep() == 1
+
+
+def test_component_next_work_sleep_jitter(config, mocker):
+    """Test that jitter only ever shortens the backoff."""
+    logger_mock = mocker.MagicMock()
+    config["WORK_BACKOFF_MIN_SECONDS"] = "8"
+    p = Picker(config, logger_mock)
+    sleeps = [p.next_work_sleep() for i in range(100)]
+    assert 4 <= sleeps[0] <= 8
+    assert all(30 <= sleep <= 60 for sleep in sleeps[3:])
+    assert len(set(sleeps)) > 1
+    config["WORK_BACKOFF_JITTER"] = "1.5"
+    with pytest.raises(ValueError):
+        Picker(config, logger_mock)
+
+
+@pytest.mark.asyncio
+async def test_component_metrics(config, mocker):
+    """Test that a component keeps metrics, serves them, and sends a summary with its heartbeat."""
+    logger_mock = mocker.MagicMock()
+    shs_mock = mocker.patch("prometheus_client.start_http_server")
+    assert Picker(config, logger_mock).metrics.registry is None
+    config["PROMETHEUS_METRICS_PORT"] = "9090"
+    p = Picker(config, logger_mock)
+    shs_mock.assert_called_with(9090, registry=p.metrics.registry)
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.return_value = {
+        "transfer_request": None
+    }
+    await p.run()
+    assert p.metrics.counts["empty_pops"] == 1
+    assert p.metrics.phases["work_cycle"]["count"] == 1
+    assert p.metrics.phases["work_claim"]["count"] == 1
+    await patch_status_heartbeat(p)
+    status_body = lta_rc_mock.call_args[0][2]
+    assert status_body["testing-picker"]["metrics"]["counts"]["empty_pops"] == 1
+    assert "POST /TransferRequests/actions/pop" in status_body["testing-picker"]["metrics"]["rest"]
+
+
+@pytest.mark.asyncio
+async def test_component_profiling(config, mocker, tmp_path):
+    """Test that a component profiles its work cycles, and names the profiles after its work."""
+    logger_mock = mocker.MagicMock()
+    config["PROFILE_DIR"] = str(tmp_path)
+    config["PROFILE_ENABLED"] = "True"
+    p = Picker(config, logger_mock)
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.side_effect = [
+        {"transfer_request": {"uuid": "a8758e8c9b5c11eabf5a6c2b59a4bfbc"}},
+        {"transfer_request": None},
+    ]
+    mocker.patch("lta.picker.Picker._do_work_transfer_request", new_callable=AsyncMock)
+    await p.run()
+    paths = os.listdir(tmp_path)
+    assert len(paths) == 1
+    assert paths[0].endswith("-a8758e8c9b5c11eabf5a6c2b59a4bfbc.prof")
+    p.profiler.toggle()
+    lta_rc_mock.side_effect = None
+    await patch_status_heartbeat(p)
+    assert lta_rc_mock.call_args[0][2]["testing-picker"]["profiling"] is False
+
+
+def test_component_profile_mode_invalid(config, mocker):
+    """Test that an unknown PROFILE_MODE is rejected."""
+    logger_mock = mocker.MagicMock()
+    config["PROFILE_MODE"] = "PRINTS"
+    with pytest.raises(ValueError):
+        Picker(config, logger_mock)
+
+
+def test_component_executor_type_invalid(config, mocker):
+    """Test that an unknown EXECUTOR_TYPE is rejected."""
+    logger_mock = mocker.MagicMock()
+    config["EXECUTOR_TYPE"] = "FIBER"
+    with pytest.raises(ValueError):
+        Picker(config, logger_mock)
@@ -13,18 +13,31 @@ from .test_util import AsyncMock
 def config():
     """Supply a stock Deleter component configuration."""
     return {
+        "CLAIM_LOCALITY": "NONE",
         "COMPONENT_NAME": "testing-deleter",
         "DEST_SITE": "NERSC",
         "DISK_BASE_PATH": "/path/to/rucio/rse/root",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_STATUS": "detached",
+        "LOCALITY_TAG": "localhost",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "OUTPUT_STATUS": "source-deleted",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -62,18 +75,31 @@ async def test_deleter_logs_configuration(mocker):
     """Test to make sure the Deleter logs its configuration."""
     logger_mock = mocker.MagicMock()
     deleter_config = {
+        "CLAIM_LOCALITY": "NONE",
         "COMPONENT_NAME": "logme-testing-deleter",
         "DEST_SITE": "NERSC",
         "DISK_BASE_PATH": "/path/to/rucio/rse/root",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_STATUS": "detached",
+        "LOCALITY_TAG": "localhost",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://zjwdm5ggeEgS1tZDZy9l1DOZU53uiSO4Urmyb8xL0.com/",
         "OUTPUT_STATUS": "source-deleted",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -81,18 +107,31 @@ async def test_deleter_logs_configuration(mocker):
     Deleter(deleter_config, logger_mock)
     EXPECTED_LOGGER_CALLS = [
         call("deleter 'logme-testing-deleter' is configured:"),
+        call('CLAIM_LOCALITY = NONE'),
         call('COMPONENT_NAME = logme-testing-deleter'),
         call('DEST_SITE = NERSC'),
         call('DISK_BASE_PATH = /path/to/rucio/rse/root'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_STATUS = detached'),
+        call('LOCALITY_TAG = localhost'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://zjwdm5ggeEgS1tZDZy9l1DOZU53uiSO4Urmyb8xL0.com/'),
         call('OUTPUT_STATUS = source-deleted'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = WIPAC'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90')
@@ -185,6 +224,27 @@ async def test_deleter_do_work_claim_no_result(config, mocker):
     lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=detached', {'claimant': f'{p.name}-{p.instance_uuid}'})
     db_mock.assert_not_called()
 
+@pytest.mark.asyncio
+async def test_deleter_do_work_claim_locality(config, mocker):
+    """Test that _do_work_claim asks for Bundles stored on this node when configured to."""
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.return_value = {
+        "bundle": None
+    }
+    config["CLAIM_LOCALITY"] = "prefer"
+    config["LOCALITY_TAG"] = "node 23"
+    p = Deleter(config, logger_mock)
+    await p._do_work_claim()
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=detached&locality=node%2023', {'claimant': f'{p.name}-{p.instance_uuid}'})
+    config["CLAIM_LOCALITY"] = "REQUIRE"
+    p = Deleter(config, logger_mock)
+    await p._do_work_claim()
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=detached&locality=node%2023&require_locality=true', {'claimant': f'{p.name}-{p.instance_uuid}'})
+    config["CLAIM_LOCALITY"] = "SOMETIMES"
+    with pytest.raises(ValueError):
+        Deleter(config, logger_mock)
+
 @pytest.mark.asyncio
 async def test_deleter_do_work_claim_yes_result(config, mocker):
     """Test that _do_work_claim processes the Bundle that it gets from the LTA DB."""
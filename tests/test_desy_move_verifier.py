@@ -15,18 +15,29 @@ def config():
     return {
         "COMPONENT_NAME": "testing-desy_move_verifier",
         "DEST_SITE": "DESY",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "GRIDFTP_DEST_URL": "gsiftp://icecube.wisc.edu:7654/path/to/nowhere",
         "GRIDFTP_TIMEOUT": "1200",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_STATUS": "transferring",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "OUTPUT_STATUS": "taping",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
         "TRANSFER_CONFIG_PATH": "examples/rucio.json",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -67,17 +78,28 @@ async def test_desy_move_verifier_logs_configuration(mocker):
     desy_move_verifier_config = {
         "COMPONENT_NAME": "logme-testing-desy_move_verifier",
         "DEST_SITE": "DESY",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "GRIDFTP_DEST_URL": "gsiftp://icecube.wisc.edu:7654/path/to/nowhere",
         "GRIDFTP_TIMEOUT": "1200",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_STATUS": "transferring",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://zjwdm5ggeEgS1tZDZy9l1DOZU53uiSO4Urmyb8xL0.com/",
         "OUTPUT_STATUS": "taping",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -88,17 +110,28 @@ async def test_desy_move_verifier_logs_configuration(mocker):
         call("desy_move_verifier 'logme-testing-desy_move_verifier' is configured:"),
         call('COMPONENT_NAME = logme-testing-desy_move_verifier'),
         call('DEST_SITE = DESY'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('GRIDFTP_DEST_URL = gsiftp://icecube.wisc.edu:7654/path/to/nowhere'),
         call('GRIDFTP_TIMEOUT = 1200'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_STATUS = transferring'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://zjwdm5ggeEgS1tZDZy9l1DOZU53uiSO4Urmyb8xL0.com/'),
         call('OUTPUT_STATUS = taping'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = WIPAC'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90'),
@@ -18,18 +18,30 @@ def config():
         "DEST_SITE": "DESY",
         "DESY_CRED_PATH": "/path/to/my/gridftp/cert",
         "DESY_GSIFTP": "gsiftp://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com:2811/path/to/files/at/desy",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-token",
         "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_STATUS": "verifying",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
+        "METADATA_BINARY_UUIDS": "False",
         "OUTPUT_STATUS": "completed",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
         "TAPE_BASE_PATH": "/path/to/hpss",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -70,18 +82,30 @@ async def test_desy_verifier_logs_configuration(mocker):
         "DEST_SITE": "DESY",
         "DESY_CRED_PATH": "/path/to/my/gridftp/cert",
         "DESY_GSIFTP": "gsiftp://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com:2811/path/to/files/at/desy",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "FILE_CATALOG_REST_TOKEN": "logme-fake-file-catalog-token",
         "FILE_CATALOG_REST_URL": "logme-http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_STATUS": "verifying",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
+        "METADATA_BINARY_UUIDS": "False",
         "OUTPUT_STATUS": "completed",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
         "TAPE_BASE_PATH": "/logme/path/to/hpss",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -94,18 +118,30 @@ async def test_desy_verifier_logs_configuration(mocker):
         call('DEST_SITE = DESY'),
         call('DESY_CRED_PATH = /path/to/my/gridftp/cert'),
         call('DESY_GSIFTP = gsiftp://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com:2811/path/to/files/at/desy'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('FILE_CATALOG_REST_TOKEN = logme-fake-file-catalog-token'),
         call('FILE_CATALOG_REST_URL = logme-http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_STATUS = verifying'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/'),
+        call('METADATA_BINARY_UUIDS = False'),
         call('OUTPUT_STATUS = completed'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = WIPAC'),
         call('TAPE_BASE_PATH = /logme/path/to/hpss'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90'),
@@ -0,0 +1,219 @@
+# test_fused_runner.py
+"""Unit tests for lta/fused_runner.py."""
+
+from unittest.mock import call
+
+import pytest  # type: ignore
+
+from lta.fused_runner import FusedRunner, main, stage_config
+from .test_util import AsyncMock
+
+@pytest.fixture
+def config():
+    """Supply a stock FusedRunner component configuration."""
+    return {
+        "COMPONENT_NAME": "testing-fused-runner",
+        "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
+        "FUSED_STAGES": "site_move_verifier,nersc_mover,nersc_verifier",
+        "HEARTBEAT_PATCH_RETRIES": "3",
+        "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
+        "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
+        "INPUT_STATUS": "transferring",
+        "LTA_REST_TOKEN": "fake-lta-rest-token",
+        "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
+        "OUTPUT_STATUS": "completed",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
+        "RUN_ONCE_AND_DIE": "False",
+        "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
+        "WORK_RETRIES": "3",
+        "WORK_SLEEP_DURATION_SECONDS": "60",
+        "WORK_TIMEOUT_SECONDS": "30",
+    }
+
+@pytest.fixture
+def environ(config):
+    """Supply an environment that configures the stages of the stock FusedRunner."""
+    environ = config.copy()
+    environ.update({
+        "DEST_ROOT_PATH": "/path/to/rse",
+        "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-rest-token",
+        "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
+        "MAX_COUNT": "2",
+        "NERSC_MOVER_INPUT_STATUS": "taping",
+        "NERSC_MOVER_OUTPUT_STATUS": "verifying",
+        "NERSC_VERIFIER_INPUT_STATUS": "verifying",
+        "PROMETHEUS_METRICS_PORT": "9090",
+        "RSE_BASE_PATH": "/path/to/rse",
+        "SITE_MOVE_VERIFIER_COMPONENT_NAME": "testing-smv",
+        "SITE_MOVE_VERIFIER_OUTPUT_STATUS": "taping",
+        "TAPE_BASE_PATH": "/path/to/hpss",
+        "USE_FULL_BUNDLE_PATH": "FALSE",
+    })
+    return environ
+
+def test_stage_config(config, environ):
+    """Test that stage configuration prefers the stage prefix, then the shared name, then the default, if any."""
+    smv_config = stage_config(config, "site_move_verifier", environ)
+    assert smv_config["COMPONENT_NAME"] == "testing-smv"
+    assert smv_config["INPUT_STATUS"] == "transferring"
+    assert smv_config["OUTPUT_STATUS"] == "taping"
+    assert smv_config["PROMETHEUS_METRICS_PORT"] == "0"
+    nm_config = stage_config(config, "nersc_mover", environ)
+    assert nm_config["COMPONENT_NAME"] == "testing-fused-runner-nersc_mover"
+    assert nm_config["INPUT_STATUS"] == "taping"
+    assert nm_config["MAX_COUNT"] == "2"
+    assert nm_config["WORK_RETRIES"] == "3"
+    del environ["MAX_COUNT"]
+    with pytest.raises(ValueError) as e:
+        stage_config(config, "nersc_mover", environ)
+    assert "'NERSC_MOVER_MAX_COUNT' or 'MAX_COUNT'" in str(e.value)
+
+def test_constructor_config(config, environ, mocker):
+    """Test that a FusedRunner builds its stages, and keeps the claims it hands on."""
+    logger_mock = mocker.MagicMock()
+    p = FusedRunner(config, logger_mock, environ)
+    assert p.stage_names == ["site_move_verifier", "nersc_mover", "nersc_verifier"]
+    assert [stage.type for stage in p.stages] == p.stage_names
+    assert [stage.keep_claims for stage in p.stages] == [True, True, False]
+    assert p.stages[0].name == "testing-smv"
+    assert p._do_status() == {"stages": ["testing-smv", "testing-fused-runner-nersc_mover", "testing-fused-runner-nersc_verifier"]}
+
+def test_constructor_config_mismatch(config, environ, mocker):
+    """Test that a FusedRunner refuses stages whose statuses don't line up."""
+    logger_mock = mocker.MagicMock()
+    environ["NERSC_MOVER_INPUT_STATUS"] = "tapping"
+    with pytest.raises(ValueError):
+        FusedRunner(config, logger_mock, environ)
+    environ["NERSC_MOVER_INPUT_STATUS"] = "taping"
+    config["OUTPUT_STATUS"] = "done"
+    with pytest.raises(ValueError):
+        FusedRunner(config, logger_mock, environ)
+    config["OUTPUT_STATUS"] = "completed"
+    config["FUSED_STAGES"] = "site_move_verifier,bundler"
+    with pytest.raises(ValueError):
+        FusedRunner(config, logger_mock, environ)
+
+@pytest.mark.asyncio
+async def test_script_main(config, mocker, monkeypatch):
+    """Verify FusedRunner component behavior when run as a script."""
+    for key in config.keys():
+        monkeypatch.setenv(key, config[key])
+    mock_event_loop = mocker.patch("asyncio.get_event_loop")
+    mocker.patch("lta.fused_runner.FusedRunner")
+    mock_root_logger = mocker.patch("logging.getLogger")
+    mock_status_loop = mocker.patch("lta.fused_runner.status_loop")
+    mock_work_loop = mocker.patch("lta.fused_runner.work_loop")
+    main()
+    mock_event_loop.assert_called()
+    mock_root_logger.assert_called()
+    mock_status_loop.assert_called()
+    mock_work_loop.assert_called()
+
+@pytest.mark.asyncio
+async def test_fused_runner_do_work_claim_no_result(config, environ, mocker):
+    """Test that _do_work_claim does not work when the LTA DB has no work."""
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.return_value = {
+        "bundle": None,
+    }
+    p = FusedRunner(config, logger_mock, environ)
+    assert not await p._do_work_claim()
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=transferring', mocker.ANY)
+
+@pytest.mark.asyncio
+async def test_fused_runner_hands_off_bundle(config, environ, mocker):
+    """Test that a claimed Bundle is handed from stage to stage without popping it again."""
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.return_value = {
+        "bundle": {
+            "uuid": "8286d3ba-fb1b-4923-876d-935bdf7fc99e",
+            "status": "transferring",
+        },
+    }
+    p = FusedRunner(config, logger_mock, environ)
+    seen = []
+
+    async def finish(stage):
+        async def do_work_bundle(lta_rc, bundle):
+            seen.append((stage.type, bundle["status"]))
+            return True
+        return do_work_bundle
+
+    for stage in p.stages:
+        stage._do_work_bundle = await finish(stage)
+        stage._ready_for_work = AsyncMock(return_value=True)
+    assert await p._do_work_claim()
+    assert seen == [("site_move_verifier", "transferring"), ("nersc_mover", "taping"), ("nersc_verifier", "verifying")]
+    # just the one pop; the stages do their own PATCHes
+    assert lta_rc_mock.call_count == 1
+    assert p.metrics.phases["stage:nersc_mover"]["count"] == 1
+
+@pytest.mark.asyncio
+async def test_fused_runner_stops_when_a_stage_does_not_finish(config, environ, mocker):
+    """Test that a Bundle goes no further than a stage that did not finish it."""
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.return_value = {
+        "bundle": {
+            "uuid": "8286d3ba-fb1b-4923-876d-935bdf7fc99e",
+            "status": "transferring",
+        },
+    }
+    p = FusedRunner(config, logger_mock, environ)
+    for stage in p.stages:
+        stage._ready_for_work = AsyncMock(return_value=True)
+    p.stages[0]._do_work_bundle = AsyncMock(return_value=False)
+    p.stages[1]._do_work_bundle = AsyncMock(return_value=True)
+    assert await p._do_work_claim()
+    p.stages[0]._do_work_bundle.assert_called()
+    p.stages[1]._do_work_bundle.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_fused_runner_releases_bundle_when_a_stage_is_not_ready(config, environ, mocker):
+    """Test that a Bundle is unclaimed for later, when the next stage is not able to work."""
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.return_value = {
+        "bundle": {
+            "uuid": "8286d3ba-fb1b-4923-876d-935bdf7fc99e",
+            "status": "transferring",
+        },
+    }
+    p = FusedRunner(config, logger_mock, environ)
+    p.stages[0]._do_work_bundle = AsyncMock(return_value=True)
+    p.stages[1]._ready_for_work = AsyncMock(return_value=False)
+    p.stages[1]._do_work_bundle = AsyncMock(return_value=True)
+    assert await p._do_work_claim()
+    p.stages[1]._do_work_bundle.assert_not_called()
+    assert lta_rc_mock.call_args == call("PATCH", "/Bundles/8286d3ba-fb1b-4923-876d-935bdf7fc99e", {
+        "update_timestamp": mocker.ANY,
+        "claimed": False,
+    })
+
+@pytest.mark.asyncio
+async def test_fused_runner_stage_keeps_claim(config, environ, mocker):
+    """Test that a stage that hands on its Bundle leaves it claimed in the LTA DB."""
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    mocker.patch("lta.site_move_verifier.sha512sum", return_value="abc123")
+    p = FusedRunner(config, logger_mock, environ)
+    bundle = {
+        "uuid": "8286d3ba-fb1b-4923-876d-935bdf7fc99e",
+        "bundle_path": "/path/to/rse/8286d3ba-fb1b-4923-876d-935bdf7fc99e.zip",
+        "checksum": {"sha512": "abc123"},
+    }
+    assert await p.stages[0]._do_work_bundle(p.stages[0].lta_rc, bundle)
+    assert lta_rc_mock.call_args[0][2]["status"] == "taping"
+    assert lta_rc_mock.call_args[0][2]["claimed"] is True
@@ -0,0 +1,60 @@
+# test_json_stream.py
+"""Unit tests for lta/json_stream.py."""
+
+import json
+
+import pytest  # type: ignore
+
+from lta.json_stream import JsonArrayStream, JsonStreamError
+
+def parse_in_chunks(body: bytes, field: str, size: int):
+    """Feed the body to a JsonArrayStream in chunks of the given size."""
+    stream = JsonArrayStream(field)
+    items = []
+    for i in range(0, len(body), size):
+        items.extend(stream.feed(body[i:i+size]))
+    items.extend(stream.finish())
+    return stream, items
+
+def test_json_array_stream_any_chunk_size():
+    """Test that the elements come out the same no matter how the body is split."""
+    doc = {
+        "bundle_uuid": "291afc8d-2a04-4d85-8669-dc8e2c2ab406",
+        "files": ["7b5c1f76-e568-4ae7-94d2-5a31d1d2b081", 12345, {"nested": [1, 2, {"x": "]"}]}, "café", None, -1.5e3],
+        "after": {"a": [1, 2]},
+    }
+    body = json.dumps(doc, indent=2).encode("utf-8")
+    for size in [1, 2, 3, 7, 64, len(body)]:
+        stream, items = parse_in_chunks(body, "files", size)
+        assert items == doc["files"]
+        assert stream.found
+        assert stream.fields == {"bundle_uuid": doc["bundle_uuid"], "after": doc["after"]}
+        assert stream.fields_before == ["bundle_uuid"]
+
+def test_json_array_stream_elements_arrive_early():
+    """Test that elements are returned before the body is complete."""
+    stream = JsonArrayStream("metadata")
+    assert stream.feed(b'{"metadata": ["a", "b", "c') == ["a", "b"]
+    assert stream.feed(b'", 10') == ["c"]
+    assert stream.feed(b'0]}') == [100]
+    assert stream.finish() == []
+
+def test_json_array_stream_missing_and_empty():
+    """Test bodies without elements to stream."""
+    stream, items = parse_in_chunks(b'{}', "files", 1)
+    assert items == []
+    assert not stream.found
+    stream, items = parse_in_chunks(b'{"files": []}', "files", 1)
+    assert items == []
+    assert stream.found
+    stream, items = parse_in_chunks(b'{"files": {}}', "files", 1)
+    assert items == []
+    assert not stream.found
+    assert stream.fields == {"files": {}}
+
+def test_json_array_stream_invalid():
+    """Test that invalid JSON bodies are rejected."""
+    for body in [b'', b'[]', b'{"files": [1, 2', b'{"files": [1 2]}', b'{"files": [1,]}', b'{1: 2}',
+                 b'{"files": [1]} {}', b'{"files": [1.]}', b'{"files" [1]}', b'{"files": [1]', b'{"a": 1,}']:
+        with pytest.raises(JsonStreamError):
+            parse_in_chunks(body, "files", 3)
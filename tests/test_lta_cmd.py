@@ -1,9 +1,40 @@
 # test_lta_cmd.py
 """Unit tests for lta/lta_cmd.py."""
 
+from argparse import Namespace
+
 import pytest  # type: ignore
 
-from lta.lta_cmd import normalize_path
+from lta.lta_cmd import bundle_requeue, normalize_path
+from .test_util import AsyncMock
+
+
+@pytest.mark.asyncio
+async def test_bundle_requeue(mocker) -> None:
+    """Test that bundle requeue releases the Bundles and resets their retries."""
+    lta_rc_mock = mocker.MagicMock()
+    lta_rc_mock.request = AsyncMock(return_value={"matched": 2, "count": 2})
+    args = Namespace(di={"lta_rc": lta_rc_mock},
+                     status="quarantined",
+                     reason="^HPSS timeout",
+                     new_status="taping",
+                     keep_claim=False,
+                     keep_priority=False,
+                     json=False)
+    assert await bundle_requeue(args) == 0
+    lta_rc_mock.request.assert_called_with("POST", "/Bundles/actions/update_many", {
+        "filter": {"status": "quarantined", "reason": "^HPSS timeout"},
+        "update": {
+            "status": "taping",
+            "reason": "",
+            "update_timestamp": mocker.ANY,
+            "retry_count": 0,
+            "retry_status": None,
+            "not_before": None,
+            "claimed": False,
+            "work_priority_timestamp": mocker.ANY,
+        },
+    })
 
 
 def test_normalize_path() -> None:
@@ -0,0 +1,206 @@
+# test_metrics.py
+"""Unit tests for lta/metrics.py."""
+
+import asyncio
+
+import pytest  # type: ignore
+import requests  # type: ignore
+
+from lta.metrics import ComponentMetrics, MAX_CLAIMED_SIZES, MeteredRestClient, route_template
+from lta.picker import Picker
+from .test_util import AsyncMock
+
+BUNDLE_UUID = "8286d3ba-fb1b-4923-876d-935bdf7fc99e"
+OTHER_UUID = "c6d2d0f4-6a2b-4bd1-a4b1-0d1b8c4f2f3e"
+TR_UUID = "a8758e8c9b5c11eabf5a6c2b59a4bfbc"
+
+def test_route_template():
+    """Test that request paths are reduced to their routes."""
+    assert route_template("/Bundles/actions/pop?source=WIPAC&dest=NERSC") == "/Bundles/actions/pop"
+    assert route_template(f"/Bundles/{BUNDLE_UUID}") == "/Bundles/{uuid}"
+    assert route_template("/Metadata/actions/bulk_delete") == "/Metadata/actions/bulk_delete"
+    assert route_template(f"/TransferRequests/{TR_UUID}/x") == "/TransferRequests/{uuid}/x"
+    assert route_template(f"/api/files/{BUNDLE_UUID}") == "/api/files/{uuid}"
+
+def test_observe_lta_request():
+    """Test that pops and PATCHes to the LTA DB are counted as work."""
+    m = ComponentMetrics("deleter", export=True)
+    pop = "/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=deletable"
+    m.observe_lta_request("POST", pop, {}, {"bundle": None}, "deleted")
+    m.observe_lta_request("POST", pop, {}, {"bundle": {"uuid": BUNDLE_UUID, "size": 12345}}, "deleted")
+    m.observe_lta_request("POST", pop, {}, {"bundle": {"uuid": OTHER_UUID, "size": 100}}, "deleted")
+    m.observe_lta_request("PATCH", f"/Bundles/{BUNDLE_UUID}", {"claimed": False}, {}, "deleted")
+    m.observe_lta_request("PATCH", f"/Bundles/{BUNDLE_UUID}", {"status": "deleted"}, {}, "deleted")
+    m.observe_lta_request("PATCH", f"/Bundles/{OTHER_UUID}", {"status": "quarantined"}, {}, "deleted")
+    assert m.counts == {
+        "claimed": 2,
+        "succeeded": 1,
+        "quarantined": 1,
+        "empty_pops": 1,
+        "bytes_processed": 12345,
+    }
+    assert m.registry.get_sample_value("lta_claimed_total", {"component": "deleter"}) == 2
+    assert m.registry.get_sample_value("lta_bytes_processed_total", {"component": "deleter"}) == 12345
+    assert not m._claimed_sizes
+
+@pytest.mark.asyncio
+async def test_observe_lta_request_transfer_requests(mocker):
+    """Test that a Picker counts the TransferRequests it turns into Bundles as work."""
+    config = {
+        "COMPONENT_NAME": "testing-picker",
+        "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
+        "FILE_CATALOG_PAGE_SIZE": "1000",
+        "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-rest-token",
+        "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
+        "HEARTBEAT_PATCH_RETRIES": "3",
+        "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
+        "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
+        "INPUT_STATUS": "ethereal",
+        "LTA_REST_TOKEN": "fake-lta-rest-token",
+        "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
+        "MAX_BUNDLE_SIZE": "107374182400",  # 100 GiB
+        "METADATA_BINARY_UUIDS": "False",
+        "OUTPUT_STATUS": "specified",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
+        "RUN_ONCE_AND_DIE": "False",
+        "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
+        "WORK_RETRIES": "3",
+        "WORK_SLEEP_DURATION_SECONDS": "60",
+        "WORK_TIMEOUT_SECONDS": "30",
+    }
+    file_sizes = {BUNDLE_UUID: 12345, OTHER_UUID: 100}
+    pops = [
+        {"transfer_request": {"uuid": TR_UUID, "source": "WIPAC", "dest": "NERSC", "path": "/data/exp/IceCube/2013"}},
+        {"transfer_request": None},
+    ]
+
+    def request(method, path, body=None):
+        if path.startswith("/TransferRequests/actions/pop"):
+            return pops.pop(0)
+        if path.startswith("/api/files?"):
+            return {"files": [{"uuid": uuid} for uuid in file_sizes]}
+        if path.startswith("/api/files/"):
+            return {"file_size": file_sizes[path.rsplit("/", 1)[-1]]}
+        if path == "/Bundles/actions/bulk_create":
+            return {"bundles": [TR_UUID], "count": 1}
+        return {"count": len(body["files"])}
+
+    request_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    request_mock.side_effect = request
+    p = Picker(config, mocker.MagicMock())
+    await p.run()
+    # the Picker never PATCHes the TransferRequest; it creates Bundles in its output status
+    assert not [c for c in request_mock.call_args_list if c[0][0] == "PATCH"]
+    assert p.metrics.counts["claimed"] == 1
+    assert p.metrics.counts["empty_pops"] == 1
+    assert p.metrics.counts["succeeded"] == 1
+    assert p.metrics.counts["quarantined"] == 0
+    assert p.metrics.counts["bytes_processed"] == 12445
+
+def test_observe_lta_request_forgets_old_claims():
+    """Test that we don't remember the sizes of too many claimed Bundles."""
+    m = ComponentMetrics("deleter")
+    for i in range(MAX_CLAIMED_SIZES + 10):
+        m.observe_lta_request("POST", "/Bundles/actions/pop", {}, {"bundle": {"uuid": str(i), "size": i}}, "deleted")
+    assert len(m._claimed_sizes) == MAX_CLAIMED_SIZES
+    assert "0" not in m._claimed_sizes
+
+def test_phase_and_summary():
+    """Test that phases are timed and summarized for the heartbeat."""
+    m = ComponentMetrics("bundler", export=True)
+    with m.phase("work_claim"):
+        pass
+    with pytest.raises(ValueError):
+        with m.phase("work_claim"):
+            raise ValueError("timed anyway")
+    m.observe_rest("GET", f"/Bundles/{BUNDLE_UUID}?contents=1", 0.5)
+    summary = m.summary()
+    assert summary["phases"]["work_claim"]["count"] == 2
+    assert summary["rest"]["GET /Bundles/{uuid}"] == {"count": 1, "seconds": 0.5, "max_seconds": 0.5}
+    assert m.registry.get_sample_value("lta_phase_seconds_count", {"component": "bundler", "phase": "work_claim"}) == 2
+    labels = {"component": "bundler", "method": "GET", "route": "/Bundles/{uuid}"}
+    assert m.registry.get_sample_value("lta_rest_request_seconds_sum", labels) == 0.5
+
+def test_serve(mocker):
+    """Test that serve publishes the component's own metrics."""
+    shs_mock = mocker.patch("prometheus_client.start_http_server")
+    m = ComponentMetrics("bundler", export=True)
+    m.serve(9090)
+    shs_mock.assert_called_with(9090, registry=m.registry)
+    # metrics that aren't exported are only kept for the heartbeat
+    m = ComponentMetrics("bundler")
+    assert m.registry is None
+    with m.phase("work_claim"):
+        m.count("claimed")
+    assert m.summary()["counts"]["claimed"] == 1
+    with pytest.raises(RuntimeError):
+        m.serve(9090)
+
+@pytest.mark.asyncio
+async def test_metered_rest_client(mocker):
+    """Test that MeteredRestClient times its requests and counts the work they do."""
+    request_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    request_mock.return_value = {"bundle": {"uuid": BUNDLE_UUID, "size": 10}}
+    m = ComponentMetrics("deleter")
+    rc = MeteredRestClient("http://localhost:8080", m, "deleted", token="token", timeout=1, retries=1)
+    assert await rc.request("POST", "/Bundles/actions/pop?status=deletable", {}) == request_mock.return_value
+    request_mock.assert_called_with("POST", "/Bundles/actions/pop?status=deletable", {})
+    request_mock.return_value = {}
+    await rc.request("PATCH", f"/Bundles/{BUNDLE_UUID}", args={"status": "deleted"})
+    assert m.counts["claimed"] == 1
+    assert m.counts["succeeded"] == 1
+    assert m.counts["bytes_processed"] == 10
+    assert m.rest["POST /Bundles/actions/pop"]["count"] == 1
+    request_mock.side_effect = Exception("LTA DB on vacation")
+    with pytest.raises(Exception):
+        await rc.request("GET", "/Bundles")
+    assert m.rest["GET /Bundles"]["count"] == 1
+
+@pytest.mark.asyncio
+async def test_metered_rest_client_request_data(mocker):
+    """Test that MeteredRestClient times, and logs the failures of, requests whose body isn't JSON."""
+    m = ComponentMetrics("picker")
+    rc = MeteredRestClient("http://localhost:8080", m, "specified", token="token", timeout=1, retries=1)
+    response = requests.Response()
+    response.status_code = 201
+    response.headers["Content-Type"] = "application/x-lta-uuid-array"
+    response._content = b"\x00" * 16
+    session_mock = mocker.patch.object(rc.session, "request", return_value=asyncio.Future())
+    session_mock.return_value.set_result(response)
+    assert await rc.request_data("POST", "/Metadata/actions/bulk_create", b"\x01" * 16, "application/x-lta-uuid-array", {"bundle_uuid": BUNDLE_UUID}) == b"\x00" * 16
+    args, kwargs = session_mock.call_args
+    assert args == ("POST", "http://localhost:8080/Metadata/actions/bulk_create")
+    assert kwargs["data"] == b"\x01" * 16
+    assert kwargs["params"] == {"bundle_uuid": BUNDLE_UUID}
+    assert kwargs["headers"]["Content-Type"] == "application/x-lta-uuid-array"
+    assert kwargs["headers"]["Authorization"] == "Bearer token"
+    assert "json" not in kwargs
+    assert m.rest["POST /Metadata/actions/bulk_create"]["count"] == 1
+
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json; charset=UTF-8"
+    response._content = b'{"count": 1}'
+    session_mock.return_value = asyncio.Future()
+    session_mock.return_value.set_result(response)
+    assert await rc.request_data("POST", "/Metadata/actions/bulk_delete", b"\x01" * 16, "application/x-lta-uuid-array") == {"count": 1}
+
+    response = requests.Response()
+    response.status_code = 400
+    session_mock.return_value = asyncio.Future()
+    session_mock.return_value.set_result(response)
+    logger_mock = mocker.patch.object(rc, "logger")
+    with pytest.raises(requests.exceptions.HTTPError):
+        await rc.request_data("POST", "/Metadata/actions/bulk_delete", b"", "application/x-lta-uuid-array")
+    assert m.rest["POST /Metadata/actions/bulk_delete"]["count"] == 2
+    logger_mock.info.assert_called_once()
@@ -16,18 +16,30 @@ def config():
     return {
         "COMPONENT_NAME": "testing-nersc_verifier",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-token",
         "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_STATUS": "verifying",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
+        "METADATA_BINARY_UUIDS": "False",
         "OUTPUT_STATUS": "completed",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
         "TAPE_BASE_PATH": "/path/to/hpss",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -65,18 +77,30 @@ async def test_nersc_verifier_logs_configuration(mocker):
     nersc_verifier_config = {
         "COMPONENT_NAME": "logme-testing-nersc_verifier",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "FILE_CATALOG_REST_TOKEN": "logme-fake-file-catalog-token",
         "FILE_CATALOG_REST_URL": "logme-http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_STATUS": "verifying",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
+        "METADATA_BINARY_UUIDS": "False",
         "OUTPUT_STATUS": "completed",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
         "TAPE_BASE_PATH": "/logme/path/to/hpss",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -86,18 +110,30 @@ async def test_nersc_verifier_logs_configuration(mocker):
         call("nersc_verifier 'logme-testing-nersc_verifier' is configured:"),
         call('COMPONENT_NAME = logme-testing-nersc_verifier'),
         call('DEST_SITE = NERSC'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('FILE_CATALOG_REST_TOKEN = logme-fake-file-catalog-token'),
         call('FILE_CATALOG_REST_URL = logme-http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_STATUS = verifying'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/'),
+        call('METADATA_BINARY_UUIDS = False'),
         call('OUTPUT_STATUS = completed'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = WIPAC'),
         call('TAPE_BASE_PATH = /logme/path/to/hpss'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90')
@@ -667,3 +703,26 @@ async def test_nersc_verifier_verify_bundle_in_hpss_hashverify_bad_result_quaran
     assert not await p._verify_bundle_in_hpss(lta_mock, bundle)
     assert run_mock.call_count == 2
     lta_rc_mock.assert_called_with('PATCH', '/Bundles/7ec8a8f9-fae3-4f25-ae54-c1f66014f5ef', mocker.ANY)
+
+@pytest.mark.asyncio
+async def test_nersc_verifier_bulk_delete_metadata_binary_uuids(config, mocker):
+    """Test that _bulk_delete_metadata sends packed UUID arrays when configured to."""
+    config["METADATA_BINARY_UUIDS"] = "True"
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.MagicMock()
+    lta_rc_mock.request = AsyncMock()
+    post_mock = mocker.patch("lta.nersc_verifier.post_uuid_array", new_callable=AsyncMock)
+    post_mock.return_value = {"count": 2}
+    metadata = [uuid1().hex, uuid1().hex]
+    p = NerscVerifier(config, logger_mock)
+    assert await p._bulk_delete_metadata(lta_rc_mock, metadata) == {"count": 2}
+    post_mock.assert_called_with(lta_rc_mock, '/Metadata/actions/bulk_delete', mocker.ANY)
+    assert len(post_mock.call_args[0][2]) == 32
+    lta_rc_mock.request.assert_not_called()
+
+    # Metadata UUIDs that can't be packed go as JSON
+    post_mock.reset_mock()
+    lta_rc_mock.request.return_value = {"metadata": ["not-a-uuid"], "count": 1}
+    assert await p._bulk_delete_metadata(lta_rc_mock, ["not-a-uuid"]) == {"metadata": ["not-a-uuid"], "count": 1}
+    post_mock.assert_not_called()
+    lta_rc_mock.request.assert_called_with("POST", '/Metadata/actions/bulk_delete', {"metadata": ["not-a-uuid"]})
@@ -20,19 +20,31 @@ def config():
     return {
         "COMPONENT_NAME": "testing-picker",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "FILE_CATALOG_PAGE_SIZE": str(FILE_CATALOG_LIMIT),
         "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-rest-token",
         "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_STATUS": "ethereal",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
+        "METADATA_BINARY_UUIDS": "False",
         "OUTPUT_STATUS": "specified",
         "MAX_BUNDLE_SIZE": "107374182400",  # 100 GiB
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -139,19 +151,31 @@ async def test_picker_logs_configuration(mocker):
     picker_config = {
         "COMPONENT_NAME": "logme-testing-picker",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "FILE_CATALOG_PAGE_SIZE": str(FILE_CATALOG_LIMIT),
         "FILE_CATALOG_REST_TOKEN": "logme-fake-file-catalog-rest-token",
         "FILE_CATALOG_REST_URL": "logme-http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_STATUS": "ethereal",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "MAX_BUNDLE_SIZE": "107374182400",  # 100 GiB
+        "METADATA_BINARY_UUIDS": "False",
         "OUTPUT_STATUS": "specified",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -161,19 +185,31 @@ async def test_picker_logs_configuration(mocker):
         call("picker 'logme-testing-picker' is configured:"),
         call('COMPONENT_NAME = logme-testing-picker'),
         call('DEST_SITE = NERSC'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('FILE_CATALOG_PAGE_SIZE = 9000'),
         call('FILE_CATALOG_REST_TOKEN = logme-fake-file-catalog-rest-token'),
         call('FILE_CATALOG_REST_URL = logme-http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_STATUS = ethereal'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/'),
         call('MAX_BUNDLE_SIZE = 107374182400'),
+        call('METADATA_BINARY_UUIDS = False'),
         call('OUTPUT_STATUS = specified'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = WIPAC'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90')
@@ -512,3 +548,28 @@ async def test_picker_do_work_transfer_request_fc_its_over_9000(config, mocker):
     await p._do_work_transfer_request(lta_rc_mock, tr)
     fc_rc_mock.assert_called_with("GET", mocker.ANY)
     lta_rc_mock.request.assert_called_with("POST", '/Metadata/actions/bulk_create', mocker.ANY)
+
+@pytest.mark.asyncio
+async def test_picker_create_metadata_mapping_binary_uuids(config, mocker):
+    """Test that _create_metadata_mapping sends packed UUID arrays when configured to."""
+    config["METADATA_BINARY_UUIDS"] = "True"
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.MagicMock()
+    lta_rc_mock.request = AsyncMock()
+    post_mock = mocker.patch("lta.picker.post_uuid_array", new_callable=AsyncMock)
+    post_mock.return_value = bytes(16 * 3)
+    bundle_uuid = uuid1().hex
+    spec = [(str(uuid1()), 1000) for i in range(CREATE_CHUNK_SIZE + 3)]
+    p = Picker(config, logger_mock)
+    await p._create_metadata_mapping(lta_rc_mock, spec, bundle_uuid)
+    assert post_mock.call_count == 2
+    post_mock.assert_called_with(lta_rc_mock, '/Metadata/actions/bulk_create', mocker.ANY, {"bundle_uuid": bundle_uuid})
+    assert len(post_mock.call_args[0][2]) == 16 * 3
+    lta_rc_mock.request.assert_not_called()
+
+    # File Catalog UUIDs that can't be packed go as JSON
+    post_mock.reset_mock()
+    lta_rc_mock.request.return_value = {"metadata": [uuid1().hex], "count": 1}
+    await p._create_metadata_mapping(lta_rc_mock, [("not-a-uuid", 1000)], bundle_uuid)
+    post_mock.assert_not_called()
+    lta_rc_mock.request.assert_called_with("POST", '/Metadata/actions/bulk_create', {"bundle_uuid": bundle_uuid, "files": ["not-a-uuid"]})
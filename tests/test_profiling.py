@@ -0,0 +1,123 @@
+# test_profiling.py
+"""Unit tests for lta/profiling.py."""
+
+import os
+import pickle
+import pstats
+import signal
+import tracemalloc
+
+import pytest  # type: ignore
+
+from lta.profiling import dump_snapshot, dump_stats, profile_label, WorkProfiler
+
+BUNDLE_UUID = "8286d3ba-fb1b-4923-876d-935bdf7fc99e"
+OTHER_UUID = "c6d2d0f4-6a2b-4bd1-a4b1-0d1b8c4f2f3e"
+
+async def run_inline(func, *args, **kwargs):
+    """Stand in for Component.run_blocking, without an executor."""
+    return func(*args, **kwargs)
+
+def test_profile_label():
+    """Test that profiles are named after the work they did."""
+    assert profile_label([BUNDLE_UUID]) == BUNDLE_UUID
+    assert profile_label([BUNDLE_UUID, OTHER_UUID]) == f"{BUNDLE_UUID}-and-1-more"
+
+@pytest.mark.asyncio
+async def test_cycle_disabled(mocker, tmp_path):
+    """Test that a disabled profiler does not profile or write anything."""
+    profile_dir = tmp_path / "profiles"
+    p = WorkProfiler("testing-bundler", str(profile_dir), "ALL", False, mocker.MagicMock(), run_inline)
+    async with p.cycle([BUNDLE_UUID]):
+        pass
+    assert not profile_dir.exists()
+
+@pytest.mark.asyncio
+async def test_cycle_cprofile(mocker, tmp_path):
+    """Test that a profiled cycle writes a cProfile profile named after its work."""
+    p = WorkProfiler("testing-bundler", str(tmp_path), "CPROFILE", True, mocker.MagicMock(), run_inline)
+    claimed_uuids = []
+    async with p.cycle(claimed_uuids):
+        claimed_uuids.append(BUNDLE_UUID)
+        sorted(range(1000))
+    paths = os.listdir(tmp_path)
+    assert len(paths) == 1
+    assert paths[0].startswith("testing-bundler-")
+    assert paths[0].endswith(f"-{BUNDLE_UUID}.prof")
+    stats = pstats.Stats(str(tmp_path / paths[0]))
+    assert stats.total_calls > 0
+
+@pytest.mark.asyncio
+async def test_cycle_tracemalloc(mocker, tmp_path):
+    """Test that a profiled cycle writes a tracemalloc snapshot, and stops tracing when turned off."""
+    assert not tracemalloc.is_tracing()
+    p = WorkProfiler("testing-bundler", str(tmp_path), "TRACEMALLOC", True, mocker.MagicMock(), run_inline)
+    try:
+        async with p.cycle([BUNDLE_UUID, OTHER_UUID]):
+            assert tracemalloc.is_tracing()
+        # we keep tracing between cycles
+        assert tracemalloc.is_tracing()
+        paths = os.listdir(tmp_path)
+        assert len(paths) == 1
+        assert paths[0].endswith(f"-{BUNDLE_UUID}-and-1-more.tracemalloc")
+        assert tracemalloc.Snapshot.load(str(tmp_path / paths[0]))
+        p.toggle()
+        async with p.cycle([]):
+            pass
+        assert not tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.asyncio
+async def test_cycle_idle(mocker, tmp_path):
+    """Test that a profiled cycle that claimed no work is not written."""
+    p = WorkProfiler("testing-bundler", str(tmp_path), "ALL", True, mocker.MagicMock(), run_inline)
+    try:
+        async with p.cycle([]):
+            pass
+        assert not os.listdir(tmp_path)
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.asyncio
+async def test_cycle_error(mocker, tmp_path):
+    """Test that a cycle that fails is still written."""
+    p = WorkProfiler("testing-bundler", str(tmp_path), "CPROFILE", True, mocker.MagicMock(), run_inline)
+    with pytest.raises(ValueError):
+        async with p.cycle([BUNDLE_UUID]):
+            raise ValueError("profiled anyway")
+    assert len(os.listdir(tmp_path)) == 1
+
+@pytest.mark.asyncio
+async def test_cycle_writes_with_run_blocking(mocker, tmp_path):
+    """Test that profiles are written off the event loop, with calls a PROCESS executor can pickle."""
+    written = []
+
+    async def run_blocking(func, *args, **kwargs):
+        pickle.dumps((func, args, kwargs))
+        written.append(func)
+        return func(*args, **kwargs)
+
+    p = WorkProfiler("testing-bundler", str(tmp_path), "ALL", True, mocker.MagicMock(), run_blocking)
+    try:
+        async with p.cycle([BUNDLE_UUID]):
+            sorted(range(1000))
+    finally:
+        tracemalloc.stop()
+    assert written == [os.makedirs, dump_stats, dump_snapshot]
+    assert len(os.listdir(tmp_path)) == 2
+
+@pytest.mark.asyncio
+async def test_listen(mocker, tmp_path):
+    """Test that the signal toggles profiling."""
+    p = WorkProfiler("testing-bundler", str(tmp_path), "CPROFILE", False, mocker.MagicMock(), run_inline)
+    loop_mock = mocker.patch("asyncio.get_event_loop")
+    p.listen(signal.SIGUSR1)
+    loop_mock.return_value.add_signal_handler.assert_called_with(signal.SIGUSR1, p.toggle)
+    loop_mock.return_value.add_signal_handler.side_effect = NotImplementedError()
+    p.listen(signal.SIGUSR1)
+    p.logger.warning.assert_called()
+    p.toggle()
+    assert p.enabled
+    p.toggle()
+    assert not p.enabled
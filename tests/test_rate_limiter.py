@@ -13,20 +13,33 @@ from .test_util import AsyncMock
 def config():
     """Supply a stock RateLimiter component configuration."""
     return {
+        "CLAIM_LOCALITY": "NONE",
         "COMPONENT_NAME": "testing-rate_limiter",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_PATH": "/path/to/icecube/bundler/outbox",
         "INPUT_STATUS": "created",
+        "LOCALITY_TAG": "localhost",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "OUTPUT_PATH": "/path/to/icecube/replicator/inbox",
         "OUTPUT_QUOTA": "12094627905536",  # 11 TiB
         "OUTPUT_STATUS": "staged",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -67,20 +80,33 @@ async def test_rate_limiter_logs_configuration(mocker):
     """Test to make sure the RateLimiter logs its configuration."""
     logger_mock = mocker.MagicMock()
     rate_limiter_config = {
+        "CLAIM_LOCALITY": "NONE",
         "COMPONENT_NAME": "logme-testing-rate_limiter",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_PATH": "/path/to/icecube/bundler/outbox",
         "INPUT_STATUS": "created",
+        "LOCALITY_TAG": "localhost",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://zjwdm5ggeEgS1tZDZy9l1DOZU53uiSO4Urmyb8xL0.com/",
         "OUTPUT_PATH": "/path/to/icecube/replicator/inbox",
         "OUTPUT_QUOTA": "12094627905536",  # 11 TiB
         "OUTPUT_STATUS": "staged",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -88,20 +114,33 @@ async def test_rate_limiter_logs_configuration(mocker):
     RateLimiter(rate_limiter_config, logger_mock)
     EXPECTED_LOGGER_CALLS = [
         call("rate_limiter 'logme-testing-rate_limiter' is configured:"),
+        call('CLAIM_LOCALITY = NONE'),
         call('COMPONENT_NAME = logme-testing-rate_limiter'),
         call('DEST_SITE = NERSC'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_PATH = /path/to/icecube/bundler/outbox'),
         call('INPUT_STATUS = created'),
+        call('LOCALITY_TAG = localhost'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://zjwdm5ggeEgS1tZDZy9l1DOZU53uiSO4Urmyb8xL0.com/'),
         call('OUTPUT_PATH = /path/to/icecube/replicator/inbox'),
         call('OUTPUT_QUOTA = 12094627905536'),
         call('OUTPUT_STATUS = staged'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = WIPAC'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90')
@@ -158,7 +197,7 @@ async def test_rate_limiter_do_work_pop_exception(config, mocker):
     p = RateLimiter(config, logger_mock)
     with pytest.raises(HTTPError):
         await p._do_work()
-    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created', {'claimant': f'{p.name}-{p.instance_uuid}'})
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=12094627905536', {'claimant': f'{p.name}-{p.instance_uuid}'})
 
 @pytest.mark.asyncio
 async def test_rate_limiter_do_work_no_results(config, mocker):
@@ -191,7 +230,7 @@ async def test_rate_limiter_do_work_claim_no_result(config, mocker):
     sb_mock = mocker.patch("lta.rate_limiter.RateLimiter._stage_bundle", new_callable=AsyncMock)
     p = RateLimiter(config, logger_mock)
     await p._do_work_claim()
-    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created', {'claimant': f'{p.name}-{p.instance_uuid}'})
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=12094627905536', {'claimant': f'{p.name}-{p.instance_uuid}'})
     sb_mock.assert_not_called()
 
 @pytest.mark.asyncio
@@ -207,7 +246,7 @@ async def test_rate_limiter_do_work_claim_yes_result(config, mocker):
     sb_mock = mocker.patch("lta.rate_limiter.RateLimiter._stage_bundle", new_callable=AsyncMock)
     p = RateLimiter(config, logger_mock)
     assert not await p._do_work_claim()
-    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created', {'claimant': f'{p.name}-{p.instance_uuid}'})
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=12094627905536', {'claimant': f'{p.name}-{p.instance_uuid}'})
     sb_mock.assert_called_with(mocker.ANY, {"one": 1})
 
 @pytest.mark.asyncio
@@ -226,7 +265,7 @@ async def test_rate_limiter_stage_bundle_raises(config, mocker):
     p = RateLimiter(config, logger_mock)
     with pytest.raises(Exception):
         await p._do_work_claim()
-    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created', {'claimant': f'{p.name}-{p.instance_uuid}'})
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=12094627905536', {'claimant': f'{p.name}-{p.instance_uuid}'})
     sb_mock.assert_called_with(mocker.ANY, {"one": 1})
     qb_mock.assert_called_with(mocker.ANY, {"one": 1}, "LTA DB unavailable; currently safer at home")
 
@@ -287,3 +326,21 @@ async def test_rate_limiter_unclaim_bundle(config, mocker):
     p = RateLimiter(config, logger_mock)
     await p._unclaim_bundle(lta_rc_mock, {"uuid": "c4b345e4-2395-4f9e-b0eb-9cc1c9cdf003"})
     lta_rc_mock.request.assert_called_with("PATCH", "/Bundles/c4b345e4-2395-4f9e-b0eb-9cc1c9cdf003", mocker.ANY)
+
+@pytest.mark.asyncio
+async def test_rate_limiter_do_work_claim_max_size(config, mocker):
+    """Test that _do_work_claim only asks for a Bundle that fits in the remaining quota."""
+    logger_mock = mocker.MagicMock()
+    lta_rc_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    lta_rc_mock.return_value = {
+        "bundle": None
+    }
+    gfas_mock = mocker.patch("lta.rate_limiter._get_files_and_size", new_callable=MagicMock)
+    gfas_mock.return_value = (["/path/to/one/file.zip"], 12094627905000)
+    p = RateLimiter(config, logger_mock)
+    await p._do_work_claim()
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=536', {'claimant': f'{p.name}-{p.instance_uuid}'})
+    # when we're already over quota, nothing fits
+    gfas_mock.return_value = (["/path/to/one/file.zip"], 12094627905537)
+    await p._do_work_claim()
+    lta_rc_mock.assert_called_with("POST", '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=0', {'claimant': f'{p.name}-{p.instance_uuid}'})
@@ -7,15 +7,23 @@ import os
 import socket
 from typing import Dict
 from urllib.parse import quote_plus
+from uuid import uuid1
 
 from pymongo import MongoClient  # type: ignore
 from pymongo.database import Database  # type: ignore
 import pytest  # type: ignore
 import requests  # type: ignore
 from rest_tools.client import RestClient  # type: ignore
+from rest_tools.utils.json_util import json_decode, json_encode
 from requests.exceptions import HTTPError
+from tornado.httpclient import AsyncHTTPClient
 
-from lta.rest_server import boolify, CheckClaims, main, start, unique_id
+from motor.motor_tornado import MotorClient  # type: ignore
+
+from lta.metrics import ComponentMetrics, MeteredRestClient
+from lta.rest_server import AdmissionControl, apply_patch, archive_terminal_documents, boolify, bundle_pop_queries, CheckClaims, main, QUERY_SHAPES, RetryPolicy, SingleFlight, start, suggest_index, summarize_plan, unique_id
+from lta.rest_server import CREATE_CHUNK_SIZE, DELETE_CHUNK_SIZE, MetadataActionsBulkCreateHandler, MetadataActionsBulkDeleteHandler
+from lta.uuid_array import pack_uuids, post_uuid_array, unpack_uuids
 
 ALL_DOCUMENTS: Dict[str, str] = {}
 REMOVE_ID = {"_id": False}
@@ -131,6 +139,196 @@ def test_check_claims_old_age():
 
 # -----------------------------------------------------------------------------
 
+def test_summarize_plan():
+    """Check that explain() output is reduced to the plan, the work done, and any missing index."""
+    shape = {
+        "name": "Bundles pop by dest",
+        "collection": "Bundles",
+        "filter": {"status": "specified", "claimed": False, "size": {"$lte": 0}, "dest": "nersc"},
+        "sort": [("priority", -1), ("work_priority_timestamp", 1)],
+    }
+    indexed = {
+        "queryPlanner": {
+            "winningPlan": {
+                "stage": "LIMIT",
+                "inputStage": {
+                    "stage": "FETCH",
+                    "inputStage": {"stage": "IXSCAN", "indexName": "bundles_pop_index"},
+                },
+            },
+        },
+        "executionStats": {"nReturned": 1, "totalKeysExamined": 3, "totalDocsExamined": 3},
+    }
+    plan = summarize_plan(shape, indexed)
+    assert plan == {
+        "name": "Bundles pop by dest",
+        "collection": "Bundles",
+        "stages": ["LIMIT", "FETCH", "IXSCAN"],
+        "indexes": ["bundles_pop_index"],
+        "collscan": False,
+        "blocking_sort": False,
+        "docs_examined": 3,
+        "keys_examined": 3,
+        "returned": 1,
+        "missing_index": None,
+    }
+    # the slot based execution engine wraps the classic plan
+    scanned = {
+        "queryPlanner": {
+            "winningPlan": {
+                "queryPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}},
+                "slotBasedPlan": {},
+            },
+        },
+        "executionStats": {"nReturned": 1, "totalKeysExamined": 0, "totalDocsExamined": 5000},
+    }
+    plan = summarize_plan(shape, scanned)
+    assert plan["stages"] == ["SORT", "COLLSCAN"]
+    assert plan["indexes"] == []
+    assert plan["collscan"]
+    assert plan["blocking_sort"]
+    assert plan["docs_examined"] == 5000
+    assert plan["missing_index"] == [("status", 1), ("claimed", 1), ("dest", 1), ("priority", -1), ("work_priority_timestamp", 1), ("size", 1)]
+
+def test_apply_patch():
+    """Check that the document a PATCH produced is worked out from the document it replaced."""
+    before = {"uuid": "abc", "status": "taping", "version": 2, "checksum": {"sha512": "123"}}
+    after = apply_patch(before, {"status": "verifying", "checksum.adler32": "456"})
+    assert after == {"uuid": "abc", "status": "verifying", "version": 3, "checksum": {"sha512": "123", "adler32": "456"}}
+    assert before["status"] == "taping"
+    assert before["checksum"] == {"sha512": "123"}
+
+def test_bundle_pop_queries():
+    """Check that pops try the Bundles stored near the claimant first, and then (if allowed) anywhere."""
+    right_now = "2021-01-01T00:00:00"
+    queries = bundle_pop_queries("taping", right_now, dest="NERSC", source="WIPAC", max_size=100)
+    assert queries == [{
+        "status": "taping",
+        "claimed": False,
+        "not_before": {"$not": {"$gt": right_now}},
+        "dest": "NERSC",
+        "source": "WIPAC",
+        "size": {"$lte": 100},
+    }]
+    queries = bundle_pop_queries("taping", right_now, dest="NERSC", locality="node1")
+    assert [query.get("locality") for query in queries] == ["node1", None]
+    queries = bundle_pop_queries("taping", right_now, dest="NERSC", locality="node1", require_locality=True)
+    assert [query.get("locality") for query in queries] == ["node1"]
+
+def test_suggest_index():
+    """Check that suggested indexes put equality matches first, then the sort, then ranges."""
+    assert suggest_index({"uuid": "abc"}) == [("uuid", 1)]
+    assert suggest_index({"uuid": {"$in": ["abc"]}}) == [("uuid", 1)]
+    assert suggest_index({"timestamp": {"$gte": "2021"}, "type": "Bundle"}, [("uuid", 1), ("timestamp", 1)]) == [("type", 1), ("uuid", 1), ("timestamp", 1)]
+    # the Events stages sort is served by the Events type/uuid/timestamp/_id index, with no blocking SORT
+    events_stages = next(shape for shape in QUERY_SHAPES if shape["name"] == "Events stages")
+    assert suggest_index(events_stages["filter"], events_stages["sort"]) == [("type", 1), ("uuid", 1), ("timestamp", 1), ("_id", 1)]
+    # the pop every component makes is audited, exactly as the handler issues it
+    shapes = {shape["name"]: shape for shape in QUERY_SHAPES}
+    assert shapes["Bundles pop by source and dest"]["filter"] == bundle_pop_queries("specified", "1970-01-01T00:00:00", "nersc", "wipac")[0]
+    assert shapes["Bundles pop by source and dest and locality"]["filter"]["locality"] == "localhost"
+    assert shapes["Events by uuid"]["filter"] == {"uuid": "00000000000000000000000000000000"}
+    # every shape can be explained by name, and has a filter to explain
+    assert len({shape["name"] for shape in QUERY_SHAPES}) == len(QUERY_SHAPES)
+    for shape in QUERY_SHAPES:
+        assert shape["collection"] in ["Bundles", "Events", "Metadata", "Status", "TransferRequests"]
+        assert suggest_index(shape["filter"], shape.get("sort"))
+
+def test_retry_policy():
+    """Check that component quarantines back off exponentially until attempts run out."""
+    rp = RetryPolicy(max_attempts=4, backoff_seconds=60, max_backoff_seconds=100)
+    right_now = datetime(2021, 1, 1)
+    before = {"status": "taping"}
+    expected = ["2021-01-01T00:01:00", "2021-01-01T00:01:40", "2021-01-01T00:01:40"]
+    for attempt in [1, 2, 3]:
+        req = {"status": "quarantined", "reason": "HPSS unavailable"}
+        assert rp.apply(before, req, right_now)
+        assert req == {
+            "status": "taping",
+            "reason": "HPSS unavailable",
+            "claimed": False,
+            "not_before": expected[attempt - 1],
+            "retry_count": attempt,
+            "retry_status": "taping",
+        }
+        before = {"status": "taping", "retry_count": attempt, "retry_status": "taping"}
+    req = {"status": "quarantined"}
+    assert not rp.apply(before, req, right_now)
+    assert req == {"status": "quarantined", "retry_count": 4, "retry_status": "taping"}
+    # failures in a new status start counting again
+    req = {"status": "quarantined"}
+    assert rp.apply({"status": "completed", "retry_count": 3, "retry_status": "taping"}, req, right_now)
+    assert req["retry_count"] == 1
+    # other updates, and disabled policies, are left alone
+    req = {"status": "completed"}
+    assert not rp.apply(before, req, right_now)
+    assert req == {"status": "completed"}
+    req = {"status": "quarantined"}
+    assert not RetryPolicy().apply(before, req, right_now)
+    assert req == {"status": "quarantined"}
+
+def test_admission_control_rate(mocker):
+    """Check that clients are limited to their token bucket."""
+    mock_monotonic = mocker.patch("time.monotonic")
+    mock_monotonic.return_value = 1000.0
+    ac = AdmissionControl(rate_per_second=0.5, burst=2)
+    assert ac.admit("user:alice") == 0
+    assert ac.admit("user:alice") == 0
+    assert ac.admit("user:alice") == 2
+    assert ac.admit("user:bob") == 0
+    assert ac.admit("user:alice", priority=True) == 0
+    mock_monotonic.return_value = 1002.0
+    assert ac.admit("user:alice") == 0
+    assert ac.admit("user:alice") == 2
+    assert ac.in_flight == 5
+
+def test_admission_control_concurrency():
+    """Check that only so many requests are in flight at once."""
+    ac = AdmissionControl(max_concurrent=2)
+    assert ac.admit("user:alice") == 0
+    assert ac.admit("user:bob") == 0
+    assert ac.admit("user:carol") == 1
+    assert ac.admit("system:lta", priority=True) == 0
+    ac.release()
+    assert ac.admit("user:carol") == 1
+    ac.release()
+    assert ac.admit("user:carol") == 0
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    """Check that concurrent calls with the same key share one operation."""
+    calls = []
+
+    async def produce(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    sf = SingleFlight()
+    results = await asyncio.gather(
+        sf.do("a", lambda: produce("first")),
+        sf.do("a", lambda: produce("second")),
+        sf.do("b", lambda: produce("third")),
+    )
+    assert results == ["first", "first", "third"]
+    assert calls == ["first", "third"]
+    assert not sf.in_flight
+
+    # once the operation is done, the next call runs again
+    assert await sf.do("a", lambda: produce("fourth")) == "fourth"
+
+@pytest.mark.asyncio
+async def test_single_flight_error():
+    """Check that every caller sharing an operation sees its error."""
+    async def produce():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    sf = SingleFlight()
+    results = await asyncio.gather(sf.do("a", produce), sf.do("a", produce), return_exceptions=True)
+    assert all(isinstance(x, ValueError) for x in results)
+    assert not sf.in_flight
+
 @pytest.mark.asyncio
 async def test_server_reachability(rest):
     """Check that we can reach the server."""
@@ -224,6 +422,51 @@ async def test_transfer_request_crud(mongo, rest):
     ret = await r.request('GET', '/TransferRequests')
     assert len(ret['results']) == 0
 
+@pytest.mark.asyncio
+async def test_transfer_requests_actions_bulk_create(mongo, rest):
+    """Check bulk creation of TransferRequests, with its duplicate checks."""
+    r = rest('user')
+    test_data = {'transfer_requests': [
+        {'source': 'UMD', 'dest': 'NERSC', 'path': '/data/exp/IceCube/2013/filtered/PFFilt/0101'},
+        {'source': 'UMD', 'dest': 'NERSC', 'path': '/data/exp/IceCube/2013/filtered/PFFilt/0102', 'priority': 5},
+    ]}
+    ret = await r.request('POST', '/TransferRequests/actions/bulk_create', test_data)
+    assert ret['count'] == 2
+    uuids = ret['transfer_requests']
+    ret = await r.request('GET', f'/TransferRequests/{uuids[0]}')
+    assert ret['path'] == '/data/exp/IceCube/2013/filtered/PFFilt/0101'
+    assert ret['status'] == 'unclaimed'
+    assert ret['priority'] == 0
+    ret = await r.request('GET', f'/TransferRequests/{uuids[1]}')
+    assert ret['priority'] == 5
+
+    # open TransferRequests on the same path are refused, unless forced
+    test_data['transfer_requests'] = test_data['transfer_requests'][1:]
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', '/TransferRequests/actions/bulk_create', test_data)
+    assert e.value.response.status_code == 409
+    assert uuids[1] in e.value.response.reason
+    ret = await r.request('POST', '/TransferRequests/actions/bulk_create', {**test_data, 'force': True})
+    assert ret['count'] == 1
+
+    # completed TransferRequests don't count as duplicates
+    mongo.TransferRequests.update_many({}, {'$set': {'status': 'completed'}})
+    ret = await r.request('POST', '/TransferRequests/actions/bulk_create', test_data)
+    assert ret['count'] == 1
+
+    # duplicates within the request are refused too
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', '/TransferRequests/actions/bulk_create', {'transfer_requests': test_data['transfer_requests'] * 2})
+    assert e.value.response.status_code == 409
+
+    # bad requests
+    for bad_data in [{}, {'transfer_requests': {}}, {'transfer_requests': []}, {'transfer_requests': ['foo']},
+                     {'transfer_requests': [{'source': 'UMD', 'dest': 'NERSC'}]},
+                     {'transfer_requests': [{'source': 'UMD', 'dest': 'NERSC', 'path': '/data', 'priority': 'high'}]}]:
+        with pytest.raises(HTTPError) as e:
+            await r.request('POST', '/TransferRequests/actions/bulk_create', bad_data)
+        assert e.value.response.status_code == 400
+
 @pytest.mark.asyncio
 async def test_transfer_request_pop(rest):
     """Check pop action for transfer requests."""
@@ -295,6 +538,103 @@ async def test_status(mongo, rest):
     assert ret['1'] == 'OK'
     assert ret['2'] == 'WARN'
 
+@pytest.mark.asyncio
+async def test_status_coalesced(mongo, rest):
+    """Check that identical concurrent reads get the same answer."""
+    request = {'1.1': {'timestamp': datetime.utcnow().isoformat(), 'foo': 'bar'}}
+    await rest('system').request('PATCH', '/status/1', request)
+    r = rest('admin')
+    rets = await asyncio.gather(*[r.request('GET', '/status/1') for i in range(4)])
+    assert rets == [request] * 4
+    rets = await asyncio.gather(r.request('GET', '/status/1'), r.request('GET', '/status/1/count'))
+    assert rets == [request, {'component': '1', 'count': 1}]
+    with pytest.raises(HTTPError) as e:
+        await asyncio.gather(r.request('GET', '/status/2'), r.request('GET', '/status/2'))
+    assert e.value.response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_status_read_your_writes(mongo, rest, monkeypatch):
+    """Check that a component never shares a read that started before its own write."""
+    keys = []
+    do = SingleFlight.do
+
+    async def slow_do(self, key, produce):
+        async def slow_produce():
+            result = await produce()
+            await asyncio.sleep(0.5)
+            return result
+        keys.append(key)
+        return await do(self, key, slow_produce)
+
+    monkeypatch.setattr(SingleFlight, "do", slow_do)
+    r = rest('system', timeout=5.0)
+    before = {'1.1': {'timestamp': datetime.utcnow().isoformat(), 'foo': 'bar'}}
+    await r.request('PATCH', '/status/1', before)
+    # a read is in flight when the component writes, and then reads
+    in_flight = asyncio.ensure_future(r.request('GET', '/status/1'))
+    await asyncio.sleep(0.1)
+    after = {'1.1': {'timestamp': datetime.utcnow().isoformat(), 'foo': 'baz'}}
+    await r.request('PATCH', '/status/1', after)
+    assert await r.request('GET', '/status/1') == after
+    assert await in_flight == before
+    assert not keys
+
+    # operators' reads are still shared
+    r = rest('admin', timeout=5.0)
+    rets = await asyncio.gather(r.request('GET', '/status/1'), r.request('GET', '/status/1'))
+    assert rets == [after, after]
+    assert len(keys) == 2
+
+@pytest.fixture
+def admission_limits(monkeypatch):
+    """Configure the REST server to limit the request rate of clients."""
+    monkeypatch.setenv("LTA_ADMISSION_BURST", "2")
+    monkeypatch.setenv("LTA_ADMISSION_RATE_PER_SECOND", "0.01")
+
+@pytest.mark.asyncio
+async def test_admission_limits(mongo, admission_limits, rest, port):
+    """Check that the REST server tells busy clients to back off, except for claims."""
+    r = rest('admin')
+    await r.request('GET', '/TransferRequests')
+    await r.request('GET', '/TransferRequests')
+    r2 = requests.get(CONFIG['TOKEN_SERVICE']+'/token', params={'scope': 'lta:admin'})
+    r2.raise_for_status()
+    auth = {'Authorization': f"Bearer {r2.json()['access']}"}
+    resp = await AsyncHTTPClient().fetch(f'http://localhost:{port}/TransferRequests', headers=auth, raise_error=False)
+    assert resp.code == 429
+    assert int(resp.headers["Retry-After"]) > 0
+
+    # claims and heartbeats still get through
+    ret = await r.request('POST', '/TransferRequests/actions/pop?source=WIPAC', {'claimant': 'testing-picker'})
+    assert not ret['transfer_request']
+    await r.request('PATCH', '/status/picker', {'picker-1': {'timestamp': datetime.utcnow().isoformat()}})
+
+    # other clients are not affected
+    r = rest('user')
+    await r.request('GET', '/TransferRequests')
+
+@pytest.fixture
+def secondary_reads(monkeypatch):
+    """Configure the REST server to send reporting queries to secondaries."""
+    monkeypatch.setenv("LTA_MONGODB_REPORT_MAX_STALENESS_SECONDS", "90")
+    monkeypatch.setenv("LTA_MONGODB_REPORT_READ_PREFERENCE", "secondaryPreferred")
+
+@pytest.mark.asyncio
+async def test_status_secondary_reads(mongo, secondary_reads, rest):
+    """Check that reporting routes work when reading from secondaries."""
+    r = rest('system')
+    request = {'1.1': {'timestamp': datetime.utcnow().isoformat(), 'foo': 'bar'}}
+    await r.request('PATCH', '/status/1', request)
+    await r.request('POST', '/TransferRequests', {'source': 'foo', 'dest': 'bar', 'path': 'snafu'})
+
+    r = rest('user')
+    ret = await r.request('GET', '/status')
+    assert ret['1'] == 'OK'
+    ret = await r.request('GET', '/status/1')
+    assert ret == request
+    ret = await r.request('GET', '/TransferRequests')
+    assert len(ret['results']) == 1
+
 @pytest.mark.asyncio
 async def test_script_main(mocker):
     """Ensure that main sets up logging, starts a server, and runs the event loop."""
@@ -420,6 +760,93 @@ async def test_bundles_actions_bulk_update_errors(rest):
     with pytest.raises(Exception):
         await r.request('POST', '/Bundles/actions/bulk_update', request)
 
+@pytest.mark.asyncio
+async def test_bundles_actions_update_many(mongo, rest):
+    """Check that update_many updates every bundle matching a restricted filter."""
+    r = rest('admin')
+    test_data = {
+        'bundles': [
+            {"source": "WIPAC", "dest": "NERSC", "status": "quarantined", "reason": "HPSS timeout on tape 42", "claimed": True, "claimant": "nersc-mover",
+             "retry_count": 3, "retry_status": "taping", "not_before": "2099-01-01T00:00:00"},
+            {"source": "WIPAC", "dest": "NERSC", "status": "quarantined", "reason": "HPSS timeout on tape 43", "claimed": True, "claimant": "nersc-mover"},
+            {"source": "WIPAC", "dest": "NERSC", "status": "quarantined", "reason": "checksum mismatch", "claimed": True, "claimant": "nersc-verifier"},
+            {"source": "WIPAC", "dest": "NERSC", "status": "taping", "reason": "", "claimed": False},
+        ]
+    }
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    uuids = ret["bundles"]
+    # requeue the bundles quarantined for one reason, as a single update
+    request = {
+        "filter": {"status": "quarantined", "reason": "^HPSS timeout"},
+        "update": {"status": "taping", "reason": "", "claimed": False, "note": "$not a field",
+                   "retry_count": 0, "retry_status": None, "not_before": None},
+    }
+    ret = await r.request('POST', '/Bundles/actions/update_many', request)
+    assert ret == {"matched": 2, "count": 2}
+    bundles = {uuid: await r.request('GET', f'/Bundles/{uuid}') for uuid in uuids}
+    for uuid in uuids[:2]:
+        assert bundles[uuid]["status"] == "taping"
+        assert bundles[uuid]["reason"] == ""
+        assert not bundles[uuid]["claimed"]
+        assert bundles[uuid]["note"] == "$not a field"
+        assert bundles[uuid]["retry_count"] == 0
+        assert bundles[uuid]["retry_status"] is None
+        assert bundles[uuid]["not_before"] is None
+        assert bundles[uuid]["version"] == 2
+    assert bundles[uuids[2]]["status"] == "quarantined"
+    assert bundles[uuids[2]]["version"] == 1
+    events = list(mongo.Events.find({"event": "status"}, REMOVE_ID))
+    assert sorted(e["uuid"] for e in events) == sorted(uuids[:2])
+    assert all(e["from_status"] == "quarantined" and e["to_status"] == "taping" for e in events)
+    # reset every priority date to the creation date
+    mongo.Bundles.update_many({}, {"$set": {"work_priority_timestamp": "2099-01-01T00:00:00"}})
+    request = {"filter": {}, "update": {}, "copy": {"work_priority_timestamp": "create_timestamp"}}
+    ret = await r.request('POST', '/Bundles/actions/update_many', request)
+    assert ret == {"matched": 4, "count": 4}
+    for bundle in mongo.Bundles.find():
+        assert bundle["work_priority_timestamp"] == bundle["create_timestamp"]
+
+@pytest.mark.asyncio
+async def test_actions_update_many_errors(rest):
+    """Check error conditions for update_many."""
+    r = rest('admin')
+    for request in [
+        {},
+        {"filter": ""},
+        {"filter": {}},
+        {"filter": {"uuid": "abc"}, "update": {"status": "taping"}},
+        {"filter": {"status": {"$ne": "deleted"}}, "update": {"status": "taping"}},
+        {"filter": {"reason": "("}, "update": {"status": "taping"}},
+        {"filter": {}, "update": ""},
+        {"filter": {}, "update": {"uuid": "abc"}},
+        {"filter": {}, "update": {"$set": {"status": "taping"}}},
+        {"filter": {}, "update": {"files.0": "abc"}},
+        {"filter": {}, "copy": {"work_priority_timestamp": "update_timestamp"}},
+    ]:
+        for route in ['/Bundles/actions/update_many', '/TransferRequests/actions/update_many']:
+            with pytest.raises(HTTPError) as e:
+                await r.request('POST', route, request)
+            assert e.value.response.status_code == 400
+    # only operators may update by filter
+    r = rest('system')
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', '/TransferRequests/actions/update_many', {"filter": {}, "update": {"status": "x"}})
+    assert e.value.response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_transfer_requests_actions_update_many(mongo, rest):
+    """Check that update_many resets the priority dates of transfer requests."""
+    r = rest('admin')
+    for path in ['/data/exp/IceCube/2013', '/data/exp/IceCube/2014']:
+        await r.request('POST', '/TransferRequests', {'source': 'WIPAC', 'dest': 'NERSC', 'path': path})
+    mongo.TransferRequests.update_many({}, {"$set": {"work_priority_timestamp": "2099-01-01T00:00:00"}})
+    request = {"filter": {"source": "WIPAC"}, "update": {"update_timestamp": "2021-01-01T00:00:00"}, "copy": {"work_priority_timestamp": "create_timestamp"}}
+    ret = await r.request('POST', '/TransferRequests/actions/update_many', request)
+    assert ret == {"matched": 2, "count": 2}
+    for tr in mongo.TransferRequests.find():
+        assert tr["work_priority_timestamp"] == tr["create_timestamp"]
+        assert tr["update_timestamp"] == "2021-01-01T00:00:00"
+
 @pytest.mark.asyncio
 async def test_get_bundles_filter(mongo, rest):
     """Check that GET /Bundles filters properly by query parameters.."""
@@ -685,6 +1112,49 @@ async def test_patch_bundles_uuid(mongo, rest):
         request = {"key": "value"}
         await r.request('PATCH', '/Bundles/048c812c780648de8f39a2422e2dcdb0', request)
 
+@pytest.mark.asyncio
+async def test_bundles_actions_bulk_get(mongo, rest):
+    """Check that many bundles can be fetched with one request."""
+    r = rest('system')
+    test_data = {
+        'bundles': [
+            {
+                "source": "WIPAC",
+                "dest": "NERSC",
+                "path": f"/data/exp/IceCube/2014/{i}.zip",
+                "status": "specified",
+                "files": [{"uuid": unique_id()}],
+            } for i in range(3)
+        ]
+    }
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    uuids = ret["bundles"]
+
+    # bundles come back in the order asked, without their files; unknown bundles are left out
+    request = {"bundles": [uuids[2], unique_id(), uuids[0], uuids[2]]}
+    ret = await r.request('POST', '/Bundles/actions/bulk_get', request)
+    assert ret["count"] == 2
+    assert [x["uuid"] for x in ret["bundles"]] == [uuids[2], uuids[0]]
+    assert ret["bundles"][1]["path"] == "/data/exp/IceCube/2014/0.zip"
+    assert "files" not in ret["bundles"][0]
+
+    # a projection limits the fields returned, but always includes the uuid
+    request = {"bundles": uuids, "projection": ["status", "_id"]}
+    ret = await r.request('POST', '/Bundles/actions/bulk_get', request)
+    assert ret["bundles"] == [{"uuid": uuid, "status": "specified"} for uuid in uuids]
+
+    for request, error in [
+        ({}, "missing bundles field"),
+        ({"bundles": {}}, "bundles field is not a list"),
+        ({"bundles": []}, "bundles field is empty"),
+        ({"bundles": ["a"] * 10001}, "bundles field has more than 10000 UUIDs"),
+        ({"bundles": uuids, "projection": "status"}, "projection field is not a list of strings"),
+    ]:
+        with pytest.raises(HTTPError) as e:
+            await r.request('POST', '/Bundles/actions/bulk_get', request)
+        assert e.value.response.status_code == 400
+        assert e.value.response.json()["error"] == error
+
 @pytest.mark.asyncio
 async def test_bundles_actions_pop(mongo, rest):
     """Check pop action for bundles."""
@@ -804,6 +1274,146 @@ async def test_bundles_actions_pop_errors(mongo, rest):
     with pytest.raises(Exception):
         await r.request('POST', '/Bundles/actions/pop?status=taping', request)
 
+@pytest.mark.asyncio
+async def test_bundles_actions_pop_max_size(mongo, rest):
+    """Check that pop action for bundles only hands out bundles that fit in max_size."""
+    r = rest('system')
+
+    test_data = {
+        'bundles': [
+            {
+                "source": "WIPAC",
+                "dest": "NERSC",
+                "path": "/data/exp/IceCube/2014/15f7a399-fe40-4337-bb7e-d68d2d28ec8e.zip",
+                "status": "created",
+                "size": 5000,
+            },
+            {
+                "source": "WIPAC",
+                "dest": "NERSC",
+                "path": "/data/exp/IceCube/2014/3bcd05f5-ceb8-4eb5-a5db-5f7d55a98ff4.zip",
+                "status": "created",
+                "size": 1000,
+            },
+        ]
+    }
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    assert ret["count"] == 2
+
+    claimant_body = {
+        'claimant': 'testing-rate_limiter-aaaed864-0112-4bcf-a069-bb55c12e291d',
+    }
+    # nothing fits in 999 bytes
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=999', claimant_body)
+    assert not ret['bundle']
+
+    # the older bundle doesn't fit, so the smaller one is handed out
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=4999', claimant_body)
+    assert ret['bundle']['size'] == 1000
+
+    # the older bundle is still waiting for enough room
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size=5000', claimant_body)
+    assert ret['bundle']['size'] == 5000
+
+    for max_size in ["-1", "lots"]:
+        with pytest.raises(HTTPError) as e:
+            await r.request('POST', f'/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=created&max_size={max_size}', claimant_body)
+        assert e.value.response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_bundles_actions_pop_locality(mongo, rest):
+    """Check that pop action for bundles prefers or requires bundles stored at the claimant's locality."""
+    r = rest('system')
+
+    test_data = {
+        'bundles': [
+            {
+                "source": "WIPAC",
+                "dest": "NERSC",
+                "path": "/data/exp/IceCube/2014/15f7a399-fe40-4337-bb7e-d68d2d28ec8e.zip",
+                "status": "detached",
+                "locality": "node1",
+            },
+            {
+                "source": "WIPAC",
+                "dest": "NERSC",
+                "path": "/data/exp/IceCube/2014/3bcd05f5-ceb8-4eb5-a5db-5f7d55a98ff4.zip",
+                "status": "detached",
+                "locality": "node2",
+            },
+        ]
+    }
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    assert ret["count"] == 2
+
+    claimant_body = {
+        'claimant': 'testing-deleter-aaaed864-0112-4bcf-a069-bb55c12e291d',
+    }
+    # node3 requires local bundles, and has none
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=detached&locality=node3&require_locality=true', claimant_body)
+    assert not ret['bundle']
+
+    # node2 gets its own bundle, even though it is not first in line
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=detached&locality=node2', claimant_body)
+    assert ret['bundle']['locality'] == 'node2'
+
+    # node2 has no more local bundles, so it gets node1's bundle if it only prefers locality
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=detached&locality=node2&require_locality=true', claimant_body)
+    assert not ret['bundle']
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&dest=NERSC&status=detached&locality=node2', claimant_body)
+    assert ret['bundle']['locality'] == 'node1'
+
+@pytest.fixture
+def retry_quarantines(monkeypatch):
+    """Configure the REST server to retry quarantined bundles."""
+    monkeypatch.setenv("LTA_RETRY_MAX_ATTEMPTS", "2")
+
+@pytest.mark.asyncio
+async def test_bundles_quarantine_retry(mongo, retry_quarantines, rest):
+    """Check that quarantined bundles are retried after a delay, until attempts run out."""
+    r = rest('system')
+    test_data = {
+        'bundles': [
+            {
+                "source": "WIPAC",
+                "dest": "NERSC",
+                "path": "/data/exp/IceCube/2014/15f7a399-fe40-4337-bb7e-d68d2d28ec8e.zip",
+                "status": "taping",
+            },
+        ]
+    }
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    uuid = ret["bundles"][0]
+    claimant_body = {
+        'claimant': 'testing-nersc_mover-aaaed864-0112-4bcf-a069-bb55c12e291d',
+    }
+    pop_url = '/Bundles/actions/pop?dest=NERSC&status=taping'
+
+    # the first failure is retried later
+    ret = await r.request('POST', pop_url, claimant_body)
+    assert ret['bundle']['uuid'] == uuid
+    ret = await r.request('PATCH', f'/Bundles/{uuid}', {"status": "quarantined", "reason": "HPSS unavailable"})
+    assert ret['status'] == 'taping'
+    assert not ret['claimed']
+    assert ret['reason'] == "HPSS unavailable"
+    assert ret['retry_count'] == 1
+    ret = await r.request('POST', pop_url, claimant_body)
+    assert not ret['bundle']
+
+    # once not_before passes, the bundle can be claimed again; the second failure is final
+    mongo.Bundles.update_one({"uuid": uuid}, {"$set": {"not_before": "2021-01-01T00:00:00"}})
+    ret = await r.request('POST', pop_url, claimant_body)
+    assert ret['bundle']['uuid'] == uuid
+    ret = await r.request('PATCH', f'/Bundles/{uuid}', {"status": "quarantined", "reason": "HPSS unavailable"})
+    assert ret['status'] == 'quarantined'
+    assert ret['retry_count'] == 2
+
+    # an operator's quarantine is always final
+    r2 = rest('admin')
+    await r2.request('PATCH', f'/Bundles/{uuid}', {"status": "taping", "claimed": False})
+    ret = await r2.request('PATCH', f'/Bundles/{uuid}', {"status": "quarantined"})
+    assert ret['status'] == 'quarantined'
+
 @pytest.mark.asyncio
 async def test_bundles_actions_pop_at_destination(mongo, rest):
     """Check pop action for bundles at destination."""
@@ -836,6 +1446,315 @@ async def test_bundles_actions_pop_at_destination(mongo, rest):
     assert ret['bundle']
     assert ret['bundle']["path"] == "/data/exp/IceCube/2014/15f7a399-fe40-4337-bb7e-d68d2d28ec8e.zip"
 
+@pytest.mark.asyncio
+async def test_bundles_actions_pop_priority(mongo, rest):
+    """Check that pop action for bundles honors priority before work_priority_timestamp."""
+    r = rest('system')
+
+    request = {'source': 'WIPAC', 'dest': 'NERSC', 'path': '/data/exp/IceCube/2013', 'priority': 10}
+    ret = await r.request('POST', '/TransferRequests', request)
+    urgent_uuid = ret['TransferRequest']
+
+    test_data = {
+        'bundles': [
+            {
+                "source": "WIPAC",
+                "dest": "NERSC",
+                "path": "/data/exp/IceCube/2014/15f7a399-fe40-4337-bb7e-d68d2d28ec8e.zip",
+                "status": "specified",
+                "priority": 0,
+            },
+            {
+                "source": "WIPAC",
+                "dest": "NERSC",
+                "path": "/data/exp/IceCube/2013/3bcd05f5-ceb8-4eb5-a5db-5f7d55a98ff4.zip",
+                "request": urgent_uuid,
+                "status": "specified",
+            },
+        ]
+    }
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    assert ret["count"] == 2
+
+    # the bundle inherited the priority of its transfer request
+    ret = await r.request('GET', f'/Bundles/{ret["bundles"][1]}')
+    assert ret["priority"] == 10
+
+    # the more urgent bundle is popped first, even though it is younger
+    claimant_body = {
+        'claimant': 'testing-bundler-aaaed864-0112-4bcf-a069-bb55c12e291d',
+    }
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&status=specified', claimant_body)
+    assert ret['bundle']["path"] == "/data/exp/IceCube/2013/3bcd05f5-ceb8-4eb5-a5db-5f7d55a98ff4.zip"
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&status=specified', claimant_body)
+    assert ret['bundle']["path"] == "/data/exp/IceCube/2014/15f7a399-fe40-4337-bb7e-d68d2d28ec8e.zip"
+
+    # bad priorities are rejected
+    test_data = {'bundles': [{"source": "WIPAC", "priority": "urgent"}]}
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    assert e.value.response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_transfer_request_actions_prioritize(mongo, rest):
+    """Check that the prioritize action updates a transfer request and its bundles."""
+    r = rest('system')
+
+    request = {'source': 'WIPAC', 'dest': 'NERSC', 'path': '/data/exp/IceCube/2013'}
+    ret = await r.request('POST', '/TransferRequests', request)
+    uuid = ret['TransferRequest']
+    ret = await r.request('GET', f'/TransferRequests/{uuid}')
+    assert ret['priority'] == 0
+
+    test_data = {
+        'bundles': [
+            {"source": "WIPAC", "dest": "NERSC", "request": uuid, "status": "specified"},
+            {"source": "WIPAC", "dest": "NERSC", "request": uuid, "status": "created"},
+            {"source": "WIPAC", "dest": "NERSC", "request": "some-other-request", "status": "created"},
+        ]
+    }
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    bundle_uuids = ret["bundles"]
+
+    ret = await r.request('POST', f'/TransferRequests/{uuid}/actions/prioritize', {'priority': 5})
+    assert ret == {'transfer_request': uuid, 'priority': 5, 'count': 2}
+
+    ret = await r.request('GET', f'/TransferRequests/{uuid}')
+    assert ret['priority'] == 5
+    for bundle_uuid in bundle_uuids[:2]:
+        ret = await r.request('GET', f'/Bundles/{bundle_uuid}')
+        assert ret['priority'] == 5
+    ret = await r.request('GET', f'/Bundles/{bundle_uuids[2]}')
+    assert ret['priority'] == 0
+
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', f'/TransferRequests/{uuid}/actions/prioritize', {})
+    assert e.value.response.status_code == 400
+
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', f'/TransferRequests/{uuid}/actions/prioritize', {'priority': "high"})
+    assert e.value.response.status_code == 400
+
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', '/TransferRequests/048c812c780648de8f39a2422e2dcdb0/actions/prioritize', {'priority': 1})
+    assert e.value.response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_bundles_and_transfer_requests_etag(mongo, rest, port):
+    """Check that single Bundle and TransferRequest routes answer conditional GETs."""
+    r = rest('system')
+    r2 = requests.get(CONFIG['TOKEN_SERVICE']+'/token', params={'scope': 'lta:system'})
+    r2.raise_for_status()
+    auth = {'Authorization': f"Bearer {r2.json()['access']}"}
+    http_client = AsyncHTTPClient()
+
+    request = {'source': 'WIPAC', 'dest': 'NERSC', 'path': '/data/exp/IceCube/2013'}
+    ret = await r.request('POST', '/TransferRequests', request)
+    request_uuid = ret['TransferRequest']
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', {'bundles': [{"source": "WIPAC", "request": request_uuid}]})
+    bundle_uuid = ret['bundles'][0]
+
+    for route in [f'/Bundles/{bundle_uuid}', f'/TransferRequests/{request_uuid}']:
+        url = f'http://localhost:{port}{route}'
+        # the first GET provides an ETag
+        resp = await http_client.fetch(url, headers=auth)
+        assert resp.code == 200
+        etag = resp.headers['Etag']
+        assert etag
+        # polling with the ETag gets a body-less 304
+        resp = await http_client.fetch(url, headers={**auth, 'If-None-Match': etag}, raise_error=False)
+        assert resp.code == 304
+        assert not resp.body
+        # a change to the document changes the ETag
+        await r.request('PATCH', route, {'status': 'changed', 'version': 99})
+        resp = await http_client.fetch(url, headers={**auth, 'If-None-Match': etag}, raise_error=False)
+        assert resp.code == 200
+        assert resp.headers['Etag'] != etag
+        assert json_decode(resp.body)['version'] == 2
+
+@pytest.mark.asyncio
+async def test_bundles_actions_transition(mongo, rest):
+    """Check that the transition action only advances a Bundle held by the claimant."""
+    r = rest('system')
+
+    test_data = {'bundles': [{"source": "WIPAC", "dest": "NERSC", "status": "created"}]}
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', test_data)
+    uuid = ret["bundles"][0]
+    claimant_body = {'claimant': 'testing-rate_limiter-aaaed864-0112-4bcf-a069-bb55c12e291d'}
+    ret = await r.request('POST', '/Bundles/actions/pop?source=WIPAC&status=created', claimant_body)
+    assert ret['bundle']['uuid'] == uuid
+
+    # someone else can't move the bundle along
+    transition = {
+        'from_status': 'created',
+        'to_status': 'staged',
+        'claimant': 'testing-rate_limiter-3e4da7c3-bb73-4ab3-b6a6-02ceff6501fc',
+    }
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', f'/Bundles/{uuid}/actions/transition', transition)
+    assert e.value.response.status_code == 409
+
+    # the claimant can move the bundle along, which releases the claim
+    transition['claimant'] = claimant_body['claimant']
+    transition['update'] = {'bundle_path': '/path/to/staged/bundle.zip'}
+    ret = await r.request('POST', f'/Bundles/{uuid}/actions/transition', transition)
+    assert ret['status'] == 'staged'
+    assert ret['bundle_path'] == '/path/to/staged/bundle.zip'
+    assert not ret['claimed']
+
+    # doing it twice is a conflict, not a double-process
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', f'/Bundles/{uuid}/actions/transition', transition)
+    assert e.value.response.status_code == 409
+
+    # bad requests
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', '/Bundles/048c812c780648de8f39a2422e2dcdb0/actions/transition', transition)
+    assert e.value.response.status_code == 404
+    for field in ['from_status', 'to_status', 'claimant']:
+        bad_transition = dict(transition)
+        del bad_transition[field]
+        with pytest.raises(HTTPError) as e:
+            await r.request('POST', f'/Bundles/{uuid}/actions/transition', bad_transition)
+        assert e.value.response.status_code == 400
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', f'/Bundles/{uuid}/actions/transition', {**transition, 'update': []})
+    assert e.value.response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_archive_terminal_documents(mongo, rest):
+    """Check that old finished work moves to the archive collections."""
+    r = rest('system')
+
+    old = (datetime.utcnow() - timedelta(days=30)).isoformat(timespec='seconds')
+    cutoff = (datetime.utcnow() - timedelta(days=7)).isoformat()
+    mongo.TransferRequests.insert_many([
+        {"uuid": "a1", "status": "completed", "update_timestamp": old},
+        {"uuid": "b2", "status": "completed", "update_timestamp": datetime.utcnow().isoformat(timespec='seconds')},
+        {"uuid": "c3", "status": "unclaimed", "update_timestamp": old},
+    ])
+    mongo.Bundles.insert_many([
+        {"uuid": "d4", "request": "a1", "status": "finished", "update_timestamp": old},
+        {"uuid": "e5", "request": "a1", "status": "deleted", "update_timestamp": old},
+        {"uuid": "f6", "request": "b2", "status": "finished", "update_timestamp": old},
+        {"uuid": "g7", "request": "c3", "status": "specified", "update_timestamp": old},
+    ])
+
+    motor_db = MotorClient(f"mongodb://{CONFIG['LTA_MONGODB_HOST']}",
+                           port=int(CONFIG['LTA_MONGODB_PORT']))[CONFIG['LTA_MONGODB_DATABASE_NAME']]
+    count = await archive_terminal_documents(motor_db, cutoff)
+    assert count == 3
+    assert mongo.TransferRequests.count_documents({}) == 2
+    assert mongo.TransferRequestsArchive.count_documents({"uuid": "a1"}) == 1
+    assert mongo.Bundles.count_documents({}) == 2
+    assert mongo.BundlesArchive.count_documents({"request": "a1"}) == 2
+
+    # running again finds nothing left to do
+    assert await archive_terminal_documents(motor_db, cutoff) == 0
+
+    # archived documents are only visible when asked for
+    with pytest.raises(HTTPError) as e:
+        await r.request('GET', '/TransferRequests/a1')
+    assert e.value.response.status_code == 404
+    ret = await r.request('GET', '/TransferRequests/a1?archived=true')
+    assert ret["status"] == "completed"
+    ret = await r.request('GET', '/TransferRequests')
+    assert len(ret["results"]) == 2
+    ret = await r.request('GET', '/TransferRequests?archived=true')
+    assert len(ret["results"]) == 3
+
+    with pytest.raises(HTTPError) as e:
+        await r.request('GET', '/Bundles/d4')
+    assert e.value.response.status_code == 404
+    ret = await r.request('GET', '/Bundles/d4?archived=true')
+    assert ret["status"] == "finished"
+    ret = await r.request('GET', '/Bundles?request=a1')
+    assert ret["results"] == []
+    ret = await r.request('GET', '/Bundles?request=a1&archived=true')
+    assert sorted(ret["results"]) == ["d4", "e5"]
+
+@pytest.mark.asyncio
+async def test_archive_terminal_documents_unfinished_bundles(mongo):
+    """Check that a finished TransferRequest waits for all of its Bundles before moving to the archive."""
+    old = (datetime.utcnow() - timedelta(days=30)).isoformat(timespec='seconds')
+    cutoff = (datetime.utcnow() - timedelta(days=7)).isoformat()
+    mongo.TransferRequests.insert_many([
+        {"uuid": "a1", "status": "completed", "update_timestamp": old},
+    ])
+    mongo.Bundles.insert_many([
+        {"uuid": "d4", "request": "a1", "status": "finished", "update_timestamp": old},
+        {"uuid": "e5", "request": "a1", "status": "quarantined", "update_timestamp": old},
+    ])
+
+    motor_db = MotorClient(f"mongodb://{CONFIG['LTA_MONGODB_HOST']}",
+                           port=int(CONFIG['LTA_MONGODB_PORT']))[CONFIG['LTA_MONGODB_DATABASE_NAME']]
+    assert await archive_terminal_documents(motor_db, cutoff) == 0
+    assert mongo.TransferRequests.count_documents({"uuid": "a1"}) == 1
+    assert mongo.Bundles.count_documents({"request": "a1"}) == 2
+    assert mongo.TransferRequestsArchive.count_documents({}) == 0
+
+    # once the last Bundle is finished, they all move together
+    mongo.Bundles.update_one({"uuid": "e5"}, {"$set": {"status": "finished"}})
+    assert await archive_terminal_documents(motor_db, cutoff) == 3
+    assert mongo.Bundles.count_documents({"request": "a1"}) == 0
+    assert mongo.BundlesArchive.count_documents({"request": "a1"}) == 2
+
+@pytest.mark.asyncio
+async def test_events_stages(mongo, rest):
+    """Check that status changes are logged and folded into stage times."""
+    r = rest('system')
+
+    ret = await r.request('POST', '/TransferRequests', {'source': 'WIPAC', 'dest': 'NERSC', 'path': '/data/exp/IceCube/2013'})
+    request_uuid = ret['TransferRequest']
+    await r.request('POST', '/TransferRequests/actions/pop?source=WIPAC', {'claimant': 'testing-picker'})
+    ret = await r.request('POST', '/Bundles/actions/bulk_create', {'bundles': [{"source": "WIPAC", "request": request_uuid, "status": "specified"}]})
+    bundle_uuid = ret['bundles'][0]
+    await r.request('POST', '/Bundles/actions/pop?source=WIPAC&status=specified', {'claimant': 'testing-bundler'})
+    await r.request('PATCH', f'/Bundles/{bundle_uuid}', {'status': 'created', 'claimed': False})
+    await r.request('PATCH', f'/Bundles/{bundle_uuid}', {'reason': 'no status change'})
+    await r.request('POST', '/Bundles/actions/bulk_update', {'bundles': [bundle_uuid], 'update': {'status': 'staged'}})
+    await r.request('PATCH', f'/TransferRequests/{request_uuid}', {'status': 'completed'})
+
+    events = list(mongo.Events.find({'uuid': bundle_uuid}, projection=REMOVE_ID).sort('_id'))
+    assert [(x['event'], x['from_status'], x['to_status']) for x in events] == [
+        ('create', None, 'specified'),
+        ('claim', 'specified', 'specified'),
+        ('status', 'specified', 'created'),
+        ('status', 'created', 'staged'),
+    ]
+    assert events[1]['claimant'] == 'testing-bundler'
+    events = list(mongo.Events.find({'uuid': request_uuid}, projection=REMOVE_ID).sort('_id'))
+    assert [(x['event'], x['from_status'], x['to_status']) for x in events] == [
+        ('create', None, 'unclaimed'),
+        ('claim', 'unclaimed', 'processing'),
+        ('status', 'processing', 'completed'),
+    ]
+
+    ret = await r.request('GET', '/Events/stages?type=TransferRequest')
+    assert ret['stages']['unclaimed']['dwell']['count'] == 1
+    assert ret['stages']['processing']['processing']['count'] == 1
+    ret = await r.request('GET', '/Events/stages')
+    assert ret['type'] == 'Bundle'
+    assert ret['stages']['specified']['dwell']['count'] == 1
+    assert ret['stages']['specified']['processing']['count'] == 1
+    assert ret['stages']['created']['dwell']['count'] == 1
+    assert ret['stages']['created']['processing'] == {'count': 0}
+
+    # check the arithmetic on a known history
+    mongo.Events.delete_many({})
+    mongo.Events.insert_many([
+        {"type": "Bundle", "uuid": "a", "event": "create", "from_status": None, "to_status": "staged", "claimant": None, "timestamp": "2021-01-01T00:00:00"},
+        {"type": "Bundle", "uuid": "a", "event": "claim", "from_status": "staged", "to_status": "staged", "claimant": "x", "timestamp": "2021-01-01T00:00:10"},
+        {"type": "Bundle", "uuid": "a", "event": "status", "from_status": "staged", "to_status": "transferring", "claimant": "x", "timestamp": "2021-01-01T00:01:10"},
+        {"type": "Bundle", "uuid": "b", "event": "create", "from_status": None, "to_status": "staged", "claimant": None, "timestamp": "2021-01-01T00:00:00"},
+        {"type": "Bundle", "uuid": "b", "event": "claim", "from_status": "staged", "to_status": "staged", "claimant": "y", "timestamp": "2021-01-01T00:00:30"},
+        {"type": "Bundle", "uuid": "b", "event": "status", "from_status": "staged", "to_status": "transferring", "claimant": "y", "timestamp": "2021-01-01T00:00:50"},
+    ])
+    ret = await r.request('GET', '/Events/stages?type=Bundle&since=2021-01-01T00:00:00')
+    assert ret['stages']['staged']['dwell'] == {"count": 2, "mean": 20.0, "p50": 10.0, "p90": 30.0, "p99": 30.0, "max": 30.0}
+    assert ret['stages']['staged']['processing'] == {"count": 2, "mean": 40.0, "p50": 20.0, "p90": 60.0, "p99": 60.0, "max": 60.0}
+    assert 'transferring' not in ret['stages']
+
 @pytest.mark.asyncio
 async def test_bundles_actions_bulk_create_huge(mongo, rest):
     """Check pop action for bundles at destination."""
@@ -1177,6 +2096,168 @@ async def test_metadata_actions_bulk_delete_errors(rest):
     assert e.value.response.status_code == 400
     assert e.value.response.json()["error"] == "`metadata`: (ValueError) [] is forbidden ([[]])"
 
+@pytest.fixture
+def streaming_bodies(monkeypatch):
+    """Configure the REST server to stream every bulk body."""
+    monkeypatch.setenv("LTA_STREAM_BODY_THRESHOLD", "0")
+
+@pytest.mark.asyncio
+async def test_metadata_actions_bulk_streaming(mongo, streaming_bodies, rest):
+    """Check that streamed bulk bodies create and delete Metadata in chunks."""
+    r = rest(role='system', timeout=10.0)
+    bundle_uuid = "291afc8d-2a04-4d85-8669-dc8e2c2ab406"
+    files = [unique_id() for i in range(1500)]
+    ret = await r.request('POST', '/Metadata/actions/bulk_create', {'bundle_uuid': bundle_uuid, 'files': files})
+    # a streamed response doesn't echo what it created
+    assert ret == {'count': 1500}
+    assert mongo.Metadata.count_documents({'bundle_uuid': bundle_uuid}) == 1500
+    assert sorted(row['file_catalog_uuid'] for row in mongo.Metadata.find({'bundle_uuid': bundle_uuid})) == sorted(files)
+
+    # the bundle_uuid must come before the files, so we needn't hold them while waiting for it
+    with pytest.raises(HTTPError) as e:
+        await r.request('POST', '/Metadata/actions/bulk_create', {'files': files[:3], 'bundle_uuid': 'another'})
+    assert e.value.response.status_code == 400
+    assert e.value.response.json()["error"] == "`bundle_uuid`: (ValueError) must come before `files` in a streamed body"
+    assert mongo.Metadata.count_documents({'bundle_uuid': 'another'}) == 0
+
+    uuids = [row['uuid'] for row in mongo.Metadata.find({'bundle_uuid': bundle_uuid})] + [unique_id()]
+    ret = await r.request('POST', '/Metadata/actions/bulk_delete', {'metadata': uuids})
+    assert ret == {'count': 1500}
+    assert mongo.Metadata.count_documents({'bundle_uuid': bundle_uuid}) == 0
+
+@pytest.mark.asyncio
+async def test_metadata_actions_bulk_streaming_memory(mongo, streaming_bodies, rest, monkeypatch):
+    """Check that streamed bulk bodies are handled a chunk at a time, without buffering the whole body."""
+    r = rest(role='system', timeout=30.0)
+    held = []
+    for handler in [MetadataActionsBulkCreateHandler, MetadataActionsBulkDeleteHandler]:
+        stream_items = handler.stream_items
+
+        async def spy(self, items, final, stream_items=stream_items):
+            await stream_items(self, items, final)
+            held.append((type(self), len(items), len(self.pending)))
+
+        monkeypatch.setattr(handler, "stream_items", spy)
+    bundle_uuid = "291afc8d-2a04-4d85-8669-dc8e2c2ab406"
+    files = [unique_id() for i in range(2500)]
+    ret = await r.request('POST', '/Metadata/actions/bulk_create', {'bundle_uuid': bundle_uuid, 'files': files})
+    assert ret == {'count': 2500}
+    uuids = [row['uuid'] for row in mongo.Metadata.find({'bundle_uuid': bundle_uuid})]
+    ret = await r.request('POST', '/Metadata/actions/bulk_delete', {'metadata': uuids})
+    assert ret == {'count': 2500}
+    for handler, chunk_size in [(MetadataActionsBulkCreateHandler, CREATE_CHUNK_SIZE), (MetadataActionsBulkDeleteHandler, DELETE_CHUNK_SIZE)]:
+        calls = [(items, pending) for kind, items, pending in held if kind is handler]
+        # the body arrived in more than one chunk, and each was handled as it arrived
+        assert len([items for items, pending in calls if items]) > 1
+        assert max(items for items, pending in calls) < 2500
+        # nothing holds on to more than a chunk of UUIDs between chunks
+        assert max(pending for items, pending in calls) < chunk_size
+
+@pytest.mark.asyncio
+async def test_metadata_actions_bulk_streaming_errors(mongo, streaming_bodies, rest, port):
+    """Check that streamed bulk bodies fail the same way as buffered ones."""
+    r = rest('system')
+    for request, error in [
+        ({}, "`bundle_uuid`: (MissingArgumentError) required argument is missing"),
+        ({'bundle_uuid': []}, "`bundle_uuid`: (TypeError) [] (<class 'list'>) is not <class 'str'>"),
+        ({'bundle_uuid': "992ae5e1"}, "`files`: (MissingArgumentError) required argument is missing"),
+        ({'bundle_uuid': "992ae5e1", "files": {}}, "`files`: (TypeError) {} (<class 'dict'>) is not <class 'list'>"),
+        ({'bundle_uuid': "992ae5e1", "files": []}, "`files`: (ValueError) [] is forbidden ([[]])"),
+    ]:
+        with pytest.raises(HTTPError) as e:
+            await r.request('POST', '/Metadata/actions/bulk_create', request)
+        assert e.value.response.status_code == 400
+        assert e.value.response.json()["error"] == error
+    for request, error in [
+        ({}, "`metadata`: (MissingArgumentError) required argument is missing"),
+        ({'metadata': []}, "`metadata`: (ValueError) [] is forbidden ([[]])"),
+    ]:
+        with pytest.raises(HTTPError) as e:
+            await r.request('POST', '/Metadata/actions/bulk_delete', request)
+        assert e.value.response.status_code == 400
+        assert e.value.response.json()["error"] == error
+
+    # a body that goes bad part way through leaves nothing behind
+    r2 = requests.get(CONFIG['TOKEN_SERVICE']+'/token', params={'scope': 'lta:system'})
+    r2.raise_for_status()
+    auth = {'Authorization': f"Bearer {r2.json()['access']}"}
+    body = '{"bundle_uuid": "992ae5e1", "files": [' + ', '.join(f'"{unique_id()}"' for i in range(1500)) + ', oops]}'
+    url = f'http://localhost:{port}/Metadata/actions/bulk_create'
+    resp = await AsyncHTTPClient().fetch(url, method='POST', headers=auth, body=body, raise_error=False)
+    assert resp.code == 400
+    assert mongo.Metadata.count_documents({}) == 0
+
+    # streamed bodies are only accepted from authorized callers
+    r2 = requests.get(CONFIG['TOKEN_SERVICE']+'/token', params={'scope': 'lta:user'})
+    r2.raise_for_status()
+    auth = {'Authorization': f"Bearer {r2.json()['access']}"}
+    resp = await AsyncHTTPClient().fetch(url, method='POST', headers=auth, body='{"bundle_uuid": "992ae5e1", "files": ["a"]}', raise_error=False)
+    assert resp.code == 403
+    assert mongo.Metadata.count_documents({}) == 0
+
+@pytest.fixture
+def one_at_a_time(monkeypatch):
+    """Configure the REST server to admit one request at a time, and two per client in a burst."""
+    monkeypatch.setenv("LTA_ADMISSION_BURST", "2")
+    monkeypatch.setenv("LTA_ADMISSION_MAX_CONCURRENT", "1")
+    monkeypatch.setenv("LTA_ADMISSION_RATE_PER_SECOND", "0.001")
+
+@pytest.mark.asyncio
+async def test_metadata_actions_bulk_streaming_admission(mongo, streaming_bodies, one_at_a_time, rest, port):
+    """Check that streamed bulk bodies are admitted before they touch the database, and released after."""
+    r = rest(role='system', timeout=10.0)
+    # one at a time, so each streamed request must be released for the next to be admitted
+    for bundle_uuid in ["291afc8d", "992ae5e1"]:
+        ret = await r.request('POST', '/Metadata/actions/bulk_create', {'bundle_uuid': bundle_uuid, 'files': [unique_id()]})
+        assert ret['count'] == 1
+    # the burst is spent; the third is turned away before any of it is written
+    r2 = requests.get(CONFIG['TOKEN_SERVICE']+'/token', params={'scope': 'lta:system'})
+    r2.raise_for_status()
+    auth = {'Authorization': f"Bearer {r2.json()['access']}"}
+    url = f'http://localhost:{port}/Metadata/actions/bulk_create'
+    body = json_encode({'bundle_uuid': "c6d2d0f4", 'files': [unique_id() for i in range(1500)]})
+    resp = await AsyncHTTPClient().fetch(url, method='POST', headers=auth, body=body, raise_error=False)
+    assert resp.code == 429
+    assert int(resp.headers["Retry-After"]) > 0
+    assert mongo.Metadata.count_documents({}) == 2
+
+@pytest.mark.asyncio
+async def test_metadata_actions_bulk_uuid_array(mongo, streaming_bodies, rest):
+    """Check that bulk Metadata routes accept and produce packed UUID arrays."""
+    rc = rest(role='system', timeout=10.0)
+    with pytest.raises(TypeError):
+        await post_uuid_array(rc, '/Metadata/actions/bulk_delete', pack_uuids([unique_id()], dashed=False))
+    metrics = ComponentMetrics("picker")
+    r = MeteredRestClient(rc.address, metrics, token=rc.access_token, timeout=10.0, retries=0)
+    bundle_uuid = "291afc8d-2a04-4d85-8669-dc8e2c2ab406"
+    files = [str(uuid1()) for i in range(1500)]
+    ret = await post_uuid_array(r, '/Metadata/actions/bulk_create', pack_uuids(files, dashed=True), {'bundle_uuid': bundle_uuid})
+    metadata = unpack_uuids(ret, dashed=False)
+    assert len(metadata) == 1500
+    assert mongo.Metadata.count_documents({'bundle_uuid': bundle_uuid}) == 1500
+    row = mongo.Metadata.find_one({'uuid': metadata[0]})
+    assert row['file_catalog_uuid'] == files[0]
+
+    ret = await post_uuid_array(r, '/Metadata/actions/bulk_delete', pack_uuids(metadata + [unique_id()], dashed=False))
+    assert ret == {'count': 1500}
+    assert mongo.Metadata.count_documents({'bundle_uuid': bundle_uuid}) == 0
+
+    for path, body, error in [
+        ('/Metadata/actions/bulk_create?bundle_uuid=992ae5e1', b'', "`files`: (ValueError) [] is forbidden ([[]])"),
+        ('/Metadata/actions/bulk_create?bundle_uuid=992ae5e1', b'short', "`files`: (ValueError) UUID array of 5 bytes is not a multiple of 16 bytes"),
+        ('/Metadata/actions/bulk_delete', b'', "`metadata`: (ValueError) [] is forbidden ([[]])"),
+    ]:
+        with pytest.raises(HTTPError) as e:
+            await post_uuid_array(r, path, body)
+        assert e.value.response.status_code == 400
+        assert e.value.response.json()["error"] == error
+    with pytest.raises(HTTPError) as e:
+        await post_uuid_array(r, '/Metadata/actions/bulk_create', pack_uuids(files, dashed=True))
+    assert e.value.response.status_code == 400
+    # the requests are timed like any other
+    assert metrics.rest["POST /Metadata/actions/bulk_create"]["count"] == 4
+    assert metrics.rest["POST /Metadata/actions/bulk_delete"]["count"] == 2
+
 @pytest.mark.asyncio
 async def test_metadata_delete_errors(rest):
     """Check error conditions for DELETE /Metadata."""
@@ -1219,3 +2300,23 @@ async def test_metadata_results_comprehension(mongo, rest):
     for result in results:
         assert uuids[count] == result['uuid']
         count = count + 1
+
+@pytest.mark.asyncio
+async def test_query_plans(rest, monkeypatch):
+    """Check that GET /QueryPlans reports the audited plans to admins only."""
+    plans = [
+        {"name": "Bundles by uuid", "collection": "Bundles", "missing_index": None},
+        {"name": "TransferRequests archive", "collection": "TransferRequests", "missing_index": [["status", 1]]},
+    ]
+
+    async def audit_query_plans(db):
+        return plans
+
+    monkeypatch.setattr("lta.rest_server.audit_query_plans", audit_query_plans)
+    r = rest('admin')
+    ret = await r.request('GET', '/QueryPlans')
+    assert ret == {"plans": plans, "missing_indexes": ["TransferRequests archive"]}
+    r = rest('system')
+    with pytest.raises(HTTPError) as e:
+        await r.request('GET', '/QueryPlans')
+    assert e.value.response.status_code == 403
@@ -1,6 +1,7 @@
 # test_site_move_verifier.py
 """Unit tests for lta/site_move_verifier.py."""
 
+from subprocess import PIPE
 from unittest.mock import call, MagicMock
 
 import pytest  # type: ignore
@@ -17,16 +18,27 @@ def config():
         "COMPONENT_NAME": "testing-site_move_verifier",
         "DEST_ROOT_PATH": "/path/to/rse",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_STATUS": "transferring",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "OUTPUT_STATUS": "taping",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
         "USE_FULL_BUNDLE_PATH": "FALSE",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -89,7 +101,8 @@ def test_constructor_config(config, mocker):
     assert p.work_timeout_seconds == 30
     assert p.logger == logger_mock
 
-def test_do_status(config, mocker):
+@pytest.mark.asyncio
+async def test_do_status(config, mocker):
     """Verify that the SiteMoveVerifier has additional state to offer."""
     logger_mock = mocker.MagicMock()
     run_mock = mocker.patch("lta.site_move_verifier.run", new_callable=MagicMock)
@@ -100,6 +113,9 @@ def test_do_status(config, mocker):
         stderr="",
     )
     p = SiteMoveVerifier(config, logger_mock)
+    assert p._do_status() == {"quota": []}
+    await p._update_quota()
+    run_mock.assert_called_with(MYQUOTA_ARGS, stdout=PIPE, stderr=PIPE)
     assert p._do_status() == {
         "quota": [
             {
@@ -123,7 +139,8 @@ def test_do_status(config, mocker):
         ]
     }
 
-def test_do_status_myquota_fails(config, mocker):
+@pytest.mark.asyncio
+async def test_do_status_myquota_fails(config, mocker):
     """Verify that the SiteMoveVerifier has no additional state to offer."""
     logger_mock = mocker.MagicMock()
     run_mock = mocker.patch("lta.site_move_verifier.run", new_callable=MagicMock)
@@ -134,6 +151,10 @@ def test_do_status_myquota_fails(config, mocker):
         stderr="nersc file systems burned down; again",
     )
     p = SiteMoveVerifier(config, logger_mock)
+    await p._update_quota()
+    assert p._do_status() == {"quota": []}
+    run_mock.side_effect = FileNotFoundError("myquota")
+    await p._update_quota()
     assert p._do_status() == {"quota": []}
 
 @pytest.mark.asyncio
@@ -144,16 +165,27 @@ async def test_site_move_verifier_logs_configuration(mocker):
         "COMPONENT_NAME": "logme-testing-site_move_verifier",
         "DEST_ROOT_PATH": "/path/to/some/archive/destination",
         "DEST_SITE": "NERSC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_STATUS": "transferring",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://zjwdm5ggeEgS1tZDZy9l1DOZU53uiSO4Urmyb8xL0.com/",
         "OUTPUT_STATUS": "taping",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "WIPAC",
         "USE_FULL_BUNDLE_PATH": "FALSE",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -164,16 +196,27 @@ async def test_site_move_verifier_logs_configuration(mocker):
         call('COMPONENT_NAME = logme-testing-site_move_verifier'),
         call('DEST_ROOT_PATH = /path/to/some/archive/destination'),
         call('DEST_SITE = NERSC'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_STATUS = transferring'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://zjwdm5ggeEgS1tZDZy9l1DOZU53uiSO4Urmyb8xL0.com/'),
         call('OUTPUT_STATUS = taping'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = WIPAC'),
         call('USE_FULL_BUNDLE_PATH = FALSE'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90')
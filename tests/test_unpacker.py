@@ -1,12 +1,17 @@
 # test_unpacker.py
 """Unit tests for lta/unpacker.py."""
 
+import hashlib
+import json
+import os
+import time
 from unittest.mock import call, mock_open, patch
+from zipfile import ZipFile
 
 import pytest  # type: ignore
 from tornado.web import HTTPError  # type: ignore
 
-from lta.unpacker import Unpacker, main
+from lta.unpacker import extract_bundle_archive, Unpacker, main
 from .test_util import AsyncMock
 
 
@@ -14,23 +19,36 @@ from .test_util import AsyncMock
 def config():
     """Supply a stock Unpacker component configuration."""
     return {
+        "CLAIM_LOCALITY": "NONE",
         "CLEAN_OUTBOX": "TRUE",
         "COMPONENT_NAME": "testing-unpacker",
         "DEST_SITE": "WIPAC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "1",
         "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-token",
         "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "3",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "30",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "60",
+        "HTTP_POOL_SIZE": "10",
         "INPUT_STATUS": "unpacking",
+        "LOCALITY_TAG": "localhost",
         "LTA_REST_TOKEN": "fake-lta-rest-token",
         "LTA_REST_URL": "http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "OUTPUT_STATUS": "completed",
         "PATH_MAP_JSON": "/tmp/lta/testing/path_map.json",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "NERSC",
         "UNPACKER_OUTBOX_PATH": "/tmp/lta/testing/unpacker/outbox",
         "UNPACKER_WORKBOX_PATH": "/tmp/lta/testing/unpacker/workbox",
+        "WORK_BACKOFF_FACTOR": "2",
+        "WORK_BACKOFF_JITTER": "0.5",
+        "WORK_BACKOFF_MIN_SECONDS": "1",
+        "WORK_CONCURRENCY": "1",
         "WORK_RETRIES": "3",
         "WORK_SLEEP_DURATION_SECONDS": "60",
         "WORK_TIMEOUT_SECONDS": "30",
@@ -144,23 +162,36 @@ async def test_unpacker_logs_configuration(mocker, path_map_mock):
     """Test to make sure the Unpacker logs its configuration."""
     logger_mock = mocker.MagicMock()
     unpacker_config = {
+        "CLAIM_LOCALITY": "NONE",
         "CLEAN_OUTBOX": "true",
         "COMPONENT_NAME": "logme-testing-unpacker",
         "DEST_SITE": "WIPAC",
+        "EXECUTOR_TYPE": "THREAD",
+        "EXECUTOR_WORKERS": "2",
         "FILE_CATALOG_REST_TOKEN": "fake-file-catalog-token",
         "FILE_CATALOG_REST_URL": "http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/",
         "HEARTBEAT_PATCH_RETRIES": "1",
         "HEARTBEAT_PATCH_TIMEOUT_SECONDS": "20",
         "HEARTBEAT_SLEEP_DURATION_SECONDS": "30",
+        "HTTP_POOL_SIZE": "4",
         "INPUT_STATUS": "unpacking",
+        "LOCALITY_TAG": "localhost",
         "LTA_REST_TOKEN": "logme-fake-lta-rest-token",
         "LTA_REST_URL": "logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/",
         "OUTPUT_STATUS": "completed",
         "PATH_MAP_JSON": "logme/tmp/lta/testing/path_map.json",
+        "PROFILE_DIR": "/tmp/lta-profiles",
+        "PROFILE_ENABLED": "False",
+        "PROFILE_MODE": "CPROFILE",
+        "PROMETHEUS_METRICS_PORT": "0",
         "RUN_ONCE_AND_DIE": "False",
         "SOURCE_SITE": "NERSC",
         "UNPACKER_OUTBOX_PATH": "logme/tmp/lta/testing/unpacker/outbox",
         "UNPACKER_WORKBOX_PATH": "logme/tmp/lta/testing/unpacker/workbox",
+        "WORK_BACKOFF_FACTOR": "3",
+        "WORK_BACKOFF_JITTER": "0.25",
+        "WORK_BACKOFF_MIN_SECONDS": "5",
+        "WORK_CONCURRENCY": "2",
         "WORK_RETRIES": "5",
         "WORK_SLEEP_DURATION_SECONDS": "70",
         "WORK_TIMEOUT_SECONDS": "90",
@@ -168,23 +199,36 @@ async def test_unpacker_logs_configuration(mocker, path_map_mock):
     Unpacker(unpacker_config, logger_mock)
     EXPECTED_LOGGER_CALLS = [
         call("unpacker 'logme-testing-unpacker' is configured:"),
+        call('CLAIM_LOCALITY = NONE'),
         call('CLEAN_OUTBOX = true'),
         call('COMPONENT_NAME = logme-testing-unpacker'),
         call('DEST_SITE = WIPAC'),
+        call('EXECUTOR_TYPE = THREAD'),
+        call('EXECUTOR_WORKERS = 2'),
         call('FILE_CATALOG_REST_TOKEN = fake-file-catalog-token'),
         call('FILE_CATALOG_REST_URL = http://kVj74wBA1AMTDV8zccn67pGuWJqHZzD7iJQHrUJKA.com/'),
         call('HEARTBEAT_PATCH_RETRIES = 1'),
         call('HEARTBEAT_PATCH_TIMEOUT_SECONDS = 20'),
         call('HEARTBEAT_SLEEP_DURATION_SECONDS = 30'),
+        call('HTTP_POOL_SIZE = 4'),
         call('INPUT_STATUS = unpacking'),
+        call('LOCALITY_TAG = localhost'),
         call('LTA_REST_TOKEN = logme-fake-lta-rest-token'),
         call('LTA_REST_URL = logme-http://RmMNHdPhHpH2ZxfaFAC9d2jiIbf5pZiHDqy43rFLQiM.com/'),
         call('OUTPUT_STATUS = completed'),
         call('PATH_MAP_JSON = logme/tmp/lta/testing/path_map.json'),
+        call('PROFILE_DIR = /tmp/lta-profiles'),
+        call('PROFILE_ENABLED = False'),
+        call('PROFILE_MODE = CPROFILE'),
+        call('PROMETHEUS_METRICS_PORT = 0'),
         call('RUN_ONCE_AND_DIE = False'),
         call('SOURCE_SITE = NERSC'),
         call('UNPACKER_OUTBOX_PATH = logme/tmp/lta/testing/unpacker/outbox'),
         call('UNPACKER_WORKBOX_PATH = logme/tmp/lta/testing/unpacker/workbox'),
+        call('WORK_BACKOFF_FACTOR = 3'),
+        call('WORK_BACKOFF_JITTER = 0.25'),
+        call('WORK_BACKOFF_MIN_SECONDS = 5'),
+        call('WORK_CONCURRENCY = 2'),
         call('WORK_RETRIES = 5'),
         call('WORK_SLEEP_DURATION_SECONDS = 70'),
         call('WORK_TIMEOUT_SECONDS = 90'),
@@ -565,25 +609,81 @@ async def test_unpacker_do_work_bundle_path_remapping(config, mocker, path_map_m
         mock_lta_checksums.assert_called_with("/data/exp/IceCube/2013/filtered/PFFilt/1109/PFFilt_PhysicsFiltering_Run00123231_Subrun00000000_00000002.tar.bz2")
 
 
-def test_unpacker_delete_manifest_metadata_v3(config, mocker, path_map_mock):
+@pytest.mark.asyncio
+async def test_unpacker_work_slots_share_outbox(config, mocker, path_map_mock, tmp_path):
+    """Test that two work slots can unpack into the same outbox without losing each other's files."""
+    logger_mock = mocker.MagicMock()
+    workbox = tmp_path / "workbox"
+    outbox = tmp_path / "outbox"
+    warehouse = tmp_path / "warehouse"
+    for path in [workbox, outbox, warehouse]:
+        path.mkdir()
+    config["EXECUTOR_WORKERS"] = "2"
+    config["UNPACKER_OUTBOX_PATH"] = str(outbox)
+    config["UNPACKER_WORKBOX_PATH"] = str(workbox)
+    config["WORK_CONCURRENCY"] = "2"
+    bundle_uuids = ["0869ea50-e437-443f-8cdb-31a350f88e57", "f74db80e-9661-40cc-9f01-8d087af23f56"]
+    pops = []
+    for bundle_uuid in bundle_uuids:
+        data = f"contents of {bundle_uuid}".encode("utf-8")
+        metadata = {
+            "uuid": bundle_uuid,
+            "files": [{
+                "uuid": bundle_uuid,
+                "logical_name": f"/data/exp/{bundle_uuid}.tar.bz2",
+                "file_size": len(data),
+                "checksum": {"sha512": hashlib.sha512(data).hexdigest()},
+            }],
+        }
+        with ZipFile(workbox / f"{bundle_uuid}.zip", mode="w") as bundle_zip:
+            bundle_zip.writestr(f"{bundle_uuid}.metadata.json", json.dumps(metadata))
+            bundle_zip.writestr(f"{bundle_uuid}.tar.bz2", data)
+        pops.append({"bundle": {"uuid": bundle_uuid, "bundle_path": f"/path/at/nersc/{bundle_uuid}.zip", "path": "/data/exp"}})
+
+    def request(method, path, body=None):
+        if path.startswith("/Bundles/actions/pop"):
+            return pops.pop(0) if pops else {"bundle": None}
+        return {}
+
+    def slow_extract(bundle_file_path, outbox_path):
+        extract_bundle_archive(bundle_file_path, outbox_path)
+        # the second bundle is still waiting in the outbox while the first is finished and cleaned up
+        if bundle_uuids[1] in bundle_file_path:
+            time.sleep(0.5)
+
+    request_mock = mocker.patch("rest_tools.client.RestClient.request", new_callable=AsyncMock)
+    request_mock.side_effect = request
+    mocker.patch("lta.unpacker.extract_bundle_archive", side_effect=slow_extract)
+    p = Unpacker(config, logger_mock)
+    p.path_map = {"/data/exp": str(warehouse)}
+    await p._do_work()
+    assert sorted(os.listdir(warehouse)) == sorted(f"{bundle_uuid}.tar.bz2" for bundle_uuid in bundle_uuids)
+    assert not os.listdir(outbox)
+    patches = [c[0][2] for c in request_mock.call_args_list if c[0][0] == "PATCH"]
+    assert sorted(patch_body["status"] for patch_body in patches) == ["completed", "completed"]
+
+
+@pytest.mark.asyncio
+async def test_unpacker_delete_manifest_metadata_v3(config, mocker, path_map_mock):
     """Test that _delete_manifest_metadata will delete metadata of either version."""
     logger_mock = mocker.MagicMock()
     p = Unpacker(config, logger_mock)
     mock_os_remove = mocker.patch("os.remove")
     mock_os_remove.side_effect = [NameError, None]
-    p._delete_manifest_metadata("0869ea50-e437-443f-8cdb-31a350f88e57")
-    mock_os_remove.assert_called_with("/tmp/lta/testing/unpacker/outbox/0869ea50-e437-443f-8cdb-31a350f88e57.metadata.ndjson")
+    await p._delete_manifest_metadata("0869ea50-e437-443f-8cdb-31a350f88e57")
+    mock_os_remove.assert_called_with("/tmp/lta/testing/unpacker/outbox/0869ea50-e437-443f-8cdb-31a350f88e57/0869ea50-e437-443f-8cdb-31a350f88e57.metadata.ndjson")
 
 
-def test_unpacker_delete_manifest_metadata_unknown(config, mocker, path_map_mock):
+@pytest.mark.asyncio
+async def test_unpacker_delete_manifest_metadata_unknown(config, mocker, path_map_mock):
     """Test that _delete_manifest_metadata will throw on an unknown version."""
     logger_mock = mocker.MagicMock()
     p = Unpacker(config, logger_mock)
     mock_os_remove = mocker.patch("os.remove")
     mock_os_remove.side_effect = [NameError, NameError]
     with pytest.raises(NameError):
-        p._delete_manifest_metadata("0869ea50-e437-443f-8cdb-31a350f88e57")
-    mock_os_remove.assert_called_with("/tmp/lta/testing/unpacker/outbox/0869ea50-e437-443f-8cdb-31a350f88e57.metadata.ndjson")
+        await p._delete_manifest_metadata("0869ea50-e437-443f-8cdb-31a350f88e57")
+    mock_os_remove.assert_called_with("/tmp/lta/testing/unpacker/outbox/0869ea50-e437-443f-8cdb-31a350f88e57/0869ea50-e437-443f-8cdb-31a350f88e57.metadata.ndjson")
 
 
 def test_unpacker_read_manifest_metadata_for_v3(config, mocker, path_map_mock):
@@ -656,71 +756,25 @@ def test_unpacker_read_manifest_metadata_v3_no_throw(file_open_mock, config, moc
     assert not p._read_manifest_metadata_v3("0869ea50-e437-443f-8cdb-31a350f88e57")
 
 
-def test_unpacker_clean_outbox_directory_bail_early(config, mocker, path_map_mock):
+@pytest.mark.asyncio
+async def test_unpacker_clean_outbox_directory_bail_early(config, mocker, path_map_mock):
     """Test that _clean_outbox_directory will bail when configured not to clean."""
     logger_mock = mocker.MagicMock()
     config["CLEAN_OUTBOX"] = "FALSE"
-    mock_os_scandir = mocker.patch("os.scandir")
-    p = Unpacker(config, logger_mock)
-    p._clean_outbox_directory()
-    mock_os_scandir.assert_not_called()
-
-
-def test_unpacker_clean_outbox_directory_empty(config, mocker, path_map_mock):
-    """Test that _clean_outbox_directory will bail when configured not to clean."""
-    logger_mock = mocker.MagicMock()
-    mock_os_scandir = mocker.patch("os.scandir")
-    mock_os_scandir.return_value.__enter__.return_value = []
-    mock_os_remove = mocker.patch("os.remove")
-    mock_shutil_rmtree = mocker.patch("shutil.rmtree")
-    p = Unpacker(config, logger_mock)
-    p._clean_outbox_directory()
-    mock_os_remove.assert_not_called()
-    mock_shutil_rmtree.assert_not_called()
-
-
-def test_unpacker_clean_outbox_directory_file(config, mocker, path_map_mock):
-    """Test that _clean_outbox_directory will bail when configured not to clean."""
-    logger_mock = mocker.MagicMock()
-    mock_os_scandir = mocker.patch("os.scandir")
-    direntry = mocker.MagicMock()
-    direntry.is_file.return_value = True
-    mock_os_scandir.return_value.__enter__.return_value = [direntry]
-    mock_os_remove = mocker.patch("os.remove")
     mock_shutil_rmtree = mocker.patch("shutil.rmtree")
     p = Unpacker(config, logger_mock)
-    p._clean_outbox_directory()
-    mock_os_remove.assert_called()
+    await p._clean_outbox_directory("0869ea50-e437-443f-8cdb-31a350f88e57")
     mock_shutil_rmtree.assert_not_called()
 
 
-def test_unpacker_clean_outbox_directory_directory(config, mocker, path_map_mock):
-    """Test that _clean_outbox_directory will bail when configured not to clean."""
-    logger_mock = mocker.MagicMock()
-    mock_os_scandir = mocker.patch("os.scandir")
-    direntry = mocker.MagicMock()
-    direntry.is_file.return_value = False
-    direntry.is_dir.return_value = True
-    mock_os_scandir.return_value.__enter__.return_value = [direntry]
-    mock_os_remove = mocker.patch("os.remove")
-    mock_shutil_rmtree = mocker.patch("shutil.rmtree")
-    p = Unpacker(config, logger_mock)
-    p._clean_outbox_directory()
-    mock_os_remove.assert_not_called()
-    mock_shutil_rmtree.assert_called()
-
-
-def test_unpacker_clean_outbox_directory_unknown(config, mocker, path_map_mock):
-    """Test that _clean_outbox_directory will bail when configured not to clean."""
+@pytest.mark.asyncio
+async def test_unpacker_clean_outbox_directory(config, mocker, path_map_mock, tmp_path):
+    """Test that _clean_outbox_directory removes only the directory of its own bundle."""
     logger_mock = mocker.MagicMock()
-    mock_os_scandir = mocker.patch("os.scandir")
-    direntry = mocker.MagicMock()
-    direntry.is_file.return_value = False
-    direntry.is_dir.return_value = False
-    mock_os_scandir.return_value.__enter__.return_value = [direntry]
-    mock_os_remove = mocker.patch("os.remove")
-    mock_shutil_rmtree = mocker.patch("shutil.rmtree")
+    config["UNPACKER_OUTBOX_PATH"] = str(tmp_path)
+    for bundle_uuid in ["0869ea50-e437-443f-8cdb-31a350f88e57", "f74db80e-9661-40cc-9f01-8d087af23f56"]:
+        (tmp_path / bundle_uuid / "sub").mkdir(parents=True)
+        (tmp_path / bundle_uuid / "sub" / "file.tar.bz2").write_text("data")
     p = Unpacker(config, logger_mock)
-    p._clean_outbox_directory()
-    mock_os_remove.assert_not_called()
-    mock_shutil_rmtree.assert_not_called()
+    await p._clean_outbox_directory("0869ea50-e437-443f-8cdb-31a350f88e57")
+    assert sorted(os.listdir(tmp_path)) == ["f74db80e-9661-40cc-9f01-8d087af23f56"]
@@ -0,0 +1,13 @@
+# test_utils.py
+"""Unit tests for lta/utils.py."""
+
+from lta.utils import boolify
+
+def test_boolify():
+    """Test the boolify function."""
+    assert boolify("True")
+    assert boolify("yes")
+    assert boolify("1")
+    assert not boolify("False")
+    assert not boolify("")
+    assert not boolify(None)  # type: ignore[arg-type]
@@ -0,0 +1,37 @@
+# test_uuid_array.py
+"""Unit tests for lta/uuid_array.py."""
+
+from uuid import uuid1, uuid4
+
+import pytest  # type: ignore
+
+from lta.uuid_array import pack_uuids, unpack_uuids, UUID_SIZE
+
+def test_pack_uuids_round_trip():
+    """Test that packed UUIDs unpack to the same strings."""
+    dashed = [str(uuid4()) for i in range(100)]
+    packed = pack_uuids(dashed, dashed=True)
+    assert len(packed) == 100 * UUID_SIZE
+    assert unpack_uuids(packed, dashed=True) == dashed
+    hexed = [uuid1().hex for i in range(100)]
+    assert unpack_uuids(pack_uuids(hexed, dashed=False), dashed=False) == hexed
+    assert pack_uuids([], dashed=True) == b""
+    assert unpack_uuids(b"", dashed=False) == []
+
+def test_pack_uuids_not_canonical():
+    """Test that UUIDs which would not survive packing are refused."""
+    value = uuid4()
+    for uuids, dashed in [
+        (["not-a-uuid"], True),
+        ([value.hex], True),
+        ([str(value)], False),
+        ([str(value).upper()], True),
+        ([f"{{{value}}}"], True),
+    ]:
+        with pytest.raises(ValueError):
+            pack_uuids(uuids, dashed)
+
+def test_unpack_uuids_bad_length():
+    """Test that a truncated UUID array is refused."""
+    with pytest.raises(ValueError):
+        unpack_uuids(bytes(UUID_SIZE + 1), dashed=True)